@@ -43,6 +43,7 @@ class Actor(game.objects.GraphicObject):
         )
         self.actorType = actorType
         self.impact = False
+        self.previousPosition = (x, y)  # Position before last update, for drawing interpolation
 
     def move(self, xOffset: int, yOffset: int) -> None:
         if xOffset != 0 or yOffset != 0:
@@ -53,13 +54,33 @@ class Actor(game.objects.GraphicObject):
 
     def setPosition(self, x: int, y: int) -> None:
         if x != self.rect.left or y != self.rect.top:
-            self.rect.top, self.rect.left = x, y
+            self.rect.left, self.rect.top = x, y
             self.rect.clamp_ip(self.boundary)
             self.positionChanged()
 
     def positionChanged(self) -> None:
         self.parent.positionChanged(self)
 
+    def getDrawRect(self) -> pygame.Rect:
+        '''
+        Rect of actor on screen, interpolated between its last two updated positions
+        '''
+        parentMap = self.parent.parentMap
+        x, y = parentMap.interpolate(self.previousPosition, self.rect.topleft)
+        return parentMap.translateCoordinates(pygame.Rect(x, y, self.rect.width, self.rect.height))
+
+    def getDrawArea(self) -> pygame.Rect:
+        '''
+        Rect (map coords) covered by actor image
+        '''
+        return pygame.Rect(self.rect.topleft, self.tile.getImage().getSize())
+
+    def isAnimated(self) -> bool:
+        '''
+        Animated actors can change its image without moving
+        '''
+        return self.tile.animated
+
     def getColRect(self):
         return pygame.Rect(
             self.rect.left + self.xOffset,
@@ -90,7 +111,7 @@ class Actor(game.objects.GraphicObject):
         if not self.parent.parentMap:
             return
 
-        rect = self.parent.parentMap.translateCoordinates(self.rect)
+        rect = self.getDrawRect()
 
         self.tile.draw(renderer, rect)
         drawDebugRect(
@@ -16,18 +16,21 @@ logger = logging.getLogger(__name__)
 class Animation(object):
     def __init__(self, delay, startingPosition=0):
         self.images = []
-        self.position = self.startingPosition = startingPosition
-        self.baseDelay = self.delay = delay
+        self.startingPosition = startingPosition
+        self.baseDelay = max(delay, 1)
+        self.iterations = 0  # Position is computed from it only when needed
         self.associatedSounds = {}
 
     def associateSound(self, frame, sound):
         self.associatedSounds[frame] = sound
 
+    @property
+    def position(self):
+        return (self.startingPosition + self.iterations // self.baseDelay) % len(self.images)
+
     def iterate(self):
-        self.delay -= 1
-        if self.delay <= 0:
-            self.delay = self.baseDelay
-            self.position = (self.position + 1) % len(self.images)
+        self.iterations += 1
+        if self.associatedSounds and self.iterations % self.baseDelay == 0:
             snd = self.associatedSounds.get(self.position)
             if snd is not None:
                 snd.play()
@@ -38,14 +41,13 @@ class Animation(object):
         return self.position
 
     def reset(self):
-        self.position = self.startingPosition
-        self.delay = self.baseDelay
+        self.iterations = 0
 
     def get(self):
         return self.images[self.position]
 
     def draw(self, renderer, rect, effect=None):
-        image = self.images[self.position]
+        image = self.get()
         if effect == 'laplacian':
             image = pygame.transform.laplacian(image)
         renderer.blit(image, rect.topleft)
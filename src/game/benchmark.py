@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+'''
+Deterministic benchmarks of game states
+
+Game states are run "as fast as possible" (no clock) for a fixed number of ticks,
+using a headless renderer, while a script of input events is replayed on them.
+Script is a list of [tick, 'down' | 'up', key name (as pygame constants, i.e. K_RIGHT)]
+'''
+import gc
+import os
+import json
+import time
+import typing
+import logging
+import functools
+import tracemalloc
+
+import pygame
+from pygame import locals
+
+from game.game_state import GameControl
+from game.renderer import RendererHeadless
+
+logger = logging.getLogger(__name__)
+
+Script = typing.Dict[int, typing.List[pygame.event.Event]]
+Results = typing.Dict[str, typing.Any]
+
+_EVENT_TYPES = {
+    'down': locals.KEYDOWN,
+    'up': locals.KEYUP,
+}
+
+
+def parseScript(entries: typing.Iterable[typing.Sequence[typing.Any]]) -> Script:
+    script: Script = {}
+    for tick, action, key in entries:
+        if action not in _EVENT_TYPES:
+            raise Exception('Invalid script action: {}'.format(action))
+        event = pygame.event.Event(_EVENT_TYPES[action], key=getattr(locals, key))
+        script.setdefault(int(tick), []).append(event)
+    return script
+
+
+def loadScript(path: str) -> Script:
+    with open(path, 'r') as f:
+        return parseScript(json.load(f))
+
+
+def createController(
+    width: int, height: int, framerate: int = 50, drawing: bool = True, dirtyRects: bool = False
+) -> GameControl:
+    '''
+    Creates a game controller with a headless renderer, that needs no display nor sound devices
+    '''
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    return GameControl(
+        width,
+        height,
+        framerate=framerate,
+        renderer=functools.partial(RendererHeadless, drawing=drawing, dirtyRects=dirtyRects),  # type: ignore
+    )
+
+
+def run(
+    controller: GameControl,
+    ticks: int,
+    script: typing.Optional[Script] = None,
+    drawEvery: int = 1,
+    traceAllocations: bool = False,
+) -> Results:
+    '''
+    Runs current state of controller for "ticks" ticks, drawing once every "drawEvery" ticks
+    (0 for no drawing at all), and returns the measures taken
+    '''
+    script = script or {}
+    renderer = controller.getRenderer()
+
+    updateTime = drawTime = 0.0
+    draws = 0
+    blits = getattr(renderer, 'totalBlits', 0)
+    collections = sum(s['collections'] for s in gc.get_stats())
+    if traceAllocations:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if not controller.current:
+            break
+        t = time.perf_counter()
+        newState = controller.current.tick(script.get(tick, []))
+        updateTime += time.perf_counter() - t
+
+        if newState is None and drawEvery and tick % drawEvery == 0:
+            t = time.perf_counter()
+            newState = controller.render()
+            drawTime += time.perf_counter() - t
+            draws += 1
+
+        if newState is not None and controller.switch(newState) is False:
+            logger.debug('Benchmark finished by state at tick {}'.format(tick))
+            ticks = tick + 1
+            break
+    elapsed = time.perf_counter() - start
+
+    results: Results = {
+        'ticks': ticks,
+        'seconds': elapsed,
+        'ticksPerSecond': ticks / elapsed if elapsed else 0.0,
+        'updateSeconds': updateTime,
+        'draws': draws,
+        'drawSeconds': drawTime,
+        'drawsPerSecond': draws / drawTime if drawTime else 0.0,
+        'blits': getattr(renderer, 'totalBlits', 0) - blits,
+        'gcCollections': sum(s['collections'] for s in gc.get_stats()) - collections,
+    }
+
+    if traceAllocations:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results['allocatedBytes'] = current
+        results['peakAllocatedBytes'] = peak
+
+    return results
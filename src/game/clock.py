@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+'''
+Engine ticks clock
+
+It is advanced once per logic tick (see GameState.frame), so anything that changes
+with time (i.e. tiles animations) can compute its current state from it when it's
+needed, instead of being updated on every tick.
+'''
+
+
+class EngineClock:
+    tick: int
+
+    def __init__(self) -> None:
+        self.tick = 0
+
+    def advance(self) -> None:
+        self.tick += 1
+
+
+engineClock = EngineClock()
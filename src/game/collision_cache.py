@@ -5,11 +5,72 @@ import pygame
 
 from game.interfaces import Collidable
 from game.interfaces import Drawable
+from game.collision_grid import TILE_BLOCKS, TILE_ACTIONS
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+X_AXIS, Y_AXIS = 0, 1
+
+
+def _moveAlong(rect, axis, offset):
+    return rect.move(offset, 0) if axis == X_AXIS else rect.move(0, offset)
+
+
+def _isSupport(rect, colRect):
+    '''
+    True if colRect overlaps just the lower part of rect, as something rect stands on
+    '''
+    return colRect.colliderect(rect) and colRect.top > rect.top and colRect.bottom >= rect.bottom
+
+
+def _tilesHits(tiles, rect):
+    # Tiles that do nothing when touched are not of interest
+    return list(tiles.getTilesCollisions(rect, TILE_BLOCKS | TILE_ACTIONS)) if tiles is not None else []
+
+
+def sweepAxis(rect, offset, axis, candidates, gap=1, tiles=None):
+    '''
+    Swept AABB of rect moving "offset" pixels along axis (X_AXIS or Y_AXIS) against
+    candidates, a list of (colRect, obj, layer) as returned by getCollisions, and
+    against the blocking and acting tiles of "tiles" (a map, read from its collision grid).
+    Time of impact of every blocking candidate is computed in just one pass, so
+    nothing is tunneled no matter how fast rect moves.
+    Returns (allowed offset, blocked, contacts), where allowed offset stops "gap" pixels
+    before first blocking object, and contacts are the candidates touched along the
+    allowed path (including the blocking ones that stopped the movement)
+    '''
+    if offset == 0:
+        return 0, False, [c for c in candidates if c[0].colliderect(rect)] + _tilesHits(tiles, rect)
+
+    sign = 1 if offset > 0 else -1
+    swept = rect.union(_moveAlong(rect, axis, offset + sign * gap))
+    hits = [c for c in candidates if c[0].colliderect(swept)] + _tilesHits(tiles, swept)
+
+    allowed = offset
+    for colRect, obj, layer in hits:
+        if not obj.collisionFlags & TILE_BLOCKS:
+            continue
+        # Objects under us that we already overlap (i.e. a platform lifting us) hold us,
+        # so they do not block moving up or sideways. Any other object we are already
+        # inside of blocks as usual, so we are pushed back out of it
+        if (axis == X_AXIS or sign < 0) and _isSupport(rect, colRect):
+            continue
+        if sign > 0:
+            limit = colRect[axis] - gap - (rect[axis] + rect[axis + 2])
+        else:
+            limit = colRect[axis] + colRect[axis + 2] + gap - rect[axis]
+        if limit * sign < allowed * sign:
+            allowed = limit
+
+    blocked = allowed != offset
+    # Blocking objects are touched, so they are also contacts
+    reach = _moveAlong(rect, axis, allowed + sign * (gap + 1) if blocked else offset)
+    reach.union_ip(rect)
+    return allowed, blocked, [c for c in hits if c[0].colliderect(reach)]
+
+
 class CollisionCache(object):
     def __init__(self, parentMap, cachesActors=False, cachesObjects=False, cacheThreshold=32, collisionRangeCheck=128):
         self._parentMap = parentMap
@@ -18,23 +79,58 @@ class CollisionCache(object):
         self._cacheThreshold = cacheThreshold
         self._collisionRange = collisionRangeCheck
         
+        # Candidates are kept by layer, with the layer version they were got at, so
+        # only the layers modified since then (see Layer.markModified) are retrieved again
+        self._layersActors = {}
+        self._layersObjects = {}
+        self._layersTriggers = {}
         self._colCacheActors = None
         self._colCacheObjects = None
+        self._colCacheTriggers = None
         self._cachedPos = (-100000, -10000)
         
         
     def resetCollisionsCache(self, rect: pygame.Rect) -> None:
-        self._colCacheActors = self._colCacheObjects = None
+        self._layersActors = {}
+        self._layersObjects = {}
+        self._layersTriggers = {}
+        self._colCacheActors = self._colCacheObjects = self._colCacheTriggers = None
         self._cachedPos = rect.topleft
+
+    def _updateLayers(self, layers, cached, candidates, area):
+        '''
+        Retrieves again candidates of layers modified since they were cached.
+        Returns the updated layers candidates, or None if all of them were up to date
+        '''
+        # Nothing cached yet (candidates is None) is stale too, even with no layers at all
+        stale = candidates is None or len(layers) != len(cached)
+        updated = {}
+        for layer in layers:
+            entry = cached.get(layer)
+            if entry is None or entry[0] != layer.version:
+                entry = (layer.version, [(c[0], c[1], layer) for c in layer.getPossibleCollisions(area)])
+                stale = True
+            updated[layer] = entry
+        return updated if stale else None
         
     def updateCollisionsCache(self, rect: pygame.Rect) -> None:
         if abs(self._cachedPos[0] - rect.x) > self._cacheThreshold or abs(self._cachedPos[1] - rect.y) > self._cacheThreshold:
             self.resetCollisionsCache(rect)
-        
-        if self._colCacheActors is None:
-            self._colCacheActors = self._parentMap.getPossibleActorsCollisions(rect, self._collisionRange, self._collisionRange)
-        if self._colCacheObjects is None:
-            self._colCacheObjects = self._parentMap.getPossibleCollisions(rect, self._collisionRange, self._collisionRange)
+
+        area = pygame.Rect(self._cachedPos, rect.size).inflate(2 * self._collisionRange, 2 * self._collisionRange)
+        updated = self._updateLayers(self._parentMap.getActorsLayers(), self._layersActors, self._colCacheActors, area)
+        if updated is not None:
+            self._layersActors = updated
+            self._colCacheActors = [c for _, candidates in updated.values() for c in candidates]
+        # Tiles are read from map collision grid when needed, so just objects are cached
+        updated = self._updateLayers(self._parentMap.getObjectsCollisionsLayers(), self._layersObjects, self._colCacheObjects, area)
+        if updated is not None:
+            self._layersObjects = updated
+            self._colCacheObjects = [c for _, candidates in updated.values() for c in candidates]
+        updated = self._updateLayers(self._parentMap.getTriggersLayers(), self._layersTriggers, self._colCacheTriggers, area)
+        if updated is not None:
+            self._layersTriggers = updated
+            self._colCacheTriggers = [c for _, candidates in updated.values() for c in candidates]
         
     @property
     def actorsCache(self):
@@ -44,13 +140,28 @@ class CollisionCache(object):
     def objectCache(self):
         return self._colCacheObjects
 
+    @property
+    def triggersCache(self):
+        return self._colCacheTriggers
+
     def getActorsCollissions(self, rect):
         self.updateCollisionsCache(rect)
         return self._parentMap.getActorsCollisions(rect, self._colCacheActors)
     
     def getObjectsCollisions(self, rect):
         self.updateCollisionsCache(rect)
-        return self._parentMap.getCollisions(rect, self._colCacheObjects)
+        for col in self._parentMap.getCollisions(rect, self._colCacheObjects):
+            yield col
+        for col in self._parentMap.getTilesCollisions(rect):
+            yield col
+
+    def checkTriggers(self, rect):
+        self.updateCollisionsCache(rect)
+        self._parentMap.checkTriggers(rect, self._colCacheTriggers)
+
+    def sweepObjects(self, rect, offset, axis, gap=1):
+        self.updateCollisionsCache(rect)
+        return sweepAxis(rect, offset, axis, self._colCacheObjects, gap, self._parentMap)
     
 class WithCollisionCache(Collidable):
     def __init__(self, parentMap, cachesActors=False, cachesObjects=False, cacheThreshold=32, collisionRangeCheck=128):
@@ -69,4 +180,15 @@ class WithCollisionCache(Collidable):
     def getActorsCollisions(self, rect=None):
         rect = self.getColRect() if rect is None else rect
         return self.collisionCache.getActorsCollissions(rect)
-    
\ No newline at end of file
+    
+
+    def checkTriggers(self, rect=None):
+        rect = self.getColRect() if rect is None else rect
+        self.collisionCache.checkTriggers(rect)
+
+    def sweepCollisions(self, offset, axis, rect=None, gap=1):
+        '''
+        Swept collision of our collision rect moving offset pixels along axis (see sweepAxis)
+        '''
+        rect = self.getColRect() if rect is None else rect
+        return self.collisionCache.sweepObjects(rect, offset, axis, gap)
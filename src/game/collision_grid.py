@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+'''
+Compact collision flags of tiles
+
+Every tile of a map gets a byte of flags (what it is for collisions), and the map
+keeps a grid with the flags of all its collision tile layers merged, so collision
+queries read that grid (integers) instead of looking up tiles and building rects.
+Tiles are only looked up for the cells that matter (i.e. the ones to act on), and
+rects are only built for tiles with a collision rect smaller than its cell.
+'''
+import typing
+
+if typing.TYPE_CHECKING:
+    import game.objects
+    import game.tiles
+
+TILE_COLLIDES = 0x01  # Any non empty tile
+TILE_BLOCKS = 0x02
+TILE_LADDER = 0x04
+TILE_LETHAL = 0x08
+TILE_COLLECTABLE = 0x10
+TILE_LOCK = 0x20
+TILE_PARTIAL = 0x40  # Collision rect of tile is not exactly its grid cell
+
+TILE_ACTIONS = TILE_LADDER | TILE_LETHAL | TILE_COLLECTABLE | TILE_LOCK  # Touching them does something
+
+_TYPES_FLAGS = {
+    'ladder': TILE_LADDER,
+    'lethal': TILE_LETHAL,
+    'collectable': TILE_COLLECTABLE,
+    'lock': TILE_LOCK,
+}
+
+
+def objectFlags(obj: 'game.objects.GraphicObject') -> int:
+    '''
+    Collision flags of a map object (tile, platform...) from its type and blocks attributes
+    '''
+    flags = TILE_COLLIDES | _TYPES_FLAGS.get(obj.objType or '', 0)
+    if obj.blocks:
+        flags |= TILE_BLOCKS
+    return flags
+
+
+def tileFlags(tile: 'game.tiles.Tile', tileWidth: int, tileHeight: int) -> int:
+    '''
+    Collision flags of tile on a map with tiles of tileWidth x tileHeight
+    '''
+    flags = objectFlags(tile)
+    if tuple(tile.getRect()) != (0, 0, tileWidth, tileHeight):
+        flags |= TILE_PARTIAL
+    return flags
+
+
+def flagsTable(tiles: typing.List['game.tiles.Tile'], tileWidth: int, tileHeight: int) -> bytearray:
+    '''
+    Flags of every tile, indexed by tile id (0, the empty tile, has no flags)
+    '''
+    return bytearray([0] + [tileFlags(t, tileWidth, tileHeight) for t in tiles])
+
+
+class CollisionGrid(object):
+    '''
+    Flags of every cell of a map, row after row
+    '''
+    width: int
+    height: int
+    cells: bytearray
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height)
+
+    def merge(self, tilesIds: typing.Iterable[int], table: bytearray) -> None:
+        '''
+        Adds flags of a tiles layer (its tiles ids, row after row)
+        '''
+        flags = bytearray(table[t] for t in tilesIds)
+        if not any(self.cells):
+            self.cells = flags
+        else:
+            self.cells = bytearray(a | b for a, b in zip(self.cells, flags))
+
+    def get(self, x: int, y: int) -> int:
+        return self.cells[y * self.width + x]
+
+    def set(self, x: int, y: int, flags: int) -> None:
+        self.cells[y * self.width + x] = flags
+
+    def row(self, y: int, xStart: int, xEnd: int) -> bytearray:
+        pos = y * self.width
+        return self.cells[pos+xStart:pos+xEnd]
+
+    def fill(self, xStart: int, yStart: int, xEnd: int, yEnd: int, flags: int) -> None:
+        fill = bytes([flags]) * (xEnd - xStart)
+        for y in range(yStart, yEnd):
+            pos = y * self.width
+            self.cells[pos+xStart:pos+xEnd] = fill
+
+    def flagsIn(self, xStart: int, yStart: int, xEnd: int, yEnd: int) -> int:
+        '''
+        All flags of cells from xStart, yStart to xEnd, yEnd (not included) merged
+        '''
+        flags = 0
+        for y in range(yStart, yEnd):
+            for f in set(self.row(y, xStart, xEnd)):
+                flags |= f
+        return flags
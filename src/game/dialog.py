@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import typing
+import collections
 
 import pygame
 
@@ -13,6 +14,8 @@ BLUE_STEEL = 1
 
 _TILE_SIZE = 33
 
+FRAMES_CACHE_PIXELS = 2 * 1024 * 1024  # Max pixels of built dialog frames kept
+
 
 class DialogStyle:
     path: str
@@ -36,12 +39,24 @@ class DialogStyle:
             self.tiles.append(tiles)
 
 
+def _slices(size: int) -> typing.List[typing.Tuple[int, int]]:
+    '''
+    (position, length) of first, middle and last slices of a frame side of size pixels
+    '''
+    return [(0, _TILE_SIZE), (_TILE_SIZE, size - 2 * _TILE_SIZE), (size - _TILE_SIZE, _TILE_SIZE)]
+
+
 class Dialog(object):
     __builder = None
 
+    frames: 'collections.OrderedDict[typing.Tuple[int, int, int], renderer.Image]'
+    framesPixels: int
+
     def __init__(self, tileSheets):
         self.tileSheets = tileSheets
         self.styles = [DialogStyle(tileSheet) for tileSheet in self.tileSheets]
+        self.frames = collections.OrderedDict()
+        self.framesPixels = 0
 
     @util.classProperty
     def builder(cls):
@@ -49,32 +64,82 @@ class Dialog(object):
             cls.__builder = Dialog(('transparent-dialog.png', 'blue-steel-dialog.png'))
         return cls.__builder
 
-    def genDialog(self, width, height, style=0):
-
+    @staticmethod
+    def frameSize(width: float, height: float) -> typing.Tuple[int, int]:
+        '''
+        Size of the dialog frame that contains width x height pixels (whole tiles, 3 at least)
+        '''
+        return (
+            max(3, int(width + _TILE_SIZE - 1) // _TILE_SIZE) * _TILE_SIZE,
+            max(3, int(height + _TILE_SIZE - 1) // _TILE_SIZE) * _TILE_SIZE,
+        )
+
+    def getFrame(self, width: float, height: float, style: int = 0) -> renderer.Image:
+        '''
+        Dialog frame containing width x height pixels. Frames are shared, so it must not be modified
+        '''
+        width, height = self.frameSize(width, height)
+        key = (style, width, height)
+        frame = self.frames.get(key)
+        if frame is not None:
+            self.frames.move_to_end(key)
+            return frame
+
+        frame = self.frames[key] = self.buildFrame(width, height, style)
+        self.framesPixels += width * height
+        while self.framesPixels > FRAMES_CACHE_PIXELS and len(self.frames) > 1:
+            _, old = self.frames.popitem(last=False)
+            self.framesPixels -= old.getWidth() * old.getHeight()
+        return frame
+
+    def buildFrame(self, width: int, height: int, style: int) -> renderer.Image:
+        '''
+        Composes a frame of width x height pixels (whole tiles) from the nine tiles of style:
+        corners once, and sides and center repeated along the frame
+        '''
         sTiles = self.styles[style].tiles
 
-        width = 3 if width < 99 else (width + _TILE_SIZE - 1) / _TILE_SIZE
-        height = 3 if height < 99 else (height + _TILE_SIZE - 1) / _TILE_SIZE
-
-        surface = renderer.Renderer.renderer.image(width * _TILE_SIZE, height * _TILE_SIZE)
-
-        for y in range(0, int(height)):
-            for x in range(0, int(width)):
-                if y == 0:  # Left side
-                    tiles = sTiles[0]
-                elif y == height - 1:
-                    tiles = sTiles[2]
-                else:
-                    tiles = sTiles[1]
-                if x == 0:
-                    tile = tiles[0]
-                elif x == width - 1:
-                    tile = tiles[2]
-                else:
-                    tile = tiles[1]
-                surface.blit(tile, (x * _TILE_SIZE, y * _TILE_SIZE))
-
-        return surface
+        # Composed on a plain surface, so the image (GL texture) is created just once
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        for row, (y, h) in zip(sTiles, _slices(height)):
+            for tile, (x, w) in zip(row, _slices(width)):
+                for ty in range(y, y + h, _TILE_SIZE):
+                    for tx in range(x, x + w, _TILE_SIZE):
+                        surface.blit(tile.surface, (tx, ty))
+
+        return renderer.Renderer.renderer.imageFromSurface(surface)
+
+    def genDialog(self, width, height, style=0):
+        '''
+        New image with a dialog frame containing width x height pixels, to draw on it
+        '''
+        return self.getFrame(width, height, style).copy()
+
+    def drawDialog(
+        self,
+        rendererInstance: renderer.Renderer,
+        position: typing.Tuple[float, float],
+        width: float,
+        height: float,
+        style: int = 0,
+    ) -> None:
+        '''
+        Draws a dialog frame containing width x height pixels at position. Renderers that
+        stretch images for free draws the nine tiles scaled, so no frame is composed at all
+        '''
+        if not rendererInstance.canBlitScaled():
+            rendererInstance.blit(self.getFrame(width, height, style), position)
+            return
+
+        width, height = self.frameSize(width, height)
+        left, top = int(position[0]), int(position[1])
+        for row, (y, h) in zip(self.styles[style].tiles, _slices(height)):
+            for tile, (x, w) in zip(row, _slices(width)):
+                rendererInstance.blitScaled(tile, pygame.Rect(left + x, top + y, w, h))
+
+    def clear(self) -> None:
+        self.frames.clear()
+        self.framesPixels = 0
 
     def textDialog(self, text, style):
         pass
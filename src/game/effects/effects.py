@@ -2,13 +2,30 @@
 
 import logging
 
+from .pool import effectsPool
+
 logger = logging.getLogger(__name__)
 
 class Effect(object):
+    pooled = False  # Acquired from effects pool, so it's recycled when removed
+
     def __init__(self, rect):
         self.rect = rect
         self.effectId = None
 
+    @classmethod
+    def acquire(cls, *args, **kwargs):
+        '''
+        Gets a recycled effect (or a new one if none available) built with args
+        '''
+        return effectsPool.acquire(cls, *args, **kwargs)
+
+    def release(self):
+        '''
+        Invoked when effect is removed, to release shared resources (see effects pool)
+        '''
+        pass
+
     def update(self):
         '''
         If returns True, means that this effect has finished
@@ -18,5 +35,11 @@ class Effect(object):
     def getRect(self):
         return self.rect
 
+    def getDrawRect(self):
+        '''
+        Rect (map coords) where this effect is drawn
+        '''
+        return self.rect
+
     def draw(renderer, rect):
         pass
@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 import pygame
 from ..util import resource_path
 from ..effects import Effect
+from .pool import effectsPool
 from .. import dialog
 from ..renderer import Renderer
 
@@ -21,23 +22,30 @@ class FadingMovingValueEffect(Effect):
     def __init__(self, x, y, value, ticks=50):
         Effect.__init__(self, pygame.Rect(x, y, 0, 0))
 
+        value = str(value)
+        # Same values shares the same image
+        self.image = effectsPool.acquireRendered(('value', value), lambda: self.renderValue(value))
+
+        self.ticks =  self.totalTicks = ticks
+
+        self.rect.top -= NUMBER_SIZE
+        self.rect.left -=  NUMBER_SIZE * len(value) / 2
+        self.y = self.rect.top
 
+    @staticmethod
+    def renderValue(value):
         if FadingMovingValueEffect.numbersImage is None:
             FadingMovingValueEffect.initializeNumbers()
 
-        value = str(value)
-        self.image = surface = Renderer.renderer.image(len(value)*NUMBER_SIZE, NUMBER_SIZE)
-        self.image.fill((255, 255, 255, 0))
+        image = effectsPool.image(len(value)*NUMBER_SIZE, NUMBER_SIZE)
         pos = 0
         for v in value:
-            self.image.blit( FadingMovingValueEffect.numbers[v], (pos, 0))
+            image.blit( FadingMovingValueEffect.numbers[v], (pos, 0))
             pos += NUMBER_SIZE
+        return image
 
-        self.ticks =  self.totalTicks = ticks
-
-        self.rect.top -= NUMBER_SIZE
-        self.rect.left -=  NUMBER_SIZE * len(value) / 2
-        self.y = self.rect.top
+    def release(self):
+        effectsPool.releaseRendered(self.image)
 
     def update(self):
         self.ticks -= 1
@@ -46,6 +54,9 @@ class FadingMovingValueEffect(Effect):
             return True
         return False
 
+    def getDrawRect(self):
+        return pygame.Rect(self.rect.topleft, self.image.getSize())
+
     def draw(self, renderer, rect):
         alpha = 255 * self.ticks / self.totalTicks
 
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+'''
+Recycling of effects
+
+Effects are short lived and very frequent (i.e. one per coin picked up), so instead
+of building them (and their images) again and again, released effects are kept by class
+to be initialized again, images rendered by effects are shared by content (as the value
+or text shown), and images no longer used are kept by size to be drawn again.
+'''
+import typing
+import logging
+import collections
+
+from ..renderer import Renderer
+
+if typing.TYPE_CHECKING:
+    from .effects import Effect
+    import game.renderer
+
+logger = logging.getLogger(__name__)
+
+MAX_POOLED_EFFECTS = 16  # Released effects kept for every effect class
+MAX_POOLED_IMAGES = 8  # Released images kept for every size
+RENDERED_CACHE = 64  # Rendered images kept by content (images in use are never discarded)
+
+TRANSPARENT = (0, 0, 0, 0)
+
+
+class RenderedEntry(object):
+    __slots__ = ('image', 'references')
+
+    def __init__(self, image):
+        self.image = image
+        self.references = 0
+
+
+class EffectsPool(object):
+    effects: typing.Dict[type, typing.List['Effect']]
+    images: typing.Dict[typing.Tuple[typing.Any, int, int], typing.List['game.renderer.Image']]
+    rendered: 'collections.OrderedDict[typing.Any, RenderedEntry]'
+    renderedKeys: typing.Dict[typing.Any, typing.Any]  # Image -> key
+
+    def __init__(self) -> None:
+        self.effects = {}
+        self.images = {}
+        self.rendered = collections.OrderedDict()
+        self.renderedKeys = {}
+
+    def acquire(self, effectClass: type, *args: typing.Any, **kwargs: typing.Any) -> 'Effect':
+        '''
+        A released effect of effectClass initialized again with args, or a new one
+        '''
+        free = self.effects.get(effectClass)
+        if free:
+            effect = free.pop()
+            effect.__init__(*args, **kwargs)
+        else:
+            effect = effectClass(*args, **kwargs)
+        effect.pooled = True
+        return effect
+
+    def release(self, effect: 'Effect') -> None:
+        '''
+        Invoked when effect is not used anymore. Releases its resources, and
+        keeps it to be reused if it was acquired from pool
+        '''
+        effect.release()
+        if not effect.pooled:
+            return
+        effect.pooled = False  # So it's not kept twice
+        free = self.effects.setdefault(type(effect), [])
+        if len(free) < MAX_POOLED_EFFECTS:
+            free.append(effect)
+
+    def image(self, width: int, height: int) -> 'game.renderer.Image':
+        '''
+        A transparent image of width x height, recycled if possible
+        '''
+        free = self.images.get((Renderer.renderer, width, height))
+        image = free.pop() if free else Renderer.renderer.image(width, height)
+        image.fill(TRANSPARENT)
+        return image
+
+    def releaseImage(self, image: 'game.renderer.Image', renderer: typing.Any = None) -> None:
+        width, height = image.getSize()
+        free = self.images.setdefault((renderer or Renderer.renderer, width, height), [])
+        if len(free) < MAX_POOLED_IMAGES:
+            free.append(image)
+
+    def acquireRendered(
+        self, key: typing.Any, render: typing.Callable[[], 'game.renderer.Image']
+    ) -> 'game.renderer.Image':
+        '''
+        Image with content "key", rendered by render() if it's not already cached.
+        Must be paired with a releaseRendered, and image must not be modified
+        '''
+        key = (Renderer.renderer, key)
+        entry = self.rendered.get(key)
+        if entry is None:
+            entry = self.rendered[key] = RenderedEntry(render())
+            self.renderedKeys[entry.image] = key
+            entry.references += 1
+            self.discardRendered()
+        else:
+            self.rendered.move_to_end(key)
+            entry.references += 1
+        return entry.image
+
+    def releaseRendered(self, image: 'game.renderer.Image') -> None:
+        key = self.renderedKeys.get(image)
+        if key is not None:
+            self.rendered[key].references -= 1
+
+    def discardRendered(self) -> None:
+        '''
+        Recycles least recently used images not in use, until cache is below its limit
+        '''
+        excess = len(self.rendered) - RENDERED_CACHE
+        if excess <= 0:
+            return
+        discarded = [key for key, entry in self.rendered.items() if entry.references == 0][:excess]
+        for key in discarded:
+            image = self.rendered.pop(key).image
+            del self.renderedKeys[image]
+            self.releaseImage(image, key[0])
+
+    def clear(self) -> None:
+        self.effects.clear()
+        self.images.clear()
+        self.rendered.clear()
+        self.renderedKeys.clear()
+
+
+effectsPool = EffectsPool()
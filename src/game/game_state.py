@@ -6,6 +6,9 @@ import pygame
 from pygame import locals
 
 from game.renderer import Renderer
+from game.profiler import Profiler, profiler
+from game.clock import engineClock
+from game.text import TextCache
 
 import logging
 
@@ -47,14 +50,16 @@ class GameState:
         '''
         newState: typing.Optional[str] = None
 
-        for event in events:
-            newState = self.event(event)
-            if newState:
-                break
+        with profiler.section('events'):
+            for event in events:
+                newState = self.event(event)
+                if newState:
+                    break
 
         # Executes game logic if no new game state is requested
         if not newState:
-            newState = self.frame()
+            with profiler.section('logic'):
+                newState = self.frame()
 
         return newState
 
@@ -81,6 +86,7 @@ class GameState:
     def frame(self) -> typing.Optional[str]:
         '''game logic'''
         self.total_frames += 1
+        engineClock.advance()
         self.on_frame()
         return None
 
@@ -88,6 +94,12 @@ class GameState:
         self.rendered_frames += 1
         return self.on_render()
 
+    def quit(self) -> None:
+        '''
+        Invoked on game exit, to release resources of the state (i.e. threads)
+        '''
+        self.on_quit()
+
     def on_init(self) -> None:
         print("Base on_init called!!!")
 
@@ -112,6 +124,9 @@ class GameState:
         print("Base on_render called!!!")
         return None
 
+    def on_quit(self) -> None:
+        pass
+
 
 class GameControl:
     EXIT_GAMESTATE = 'EXIT_GAME'
@@ -121,6 +136,10 @@ class GameControl:
     frameskipEnabled: bool
     frameskip: int
     frameSkipCount: int
+    fixedTimestep: bool
+    maxUpdatesPerFrame: int
+    renderFramerate: int
+    profiler: Profiler
     clock: pygame.time.Clock
     width: int
     height: int
@@ -134,6 +153,9 @@ class GameControl:
         enableFrameSkip: bool = False,
         fullScreen: bool = False,
         renderer: typing.Type[Renderer] = Renderer,
+        fixedTimestep: bool = False,
+        maxUpdatesPerFrame: int = 5,
+        renderFramerate: typing.Optional[int] = None,
     ):
         self.states = {}
         self.current = None
@@ -143,6 +165,14 @@ class GameControl:
         self.frameSkip = 0
         self.frameSkipCount = 0
 
+        # On fixed timestep mode, logic runs exactly "framerate" ticks per second, and
+        # rendering (capped at renderFramerate) gets the interpolation between ticks
+        self.fixedTimestep = fixedTimestep
+        self.maxUpdatesPerFrame = maxUpdatesPerFrame
+        self.renderFramerate = renderFramerate or framerate
+
+        self.profiler = profiler
+
         self.clock = pygame.time.Clock()
 
         # Initializes all used libraries
@@ -172,16 +202,21 @@ class GameControl:
             self.current.exit()
 
         self.current = self.states[game_state]
+        self.renderer.invalidate()  # New state will draw a different screen
         self.current.enter()
         return True
 
     def run(self) -> None:
         if not self.current:
             return
+        if self.fixedTimestep:
+            self.runFixedTimestep()
+            return
         logger.debug('Running main loop')
 
         frames_counter: int = 0
         while True:
+            self.profiler.beginFrame()
 
             frames_counter += 1
 
@@ -222,10 +257,64 @@ class GameControl:
                 if self.switch(new_state) is False:
                     return
 
+            self.profiler.endFrame()
             self.clock.tick(self.framerate)
 
             # Nothing more to do, this is the basic loop
 
+    def runFixedTimestep(self) -> None:
+        if not self.current:
+            return
+        logger.debug('Running fixed timestep main loop')
+
+        step = 1000.0 / self.framerate  # Milliseconds per logic tick
+        maxAccumulated = step * self.maxUpdatesPerFrame
+        accumulator = 0.0
+        events: typing.List[pygame.event.Event] = []
+        frames_counter: int = 0
+        lastTime = pygame.time.get_ticks()
+        while True:
+            self.profiler.beginFrame()
+
+            now = pygame.time.get_ticks()
+            accumulator += now - lastTime
+            lastTime = now
+
+            # If we are too late, forget about the lost time instead of trying to catch up,
+            # so slow machines run the game slower instead of bursting updates
+            if accumulator > maxAccumulated:
+                accumulator = maxAccumulated
+
+            frames_counter += 1
+            if frames_counter > self.renderFramerate:
+                pygame.display.set_caption(
+                    "FPS: {}, Ticks: {}".format(self.clock.get_fps(), self.framerate)
+                )
+                frames_counter = 0
+
+            # Events are delivered only once, to the first tick processed
+            events.extend(pygame.event.get())
+
+            new_state = None
+            while accumulator >= step and new_state is None:
+                new_state = self.current.tick(events)
+                events = []
+                accumulator -= step
+
+            if new_state is None:
+                self.renderer.interpolation = accumulator / step
+                new_state = self.render()
+
+            if new_state is not None:
+                logger.debug('Got new state: {}'.format(new_state))
+                if self.switch(new_state) is False:
+                    return
+                accumulator = 0.0
+                events = []
+
+            self.profiler.endFrame()
+            self.clock.tick(self.renderFramerate)
+
     def getRenderer(self) -> Renderer:
         return self.renderer
 
@@ -234,10 +323,15 @@ class GameControl:
             return None
         self.renderer.beginDraw()
         res = self.current.render()
-        self.renderer.endDraw()
+        self.profiler.drawOverlay(self.renderer)
+        with self.profiler.section('endDraw'):
+            self.renderer.endDraw()
         return res
 
     def quit(self):
+        for state in self.states.values():
+            state.quit()
+        TextCache.cache.clear()  # Fonts are not valid anymore
         pygame.font.quit()
         pygame.mixer.quit()
         self.renderer.quit()
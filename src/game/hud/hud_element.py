@@ -4,11 +4,50 @@ from __future__ import unicode_literals
 import pygame
 
 class HudElement(object):
+    '''
+    Element drawn on screen, over the map.
+    Retained elements are bound to a value (getValue), and keep an image showing it
+    (render) that is composed again only when value changes, so the hud layer just
+    blits that image every frame. Other elements draws themselves (draw)
+    '''
+    retained = False
+
     def __init__(self, x, y, w=0, h=0):
         self.rect = pygame.Rect(x, y, w, h)
-        
+        self.image = None
+        self.value = None  # Value shown by image
+        self.rendered = False
+
     def draw(self, toSurface):
         pass
     
     def update(self):
         pass
+
+    def getValue(self):
+        '''
+        Value shown by a retained element
+        '''
+        return None
+
+    def render(self, value):
+        '''
+        Image of a retained element showing value (can reuse its current image)
+        '''
+        return None
+
+    def getImage(self):
+        value = self.getValue()
+        if not self.rendered or value != self.value:
+            self.image = self.render(value)
+            self.value = value
+            self.rendered = True
+        return self.image
+
+    def isChanged(self):
+        '''
+        Returns True if element must be redrawn (when rendering only changed regions)
+        '''
+        if self.retained:
+            return not self.rendered or self.getValue() != self.value
+        return False
@@ -17,13 +17,14 @@ class ScoreableMixin(object):
         return 0
 
 class ScoreFilesHud(HudElement):
+    retained = True
+
     def __init__(self, scoreable, digitsFilesPattern, digits, x, y):
         HudElement.__init__(self, x, y)  # Width and height has te bo be calculated later
         if not isinstance(scoreable, ScoreableMixin):
             raise TypeError('{} Must include ScoreableMixin'.format(type(scoreable)))
         self.scoreable = scoreable
         self.digits = digits
-        self.score = scoreable.getScore() - 1
 
         files = sorted(glob.glob(resource_path(digitsFilesPattern)))
         if len(files) != 10:
@@ -36,27 +37,25 @@ class ScoreFilesHud(HudElement):
         self.rect.width = self.width * self.digits
         self.rect.height = max([i.getHeight() for i in self.images])
 
-        self.image = Renderer.renderer.image(self.rect.width, self.rect.height)
-
-    def draw(self, toSurface):
-        score = self.score = self.scoreable.getScore()
+        self.shown = None  # Digits on image
 
-        pos = self.rect.left
-        for digit in [int(score/(10**i))%10 for i in range(self.digits-1,-1,-1)]:
-            Renderer.renderer.blit(self.images[digit], (pos, self.rect.top))
-            pos += self.width
+    def getValue(self):
+        return self.scoreable.getScore()
 
-        #toSurface.blit(self.image, self.rect.topleft)
+    def render(self, score):
+        # Just last "digits" digits of score are shown
+        digits = [int(d) for d in '{:0{}d}'.format(int(score) % (10 ** self.digits), self.digits)]
+        if digits == self.shown:
+            return self.image
 
-    def update(self):
-        pass
-        #if self.score == self.scoreable.getScore():
-            #return  # No update to rect
-
-        #score = self.score = self.scoreable.getScore()
-        #self.image.fill((0, 0, 0, 0))  # Transparent
-        #pos = 0
-        #for digit in [(score/(10**i))%10 for i in range(self.digits-1,-1,-1)]:
-            #self.image.blit(self.images[digit], (pos, 0))
-            #pos += self.width
+        if self.image is None:
+            self.image = Renderer.renderer.image(self.rect.width, self.rect.height)
+        else:
+            self.image.fill((0, 0, 0, 0))  # Transparent
 
+        pos = 0
+        for digit in digits:
+            self.image.blit(self.images[digit], (pos, 0))
+            pos += self.width
+        self.shown = digits
+        return self.image
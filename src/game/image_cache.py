@@ -1,35 +1,119 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import os
+import typing
+
 import pygame
 from game.util import classProperty
 
 import logging
 
+if typing.TYPE_CHECKING:
+    import game.renderer
+
 logger = logging.getLogger(__name__)
 
+# An image is identified by its renderer, file and the transformations applied to it, as
+# (('subimage', x, y, width, height), ('flip', flipX, flipY, rotate), ...)
+Transform = typing.Tuple[typing.Tuple[typing.Any, ...], ...]
+Key = typing.Tuple['game.renderer.Renderer', str, Transform]
+
+
+class CacheEntry(object):
+    __slots__ = ('image', 'references', 'parent')
+
+    def __init__(self, image, parent):
+        self.image = image
+        self.references = 1
+        self.parent = parent  # Image this one is derived from (referenced while this exists)
+
+
 # Global tiles images caching
-# Tiles images do not gets modified, so cachin them to no load
-# again and again for each map is nice...
+# Tiles images do not gets modified, so images (and tiles, and flipped tiles...) are
+# shared by all maps that uses them. Every acquire must be paired with a release,
+# and images are forgotten when nobody references them.
 class ImageCache(object):
     _cache = None
-    
+
+    entries: typing.Dict[Key, CacheEntry]
+    keys: typing.Dict[typing.Any, Key]  # Image -> key
+
     def __init__(self):
-        self.images = {}
-    
+        self.entries = {}
+        self.keys = {}
+
     @classProperty
     def cache(cls):
         if cls._cache is None:
             cls._cache = ImageCache()
         return cls._cache
-    
-    def load(self, imagePath):
-        if self.images.get(imagePath) is not None:
-            image = self.images[imagePath]
+
+    def acquire(
+        self,
+        renderer: 'game.renderer.Renderer',
+        imagePath: str,
+        transform: Transform = (),
+        surface: typing.Optional[pygame.Surface] = None,
+    ) -> 'game.renderer.Image':
+        '''
+        Gets image from imagePath with transform applied. If surface is provided, it's
+        used (instead of loading the file) if the image is not already cached.
+        '''
+        key = (renderer, os.path.normcase(os.path.abspath(imagePath)), tuple(transform))
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.references += 1
+            return entry.image
+
+        parent = None
+        if not transform:
+            if surface is not None:
+                image = renderer.imageFromSurface(surface.convert_alpha())
+            else:
+                image = renderer.imageFromFile(imagePath)
         else:
-            image = pygame.image.load(imagePath)
-            self.images[imagePath] = image
-        
-        return image.convert_alpha()
-        
-    
\ No newline at end of file
+            parent = self.acquire(renderer, imagePath, transform[:-1], surface)
+            image = self.apply(parent, transform[-1])
+
+        self.entries[key] = CacheEntry(image, parent)
+        self.keys[image] = key
+        return image
+
+    def derive(self, image: 'game.renderer.Image', operation: typing.Tuple[typing.Any, ...]) -> 'game.renderer.Image':
+        '''
+        Gets image with operation applied (shared if image is cached)
+        '''
+        key = self.keys.get(image)
+        if key is None:
+            return self.apply(image, operation)
+        return self.acquire(key[0], key[1], key[2] + (tuple(operation),))
+
+    def release(self, image: 'game.renderer.Image') -> None:
+        key = self.keys.get(image)
+        if key is None:  # Not cached
+            return
+
+        entry = self.entries[key]
+        entry.references -= 1
+        if entry.references > 0:
+            return
+
+        del self.entries[key]
+        del self.keys[image]
+        if entry.parent is not None:
+            self.release(entry.parent)
+
+    def apply(self, image: 'game.renderer.Image', operation: typing.Tuple[typing.Any, ...]) -> 'game.renderer.Image':
+        if operation[0] == 'subimage':
+            return image.subimage(pygame.Rect(operation[1:]))
+        if operation[0] == 'flip':
+            return image.flip(*operation[1:])
+        raise Exception('Invalid image operation: {}'.format(operation))
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.keys.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
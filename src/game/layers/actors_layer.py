@@ -3,7 +3,8 @@ from __future__ import unicode_literals
 
 from game.actors import actorsFactory
 from game.layers.layer import Layer
-from game.quadtree import QuadTree
+from game.spatial_hash import SpatialHash
+from game.util import checkTrue
 
 import logging
 
@@ -20,35 +21,101 @@ class ActorsLayer(Layer):
         self.width = self.height = 0
         self.actorList = []
         self.setProperties(arrayLayer.properties)
+        # Broadphase for collisions, kept updated by actors through positionChanged
+        self.actorsIndex = SpatialHash(int(self.properties.get('index_cell_size', SpatialHash.DEFAULT_CELL_SIZE)))
+        # Last known draw area of actors, so on dirty rects mode, wherever an actor is
+        # moved from, its previous area gets redrawn
+        self.drawAreas = {}
+
+        # On streaming mode, actors are created when their sector gets active, except
+        # "persistent" ones (i.e. player), that are always created and updated
+        self.pending = {}  # Sector -> actors to be created there
+        self.persistentActors = []
 
         logger.debug('Adding actors from {}'.format(arrayLayer))
-        # Sort actors by type, we can later iterate this dictionary
-        for actor in arrayLayer:
-            x, y, tile, actorType = actor[0], actor[1], actor[2], actor[2].getProperty('type')
-            if actorType is None:
-                logger.error('Found an actor without type: {} (ignored)'.format(actorType))
-                continue
-            aClass = actorsFactory.getActor(actorType)
-            if aClass is None:
-                logger.error('Found an unregistered actor class: {}'.format(actorType))
+        streaming = parentMap.streaming
+        for x, y, tile in arrayLayer:
+            persistent = checkTrue(tile.getProperty('persistent', 'False'))
+            if streaming and not persistent:
+                self.pending.setdefault(parentMap.getSector(x, y), []).append((x, y, tile))
                 continue
-            self.actorList.append(aClass(self, tile, actorType, x, y))
+            actor = self.createActor(x, y, tile)
+            if actor is not None and persistent:
+                self.persistentActors.append(actor)
         logger.debug('Actors added')
 
+    def createActor(self, x, y, tile):
+        actorType = tile.getProperty('type')
+        if actorType is None:
+            logger.error('Found an actor without type: {} (ignored)'.format(actorType))
+            return None
+        aClass = actorsFactory.getActor(actorType)
+        if aClass is None:
+            logger.error('Found an unregistered actor class: {}'.format(actorType))
+            return None
+        actor = aClass(self, tile, actorType, x, y)
+        self.actorList.append(actor)
+        self.actorsIndex.insert(actor)
+        self.drawAreas[actor] = actor.getDrawArea()
+        self.markModified()
+        return actor
+
+    def activateSectors(self, sectors):
+        for sector in sectors:
+            for x, y, tile in self.pending.pop(sector, ()):
+                actor = self.createActor(x, y, tile)
+                if actor is not None:
+                    self.markDirty(actor.getDrawArea())
+
+    def getActiveActors(self):
+        '''
+        Actors that must be updated
+        '''
+        if not self.parentMap.streaming:
+            return self.actorList
+        actors = dict.fromkeys(self.persistentActors)
+        actors.update(dict.fromkeys(self.actorsIndex.retrieve(self.parentMap.activeArea)))
+        return list(actors)
+
     def onDraw(self, toSurface, rect):
-        for actor in self.actorList:
+        for actor in self.actorsIndex.retrieve(self.getDrawingArea(toSurface, rect)):
             if actor.collide(rect):  # Only draws if actor is visible
                 actor.draw(toSurface)
 
     def onUpdate(self):
-        self.actorList[:] = [actor for actor in self.actorList if actor.update() is True]
+        dead = {}
+        tracking = self.isTrackingDirty()
+        for actor in self.getActiveActors():
+            actor.previousPosition = actor.rect.topleft
+            if tracking:
+                before = actor.getDrawArea()
+            if actor.update() is True:
+                if tracking:
+                    after = self.drawAreas[actor] = actor.getDrawArea()
+                    if after != before or actor.isAnimated():
+                        self.markDirty(before)
+                        self.markDirty(after)
+            else:
+                dead[actor] = None
+                self.actorsIndex.remove(actor)
+                self.markModified()
+                if tracking:
+                    self.markDirty(before)
+                self.drawAreas.pop(actor, None)
+        if dead:
+            self.actorList[:] = [actor for actor in self.actorList if actor not in dead]
+            self.persistentActors[:] = [actor for actor in self.persistentActors if actor not in dead]
 
     def getCollisions(self, rect):
-        #logger.debug('Number of object retrieved for {}: {} (list has {} objects)'.format(rect, len(list(self.quadtree.retrieve(rect))), len(self.actorList) ))
-        for actor in self.actorList:
+        for actor in self.actorsIndex.retrieve(rect):
             if actor.collide(rect):
                 yield (actor.getRect(), actor, self)
 
+    def getPossibleCollisions(self, rect):
+        # Every actor on index cells touched by rect, so only cells changes modifies the layer
+        for actor in self.actorsIndex.retrieve(rect):
+            yield (actor.getRect(), actor)
+
     def getActors(self, actorType=None):
         for actor in self.actorList:
             if actorType is None:
@@ -57,11 +124,26 @@ class ActorsLayer(Layer):
                 yield actor
                 
     def positionChanged(self, obj):
-        logger.debug('The obj {} has changed it\'s position'.format(obj))
+        if self.actorsIndex.update(obj):
+            self.markModified()
+        # Actors can be moved from outside its update (i.e. by platforms), so both
+        # areas, where it was and where it is, must be redrawn
+        area = obj.getDrawArea()
+        previous = self.drawAreas.get(obj)
+        if previous != area:
+            if previous is not None:
+                self.markDirty(previous)
+            self.markDirty(area)
+            self.drawAreas[obj] = area
 
     def removeActor(self, actor):
         try:
             self.actorList.remove(actor)
         except ValueError:
             return False
+        if actor in self.persistentActors:
+            self.persistentActors.remove(actor)
+        self.actorsIndex.remove(actor)
+        self.markModified()
+        self.markDirty(self.drawAreas.pop(actor, actor.getDrawArea()))
         return True
@@ -1,17 +1,40 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import array
 import pygame
-import base64
-import struct
-import itertools
-from game.util import loadProperties
+import collections
+from game.util import checkTrue
+from game.maps import tmx
+from game.collision_grid import TILE_PARTIAL
 from game.layers.layer import Layer
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHUNK_SIZE = 8  # Tiles per side of a pre-rendered chunk
+DEFAULT_CHUNK_CACHE = 48  # Max number of chunks kept baked at once
+
+
+class Chunk(object):
+    '''
+    A block of chunkSize x chunkSize tiles baked into a single image
+    '''
+    def __init__(self, image, animatedTiles):
+        self.image = image  # None if the chunk has no tiles at all
+        self.animatedTiles = animatedTiles
+        self.frames = self.currentFrames()
+
+    def currentFrames(self):
+        return tuple(t.getImage() for t in self.animatedTiles)
+
+    def isStale(self):
+        '''
+        A chunk gets stale when any of the animated tiles it contains has advanced
+        '''
+        return self.animatedTiles and self.frames != self.currentFrames()
+
 
 class ArrayLayer(Layer):
     LAYER_TYPE = 'array'
@@ -20,119 +43,143 @@ class ArrayLayer(Layer):
         Layer.__init__(self, parentMap, layerType, properties)
         self.width = self.height = 0
         self.data = []
-        self.lines = None
-        self.lineOffsets = None
+        self.rowsCount = None  # Number of not empty tiles on each row
+        self.animatedIds = None  # Animated tiles ids on layer -> last frame checked (dirty rects mode)
+        self.chunks = collections.OrderedDict()
+
+    def updateAttributes(self):
+        Layer.updateAttributes(self)
+        # Chunked mode bakes the layer in blocks of chunk_size x chunk_size tiles, so
+        # drawing costs a few blits per frame instead of one per visible tile
+        # Tiles bigger than map grid are clipped at chunk borders on this mode
+        self.chunked = checkTrue(self.properties.get('chunked', 'False'))
+        self.chunkSize = int(self.properties.get('chunk_size', DEFAULT_CHUNK_SIZE))
+        self.chunkCache = int(self.properties.get('chunk_cache', DEFAULT_CHUNK_CACHE))
+
+    def rowTiles(self, y, xStart=0, xEnd=None):
+        '''
+        Tiles ids of row y, from xStart to xEnd (not included), as a slice of layer data
+        '''
+        pos = self.width * y
+        return self.data[pos+xStart:pos+(self.width if xEnd is None else xEnd)]
 
     def updateCacheLine(self, y):
-        tiles = self.parentMap.tiles
-
-        def tileAt(x):
-            return self.data[y*self.width+x]-1
-
-        self.lines[y] = [(x, tileAt(x)) for x in range(self.width) if tileAt(x) >= 0]
-
-        self.lineOffsets[y] = [-1]*self.width
-
-        curr = 0
-        counter = 0
-        for x, tile in self.lines[y]:
-            while curr <= x:
-                self.lineOffsets[y][curr] = counter
-                curr += 1
-            counter += 1
-
-        logger.debug(self.lineOffsets[y])
+        self.rowsCount[y] = self.width - self.rowTiles(y).count(0)
 
     def updateAllCacheLines(self):
-        self.lines = [[]] * self.height
-        self.lineOffsets = [[]] * self.height
+        self.rowsCount = array.array(tmx.TILE_TYPECODE, [0]) * self.height
         for y in range(self.height):
             self.updateCacheLine(y)
 
-    def load(self, node):
-        self.name = node.attrib['name']
-        self.width = int(node.attrib['width'])
-        self.height = int(node.attrib['height'])
-
-        self.setProperties(loadProperties(node.find('properties')))
-
-        data = node.find('data')
-        if data.attrib['encoding'] != 'base64':
-            raise Exception('No base 64 encoded')
-        self.data = list(struct.unpack('<' + 'I'*(self.width*self.height), base64.b64decode(data.text)))
-
-        cached = {} # So we got only 1 tile generated from 1 source and 1 transormation
-        # Scan data for "flipped" tiles and request parentMap to append a flipped tile to it
-        for i in range(len(self.data)):
-            tileId = self.data[i]
-            if tileId & 0xF0000000 != 0:
-                if cached.get(tileId) is None:
-                    logger.debug('Fipped tile found!: {:X}'.format(tileId&0xF0000000))
-                    # Tiles can be flipped on TILED, for now, we ignore this and all tiles ar got as they are
-                    # const unsigned FLIPPED_HORIZONTALLY_FLAG = 0x80000000;
-                    # const unsigned FLIPPED_VERTICALLY_FLAG   = 0x40000000;
-                    # const unsigned FLIPPED_DIAGONALLY_FLAG   = 0x20000000;
-                    flipX = flipY = rotate = False
-                    if tileId & 0x80000000 != 0:
-                        flipX = True
-                    if tileId & 0x40000000 != 0:
-                        flipY = True
-                    if tileId & 0x20000000 != 0:
-                        rotate = True
-                    self.data[i] = cached[tileId] = self.parentMap.addTileFromTile(tileId&0x0FFFFFFF, flipX, flipY, rotate)
-                else:
-                    self.data[i] = cached[tileId]
+    def load(self, data):
+        self.name = data['name']
+        self.width = data['width']
+        self.height = data['height']
+
+        self.setProperties(data['properties'])
 
-        # Fill line "strides" of not empty tiles
+        # Flipped tiles has already been resolved to tiles appended to parentMap
+        self.data = data['data']
+
+        self.animatedIds = None
+
+        # Count not empty tiles of every row, so empty ones are skipped
         self.updateAllCacheLines()
 
-    def onDraw(self, renderer, rect):
+    def buildChunk(self, cx, cy):
+        '''
+        Bakes the tiles of chunk (cx, cy) (in chunk coordinates) into an image
+        '''
         tiles = self.parentMap.tiles
         tileWidth = self.parentMap.tileWidth
         tileHeight = self.parentMap.tileHeight
 
-        # Calculate positions inside tile array
-        xStart, xLen = int(rect.x / tileWidth), int((rect.width + tileWidth - 1) / tileWidth + 1)
-        yStart, yLen = int(rect.y / tileHeight),int((rect.height + tileHeight - 1) / tileHeight + 1)
+        xStart, yStart = cx * self.chunkSize, cy * self.chunkSize
+        xEnd = min(xStart + self.chunkSize, self.width)
+        yEnd = min(yStart + self.chunkSize, self.height)
 
-        # If drawing zone is outside map, skip
-        # if xStart > self.width or yStart > self.height or xStart + xLen < 0 or yStart + yLen < 0:
-        #    return
+        image = None
+        animatedTiles = []
+        drawingRect = pygame.Rect(0, 0, tileWidth, tileHeight)
+        for y in range(yStart, yEnd):
+            if self.rowsCount[y] == 0:
+                continue
+            drawingRect.y = (y - yStart) * tileHeight
+            for x, tileId in enumerate(self.rowTiles(y, xStart, xEnd), xStart):
+                if tileId == 0:
+                    continue
+                if image is None:  # Only non empty chunks gets an image
+                    image = self.getRenderer().image((xEnd - xStart) * tileWidth, (yEnd - yStart) * tileHeight)
+                    image.fill((0, 0, 0, 0))  # Transparent background
+                tile = tiles[tileId-1]
+                drawingRect.x = (x - xStart) * tileWidth
+                tile.blit(image, drawingRect)
+                if tile.animated and tile not in animatedTiles:
+                    animatedTiles.append(tile)
+
+        return Chunk(image, animatedTiles)
+
+    def invalidateChunk(self, x, y):
+        '''
+        Discards the chunk holding tile x, y (in tiles coordinates), so it's rebuilt when needed
+        '''
+        self.chunks.pop((x // self.chunkSize, y // self.chunkSize), None)
+
+    def drawChunks(self, renderer, rect, area=None):
+        '''
+        Draws the chunks visible on area (defaults to rect), relative to rect
+        '''
+        area = area or rect
+        chunkWidth = self.chunkSize * self.parentMap.tileWidth
+        chunkHeight = self.chunkSize * self.parentMap.tileHeight
+
+        cxStart = max(area.left // chunkWidth, 0)
+        cxEnd = min((area.right + chunkWidth - 1) // chunkWidth, (self.width + self.chunkSize - 1) // self.chunkSize)
+        cyStart = max(area.top // chunkHeight, 0)
+        cyEnd = min((area.bottom + chunkHeight - 1) // chunkHeight, (self.height + self.chunkSize - 1) // self.chunkSize)
+
+        for cy in range(cyStart, cyEnd):
+            for cx in range(cxStart, cxEnd):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None or chunk.isStale():
+                    chunk = self.chunks[(cx, cy)] = self.buildChunk(cx, cy)
+                else:
+                    self.chunks.move_to_end((cx, cy))  # Most recently used at end
+                if chunk.image is not None:
+                    renderer.blit(chunk.image, (cx * chunkWidth - rect.x, cy * chunkHeight - rect.y))
+
+        # Forget least recently drawn chunks
+        while len(self.chunks) > self.chunkCache:
+            self.chunks.popitem(last=False)
 
-        # If start drawing outside screen, skip outside zone
-        yPos = 0
-        if yStart < 0:
-            yLen += yStart
-            yPos = -yStart * tileHeight
-            yStart = 0
+    def onDraw(self, renderer, rect):
+        area = self.getDrawingArea(renderer, rect)
+        if area.width <= 0 or area.height <= 0:
+            return
 
-        xPos = 0
-        if xStart < 0:
-            xLen += xStart
-            xPos = -xStart * tileWidth
-            xStart = 0
+        if self.chunked:
+            self.drawChunks(renderer, rect, area)
+            return
 
-        xPos -= rect.x % tileWidth + xStart * tileWidth  # Offset inside first drawing tile
-        yPos -= rect.y % tileHeight
+        tiles = self.parentMap.tiles
+        tileWidth = self.parentMap.tileWidth
+        tileHeight = self.parentMap.tileHeight
 
-        # Adjust ends so we don't go off limits
-        xEnd = self.width if xStart+xLen > self.width else xStart+xLen
-        yEnd = self.height if yStart+yLen > self.height else yStart+yLen
+        # Calculate positions inside tile array, skipping zones outside map
+        xStart = max(area.left // tileWidth, 0)
+        xEnd = min((area.right - 1) // tileWidth + 1, self.width)
+        yStart = max(area.top // tileHeight, 0)
+        yEnd = min((area.bottom - 1) // tileHeight + 1, self.height)
 
-        drawingRect = pygame.Rect(xPos, yPos, tileWidth, tileHeight)
+        drawingRect = pygame.Rect(0, yStart * tileHeight - rect.y, tileWidth, tileHeight)
+        xPos = -rect.x
 
         for y in range(yStart, yEnd):
-            xo = self.lineOffsets[y][xStart]
-            line = self.lines[y]
-            if xo != -1:  # Maybe the line do not holds anything at all, skip it
-                (x, tileId) = line[xo]
-                pos = self.width * y
-
-                for x, tileId in itertools.islice(line, xo, None):
-                    if x >= xEnd:
-                        break
-                    drawingRect.x = xPos + x * tileWidth
-                    tiles[tileId].draw(renderer, drawingRect)
+            if self.rowsCount[y] != 0:  # Maybe the line do not holds anything at all, skip it
+                for x, tileId in enumerate(self.rowTiles(y, xStart, xEnd), xStart):
+                    if tileId != 0:
+                        drawingRect.x = xPos + x * tileWidth
+                        tiles[tileId-1].draw(renderer, drawingRect)
             drawingRect.y += tileHeight
 
     def onUpdate(self):
@@ -147,40 +194,138 @@ class ArrayLayer(Layer):
         return self.parentMap.tiles[tile-1]
 
     def removeObjectAt(self, x, y):
-        x //= self.parentMap.tileWidth
-        y //= self.parentMap.tileHeight
-        self.data[y*self.width+x] = 0
-        self.updateCacheLine(y)
+        self.setTileAt(x, y, 0)
+
+    def removeObjectsIn(self, rect):
+        self.fillRect(rect, 0)
 
     def getCollisions(self, rect):
         tiles = self.parentMap.tiles
         tileWidth = self.parentMap.tileWidth
         tileHeight = self.parentMap.tileHeight
+        table = self.parentMap.tileFlags
 
-        xStart = rect.left // tileWidth
-        xEnd = (rect.right + tileWidth - 2) // tileWidth
-        yStart = rect.top // tileHeight
-        yEnd = (rect.bottom + tileHeight - 2) // tileHeight
+        # Out of bounds rows and columns are skipped
+        xStart = max(rect.left // tileWidth, 0)
+        xEnd = min((rect.right + tileWidth - 2) // tileWidth, self.width)
+        yStart = max(rect.top // tileHeight, 0)
+        yEnd = min((rect.bottom + tileHeight - 2) // tileHeight, self.height)
 
+        # Cells on range always collides with rect, so only tiles with its own
+        # collision rect needs to be checked. The rest uses the shared rects of cells
         for y in range(yStart, yEnd):
-            if y < 0 or y >= self.height:  # Skips out of bounds rows
+            if self.rowsCount[y] == 0:
                 continue
-            pos = self.width * y
-            for x in range(xStart, xEnd):
-                if x < 0 or x >= self.width:  # Skips out of bounds columns
+            for x, tileId in enumerate(self.rowTiles(y, xStart, xEnd), xStart):
+                flags = table[tileId]
+                if flags == 0:
                     continue
-                tile = self.data[pos+x]
-                if tile > 0:
-                    t = tiles[tile-1]
+                t = tiles[tileId-1]
+                if flags & TILE_PARTIAL:
                     tileRect = t.getRect().move(x*tileWidth, y*tileHeight)
-                    if tileRect.colliderect(rect):
-                        yield (tileRect, t)
+                    if not tileRect.colliderect(rect):
+                        continue
+                else:
+                    tileRect = self.parentMap.cellRect(x, y)
+                yield (tileRect, t)
 
     def setTileAt(self, x, y, tileId):
         x //= self.parentMap.tileWidth
         y //= self.parentMap.tileHeight
-        self.data[y*self.width+x] = tileId
-        self.updateCacheLine(y)
+        pos = y*self.width+x
+        # Keep row count without rescanning the row
+        self.rowsCount[y] += (tileId != 0) - (self.data[pos] != 0)
+        if self.isTrackingDirty():
+            self.markTilesDirty(x, y, x + 1, y + 1, (self.data[pos], tileId))
+        self.data[pos] = tileId
+        self.updateCollisionGrid(x, y, x + 1, y + 1)
+        self.markModified()
+        self.invalidateChunk(x, y)
+        self.addAnimatedId(tileId)
+
+    def fillRect(self, rect, tileId):
+        '''
+        Sets all tiles touched by rect (in pixels) to tileId, a row slice at a time
+        '''
+        tileWidth = self.parentMap.tileWidth
+        tileHeight = self.parentMap.tileHeight
+
+        xStart = max(rect.left // tileWidth, 0)
+        xEnd = min((rect.right + tileWidth - 1) // tileWidth, self.width)
+        yStart = max(rect.top // tileHeight, 0)
+        yEnd = min((rect.bottom + tileHeight - 1) // tileHeight, self.height)
+        if xStart >= xEnd:
+            return
+
+        fill = array.array(tmx.TILE_TYPECODE, [tileId]) * (xEnd - xStart)
+        for y in range(yStart, yEnd):
+            pos = self.width * y
+            self.data[pos+xStart:pos+xEnd] = fill
+            self.updateCacheLine(y)
+        self.updateCollisionGrid(xStart, yStart, xEnd, yEnd)
+        self.markModified()
+
+        if self.isTrackingDirty():
+            self.markTilesDirty(xStart, yStart, xEnd, yEnd)
+        self.addAnimatedId(tileId)
+
+        chunkSize = self.chunkSize
+        for cy in range(yStart // chunkSize, (yEnd - 1) // chunkSize + 1):
+            for cx in range(xStart // chunkSize, (xEnd - 1) // chunkSize + 1):
+                self.chunks.pop((cx, cy), None)
+
+    def updateCollisionGrid(self, xStart, yStart, xEnd, yEnd):
+        if self in self.parentMap.tilesCollisionsLayers:
+            self.parentMap.updateCollisionGrid(xStart, yStart, xEnd, yEnd)
+
+    def markTilesDirty(self, xStart, yStart, xEnd, yEnd, tileIds=None):
+        '''
+        Marks tiles from xStart, yStart to xEnd, yEnd (not included) as dirty. As tiles can be
+        bigger than map grid, tileIds (the ones replaced and the new ones) gives the tiles sizes,
+        else one more tile is marked to the right and bottom
+        '''
+        tileWidth = self.parentMap.tileWidth
+        tileHeight = self.parentMap.tileHeight
+        if tileIds is None:
+            width, height = tileWidth, tileHeight
+        else:
+            sizes = [self.parentMap.tiles[i-1].getImage().getSize() for i in tileIds if i > 0]
+            width = max([tileWidth] + [w for w, _ in sizes]) - tileWidth
+            height = max([tileHeight] + [h for _, h in sizes]) - tileHeight
+        self.markDirty(pygame.Rect(
+            xStart * tileWidth, yStart * tileHeight,
+            (xEnd - xStart) * tileWidth + width, (yEnd - yStart) * tileHeight + height
+        ))
+
+    def addAnimatedId(self, tileId):
+        if self.animatedIds is not None and tileId > 0 and self.parentMap.tiles[tileId-1].animated:
+            self.animatedIds.setdefault(tileId, None)
+
+    def onCheckDirty(self, rect):
+        tiles = self.parentMap.tiles
+        if self.animatedIds is None:
+            self.animatedIds = {tileId: None for tileId in set(self.data) if tileId > 0 and tiles[tileId-1].animated}
+
+        # Only tiles that has changed of frame since last check are dirty
+        changed = set()
+        for tileId, image in self.animatedIds.items():
+            if tiles[tileId-1].getImage() is not image:
+                changed.add(tileId)
+                self.animatedIds[tileId] = tiles[tileId-1].getImage()
+        if not changed:
+            return
+
+        tileWidth = self.parentMap.tileWidth
+        tileHeight = self.parentMap.tileHeight
+        xStart = max(rect.left // tileWidth, 0)
+        xEnd = min((rect.right - 1) // tileWidth + 1, self.width)
+        for y in range(max(rect.top // tileHeight, 0), min((rect.bottom - 1) // tileHeight + 1, self.height)):
+            if self.rowsCount[y] == 0:
+                continue
+            for x, tileId in enumerate(self.rowTiles(y, xStart, xEnd), xStart):
+                if tileId in changed:
+                    width, height = tiles[tileId-1].getImage().getSize()
+                    self.markDirty(pygame.Rect(x * tileWidth, y * tileHeight, width, height))
 
     def __iter__(self):
         '''
@@ -188,12 +333,14 @@ class ArrayLayer(Layer):
          return (x, y, tile) where x,y are integers and tile is an Tile object
          x and 6 are "Absolute map coords in pixels"
         '''
+        tileWidth = self.parentMap.tileWidth
+        tileHeight = self.parentMap.tileHeight
         for y in range(0, self.height):
-            pos = self.width * y
-            for x in range(0, self.width):
-                tile = self.data[pos+x]
+            if self.rowsCount[y] == 0:
+                continue
+            for x, tile in enumerate(self.rowTiles(y)):
                 if tile > 0:
-                    yield(x*self.parentMap.tileWidth, y*self.parentMap.tileHeight, self.parentMap.tiles[tile-1])
+                    yield(x*tileWidth, y*tileHeight, self.parentMap.tiles[tile-1])
 
     def __unicode__(self):
         return 'ArrayLayer {}: {}x{} ({})'.format(self.name, self.width, self.height, self.properties)
@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 
 from game.layers.layer import Layer
+from game.effects.pool import effectsPool
 
 import logging
 
@@ -16,9 +17,18 @@ class EffectsLayer(Layer):
         self.effectsList = []  # Empty effects list
 
     def onUpdate(self):
+        if self.isTrackingDirty():
+            # Effects changes on every update, so both before and after updating are dirty
+            for effect in self.effectsList:
+                self.markDirty(effect.getDrawRect())
+
         toRemove = [effect for effect in self.effectsList if effect.update()]
         for effectToRemove in toRemove:
             self.removeEffect(effectToRemove)
+
+        if self.isTrackingDirty():
+            for effect in self.effectsList:
+                self.markDirty(effect.getDrawRect())
         
     def onDraw(self, toSurface, rect):
         for effect in self.effectsList:
@@ -28,15 +38,23 @@ class EffectsLayer(Layer):
         if effectId is not None:
             for e in self.effectsList:
                 if e.effectId == effectId:
+                    effectsPool.release(effect)
                     return  # Do not add it again if it already exists
         
         self.effectsList.append(effect)
         effect.effectId = effectId
+        self.markDirty(effect.getDrawRect())
         
     def removeEffect(self, effect):
         try:
             self.effectsList.remove(effect)
         except ValueError:
             return False
+        effectsPool.release(effect)  # Recycled, so no more references to it must be kept
         return True
+
+    def unload(self):
+        for effect in self.effectsList:
+            effectsPool.release(effect)
+        self.effectsList = []
         
\ No newline at end of file
@@ -18,10 +18,24 @@ class HudLayer(Layer):
     def onUpdate(self):
         for hudElement in self.hudElementsList:
             hudElement.update()
+            if hudElement.isChanged():
+                self.markDirty(hudElement.rect)
         
     def onDraw(self, toSurface, rect):
         for hudElement in self.hudElementsList:
-            hudElement.draw(toSurface)
+            if hudElement.retained:
+                image = hudElement.getImage()
+                if image is not None:
+                    toSurface.blit(image, hudElement.rect.topleft)
+            else:
+                hudElement.draw(toSurface)
         
+    def getDirtyRects(self, x=0, y=0, width=0, height=0):
+        # Hud elements are positioned on screen, not on map
+        dirty = self.dirtyRects
+        self.dirtyRects = []
+        return dirty
+
     def addElement(self, hudElement):
-        self.hudElementsList.append(hudElement)
\ No newline at end of file
+        self.hudElementsList.append(hudElement)
+        self.markDirty(hudElement.rect)
\ No newline at end of file
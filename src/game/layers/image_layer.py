@@ -3,8 +3,8 @@ from __future__ import unicode_literals
 
 import pygame
 import os
-from game.util import loadProperties
 from game.layers.layer import Layer
+from game.image_cache import ImageCache
 
 import logging
 
@@ -21,16 +21,22 @@ class ImageLayer(Layer):
         self.cached_size = -1
         self.cached_image = None
 
-    def load(self, node):
+    def load(self, data):
         logger.debug('Loading image Layer')
-        self.name = node.attrib['name']
-        self.image_path = os.path.join(self.parentMap.mapPath, node.find('image').attrib['source'])
-        self.image = self.getRenderer().imageFromFile(self.image_path)
+        self.name = data['name']
+        self.image_path = os.path.join(self.parentMap.mapPath, data['imageFile'])
+        # Surface is already decoded if map has been prefetched
+        self.image = ImageCache.cache.acquire(self.getRenderer(), self.image_path, surface=data.get('surface'))
         self.cached_size = (-1, -1)
 
-        self.setProperties(loadProperties(node.find('properties')))
+        self.setProperties(data['properties'])
         logger.debug('Loaded image Layer {}'.format(self))
 
+    def unload(self):
+        if self.image is not None:
+            ImageCache.cache.release(self.image)
+            self.image = self.cached_image = None
+
     def onDraw(self, renderer, rect):
         if rect.height != self.cached_size[1]:
             width, height = self.image.getSize()
@@ -23,6 +23,10 @@ class Layer:
     triggers: bool
     parallaxFactor: typing.Tuple[int, int]
     properties: typing.Dict[str, str]
+    dirtyRects: typing.List[pygame.Rect]  # Changed regions (map coords) since last drawing
+    version: int  # Modifications counter of collidable contents (see game.collision_cache)
+    drawSection: str  # Profiler sections names (see game.profiler)
+    updateSection: str
 
     def __init__(
         self,
@@ -37,6 +41,9 @@ class Layer:
         self.holder = self.parallax = self.triggers = False
         self.parallaxFactor = (100, 100)
         self.properties = {}
+        self.dirtyRects = []
+        self.version = 0
+        self.drawSection = self.updateSection = ''
         self.setProperties(properties)
 
     def setProperties(self, properties: typing.Optional[typing.Dict[str, str]]) -> None:
@@ -57,12 +64,27 @@ class Layer:
             int(self.properties.get('parallax_factor_y', '100')),
         )
 
-    def load(self, node):
+    def load(self, data):
+        '''
+        Loads the layer from its parsed data (see game.maps.tmx)
+        '''
+        pass
+
+    def unload(self):
+        '''
+        Releases shared resources (i.e. cached images) of this layer
+        '''
         pass
 
     def update(self):
         self.onUpdate()
 
+    def activateSectors(self, sectors: typing.Set[typing.Tuple[int, int]]) -> None:
+        '''
+        On streaming mode, invoked when sectors (see Map.getSector) gets near the screen
+        '''
+        pass
+
     def onUpdate(self):
         pass
 
@@ -83,6 +105,49 @@ class Layer:
     def onDraw(self, toSurface: pygame.Surface, rect: pygame.Rect):
         pass
 
+    def getDrawingArea(self, renderer: 'game.renderer.Renderer', rect: pygame.Rect) -> pygame.Rect:
+        '''
+        Part of rect (map coords of screen) that really needs to be drawn, as
+        renderer could be drawing only a region of screen (see dirty rects mode)
+        '''
+        clip = renderer.getClip()
+        if clip is None:
+            return rect
+        return rect.clip(clip.move(rect.x, rect.y))
+
+    # Dirty rects mode
+    def isTrackingDirty(self) -> bool:
+        return self.parentMap is not None and self.parentMap.trackingDirty
+
+    def markDirty(self, rect: pygame.Rect) -> None:
+        '''
+        Notifies that rect (map coords) has changed, so it must be redrawn
+        '''
+        if self.isTrackingDirty():
+            self.dirtyRects.append(pygame.Rect(rect))
+
+    def getDirtyRects(self, x=0, y=0, width=0, height=0) -> typing.List[pygame.Rect]:
+        '''
+        Returns changed regions of screen (and forgets them) for a drawing at x, y
+        '''
+        if self.parallax is True:
+            x = x * self.parallaxFactor[0] / 100
+            y = y * self.parallaxFactor[1] / 100
+
+        rect = pygame.Rect(x, y, width, height)
+        self.onCheckDirty(rect)
+
+        dirty = [r.move(-rect.x, -rect.y) for r in self.dirtyRects if r.colliderect(rect)]
+        self.dirtyRects = []
+        return dirty
+
+    def onCheckDirty(self, rect: pygame.Rect) -> None:
+        '''
+        Invoked before drawing when tracking dirty rects, so layers can mark changes
+        they are not notified about (i.e. animations) inside rect
+        '''
+        pass
+
     def getType(self):
         return self.layerType
 
@@ -94,6 +159,12 @@ class Layer:
         x, y = y, x  # Avoif pylint unused
         pass
 
+    def removeObjectsIn(self, rect: pygame.Rect) -> None:
+        '''
+        Removes all objects touched by rect
+        '''
+        pass
+
     def isVisible(self):
         return self.visible
 
@@ -101,6 +172,19 @@ class Layer:
     def getCollisions(self, rect: pygame.Rect) -> typing.Iterable[typing.Any]:
         return ()
 
+    def getPossibleCollisions(self, rect: pygame.Rect) -> typing.Iterable[typing.Any]:
+        '''
+        Objects that can collide with rect while layer version does not change. Layers whose
+        objects moves without modifying version must return all the ones that could reach rect
+        '''
+        return self.getCollisions(rect)
+
+    def markModified(self) -> None:
+        '''
+        Notifies that collidable contents of layer has changed, so cached collisions are stale
+        '''
+        self.version += 1
+
     def getProperty(self, propertyName, default=None):
         '''
         Obtains a property associated whit this layer
@@ -5,8 +5,8 @@ import pygame
 
 from game import paths
 from game.objects import ObjectWithPath
-from game.util import loadProperties
 from game.layers.layer import Layer
+from game.sweep_and_prune import SweepAndPrune
 
 import logging
 
@@ -22,26 +22,33 @@ class PlatformsLayer(Layer):
         self.tilesLayer = None
         self.paths = {}
         self.platforms = []
+        self.platformsIndex = SweepAndPrune()  # Broadphase for drawing and collisions
+        self.reachIndex = SweepAndPrune(lambda obj: obj.getReachRect())  # Broadphase for possible collisions
+        self.pending = {}  # Sector -> platforms to be created there (streaming mode)
 
-    def load(self, node):
-        self.name = node.attrib['name']
+    def load(self, data):
+        self.name = data['name']
 
-        self.setProperties(loadProperties(node.find('properties')))
+        self.setProperties(data['properties'])
         tilesLayerName = self.properties.get('layer', None)
 
         self.tilesLayer = self.parentMap.getLayer(tilesLayerName)
 
         self.paths = {}
         self.platforms = []
+        self.platformsIndex.clear()
+        self.reachIndex.clear()
+        self.pending = {}
+        platforms = []
 
-        for obj in node.findall('object'):
-            if obj.attrib['type'] == 'path':  # This is a path, store it in pathList
-                name = obj.attrib['name']
-                properties = loadProperties(obj.find('properties'))
-                polyline = [[int(v) for v in i.split(',')] for i in obj.find('polyline').attrib['points'].split(' ')]
+        for obj in data['objects']:
+            if obj['type'] == 'path':  # This is a path, store it in pathList
+                name = obj['name']
+                properties = dict(obj['properties'])
+                polyline = obj['polyline'] or []
 
                 if len(polyline) > 0:
-                    origX, origY = int(obj.attrib['x']), int(obj.attrib['y'])
+                    origX, origY = obj['x'], obj['y']
                     x, y = origX + polyline[0][0], origY + polyline[0][1]
                     polyline = polyline[1:]
 
@@ -55,59 +62,84 @@ class PlatformsLayer(Layer):
                     self.paths[name] = paths.Path(segments, properties)
 
                     logger.debug('Path {} {}'.format(name, self.paths[name]))
-            elif obj.attrib['type'] == 'platform':
+            elif obj['type'] == 'platform':
                 if self.tilesLayer is None:
                     logger.error('Linking to an unexistent layer: {}. Skipped'.format(tilesLayerName))
                     continue
 
-                name = obj.attrib['name']
-                properties = loadProperties(obj.find('properties'))
-                startX, startY = int(obj.attrib['x']), int(obj.attrib['y'])
-                width, height = int(obj.attrib.get('width', self.parentMap.tileWidth)), int(obj.attrib.get('height', self.parentMap.tileHeight))
-
-                # Build graphic object from tiles
-                logger.debug('Building image of {}x{}'.format(width, height))
-                image = self.getRenderer().image(width, height)
-                image.fill((0, 0, 0, 0))  # Transparent background
-
-                for y in range(startY, startY+height, self.parentMap.tileHeight):
-                    for x in range(startX, startX+width, self.parentMap.tileWidth):
-                        tile = self.tilesLayer.getObjectAt(x, y)
-                        tile.blit(image, pygame.Rect(x-startX, y-startY, self.parentMap.tileWidth, self.parentMap.tileHeight))
-
-                p = ObjectWithPath(self, pygame.Rect(startX, startY, width, height), image, properties)
-                self.platforms.append(p)
-
-                logger.debug('Platform {}'.format(p))
+                properties = dict(obj['properties'])
+                width = obj['width'] if obj['width'] is not None else self.parentMap.tileWidth
+                height = obj['height'] if obj['height'] is not None else self.parentMap.tileHeight
+                platforms.append((pygame.Rect(obj['x'], obj['y'], width, height), properties))
 
             # Get obj properties to know that is this
-        # After loading, add pathList to Platforms
-        erroneous = []
-        for p in self.platforms:
-            if p.path is None:
-                continue
+        # Platforms are created once all paths are loaded
+        for rect, properties in platforms:
+            if self.parentMap.streaming:
+                self.pending.setdefault(self.parentMap.getSector(rect.x, rect.y), []).append((rect, properties))
+            else:
+                self.createPlatform(rect, properties)
+
+    def createPlatform(self, rect, properties):
+        # Build graphic object from tiles
+        logger.debug('Building image of {}x{}'.format(rect.width, rect.height))
+        image = self.getRenderer().image(rect.width, rect.height)
+        image.fill((0, 0, 0, 0))  # Transparent background
+
+        for y in range(rect.top, rect.bottom, self.parentMap.tileHeight):
+            for x in range(rect.left, rect.right, self.parentMap.tileWidth):
+                tile = self.tilesLayer.getObjectAt(x, y)
+                tile.blit(image, pygame.Rect(x-rect.left, y-rect.top, self.parentMap.tileWidth, self.parentMap.tileHeight))
+
+        p = ObjectWithPath(self, rect, image, properties)
+        if p.path is not None:
             try:
-                p.path = self.paths[p.path]
+                p.setPath(self.paths[p.path])
             except KeyError:
                 logger.error('Path {} doesn\'t exists (found on platform {}, on layer {})!!'.format(p.path, p.name, self.name))
-                erroneous.append(k)
-
-        for p in erroneous:
-            self.platforms.remove(p)
+                return None
+
+        self.platforms.append(p)
+        self.platformsIndex.insert(p)
+        self.reachIndex.insert(p)
+        self.markModified()
+        logger.debug('Platform {}'.format(p))
+        return p
+
+    def activateSectors(self, sectors):
+        for sector in sectors:
+            for rect, properties in self.pending.pop(sector, ()):
+                p = self.createPlatform(rect, properties)
+                if p is not None:
+                    self.markDirty(p.getRect())
 
     def onDraw(self, renderer, rect):
-        for obj in self.platforms:
-            if obj.collide(rect):
-                obj.draw(renderer, rect)
+        for obj in self.platformsIndex.retrieve(self.getDrawingArea(renderer, rect)):
+            obj.draw(renderer, rect)
 
     def onUpdate(self):
-        for obj in self.platforms:
+        tracking = self.isTrackingDirty()
+        # Out of active area (streaming mode) platforms are frozen
+        platforms = self.platforms
+        if self.parentMap.streaming:
+            platforms = self.platformsIndex.retrieve(self.parentMap.activeArea)
+        for obj in platforms:
+            before = obj.getRect().copy()
             obj.update()
+            if obj.getRect() != before:
+                self.platformsIndex.update(obj)
+                if tracking:
+                    self.markDirty(before)
+                    self.markDirty(obj.getRect())
 
     def getCollisions(self, rect):
-        for obj in self.platforms:
-            if obj.collide(rect):
-                yield (obj.getRect(), obj)
+        for obj in self.platformsIndex.retrieve(rect):
+            yield (obj.getRect(), obj)
+
+    def getPossibleCollisions(self, rect):
+        # Platforms moves all the time, but never leave their paths
+        for obj in self.reachIndex.retrieve(rect):
+            yield (obj.getRect(), obj)
 
     def getObject(self, objecName):
         for obj in self.platforms:
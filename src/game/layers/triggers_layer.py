@@ -4,10 +4,10 @@ from __future__ import unicode_literals
 import pygame
 
 from game import paths
-from game.util import loadProperties
 from game.layers.layer import Layer
 from game.objects.triggers import Trigger
 from game.objects.triggers import Triggered
+from game.spatial_hash import SpatialHash
 
 
 import logging
@@ -23,36 +23,41 @@ class TriggersLayer(Layer):
         self.width = self.height = 0
         self.triggersList = []
         self.triggeredsList = []
+        self.triggersIndex = SpatialHash()
         self.associatedLayer = None
 
-    def load(self, node):
-        self.name = node.attrib['name']
+    def load(self, data):
+        self.name = data['name']
         self.triggersList = []
         self.triggeredsList = []
 
-        self.setProperties(loadProperties(node.find('properties')))
+        self.setProperties(data['properties'])
+        # Triggers does not move, so this is only modified when they are fired
+        self.triggersIndex = SpatialHash(int(self.properties.get('index_cell_size', SpatialHash.DEFAULT_CELL_SIZE)))
 
         associatedLayerName = self.properties.get('layer', None)
         self.associatedLayer = self.parentMap.getLayer(associatedLayerName)
 
         logger.debug('Loading triggers layer {}'.format(self.name))
 
-        for obj in node.findall('object'):
-            type_ = obj.attrib.get('type')
-            name = obj.attrib.get('name')
+        for obj in data['objects']:
+            type_ = obj['type']
+            name = obj['name']
             if type_ not in ('trigger', 'triggered'):
                 logger.debug('Object {} is on a triggers layer but is neither a trigger nor a triggered'.format(name))
                 continue
-            properties = loadProperties(obj.find('properties'))
-            rect = pygame.Rect( int(obj.attrib['x']),
-                int(obj.attrib['y']),
-                int(obj.attrib.get('width', self.parentMap.tileWidth)),
-                int(obj.attrib.get('height', self.parentMap.tileHeight))
+            properties = dict(obj['properties'])
+            rect = pygame.Rect(obj['x'],
+                obj['y'],
+                obj['width'] if obj['width'] is not None else self.parentMap.tileWidth,
+                obj['height'] if obj['height'] is not None else self.parentMap.tileHeight
             )
 
             if type_ == 'trigger':
                 logger.debug('Adding new trigger: {} on {}'.format(name, rect))
-                self.triggersList.append(Trigger(self, name, rect, properties))
+                trigger = Trigger(self, name, rect, properties)
+                self.triggersList.append(trigger)
+                self.triggersIndex.insert(trigger)
             else:
                 logger.debug('Adding new triggered {} on {}'.format(name, rect))
                 self.triggeredsList.append(Triggered(self, name, rect, properties))
@@ -72,7 +77,7 @@ class TriggersLayer(Layer):
         pass
 
     def getCollisions(self, rect):
-        for obj in self.triggersList:
+        for obj in self.triggersIndex.retrieve(rect):
             if obj.collide(rect):
                 yield (obj.getRect(), obj)
 
@@ -88,6 +93,8 @@ class TriggersLayer(Layer):
             self.triggersList.remove(trigger)
         except Exception:
             logger.exception('Removing trigger')
+        self.triggersIndex.remove(trigger)
+        self.markModified()
 
     def __iter__(self):
         for obj in self.platforms:
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+'''
+Compiled maps ("bundles")
+
+A bundle is the already parsed data of a tmx map (see game.maps.tmx), stored as:
+
+    MAGIC | header length (uint32 LE) | header (json) | padding | tiles arrays
+
+Header holds everything except layers tiles, that are stored raw (uint32 LE) after
+it, so they are copied straight into arrays instead of decoded when loading the map.
+'''
+import os
+import sys
+import json
+import mmap
+import struct
+import logging
+import typing
+
+from game.maps import tmx
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PGFMAP01'
+BUNDLE_EXTENSION = '.mapb'
+
+_HEADER = struct.Struct('<I')
+
+
+def bundlePath(mapFile: str) -> str:
+    return os.path.splitext(mapFile)[0] + BUNDLE_EXTENSION
+
+
+def save(mapData: tmx.MapData, bundleFile: str) -> None:
+    header = dict(mapData)
+    header['layers'] = []
+    arrays = []
+    offset = 0  # Offset of arrays (in tiles), relative to arrays start
+
+    for layer in mapData['layers']:
+        layer = dict(layer)
+        if layer['type'] == 'layer':
+            raw = tmx.tilesArray(b'')
+            raw.extend(layer.pop('data'))
+            if sys.byteorder != 'little':
+                raw.byteswap()
+            raw = raw.tobytes()
+            layer['dataOffset'], layer['dataLength'] = offset, len(raw) // 4
+            arrays.append(raw)
+            offset += len(raw) // 4
+        header['layers'].append(layer)
+
+    encodedHeader = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    arraysStart = len(MAGIC) + _HEADER.size + len(encodedHeader)
+    padding = b'\0' * (-arraysStart % 4)  # Keep arrays 4 bytes aligned
+
+    with open(bundleFile, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_HEADER.pack(len(encodedHeader)))
+        f.write(encodedHeader)
+        f.write(padding)
+        for raw in arrays:
+            f.write(raw)
+
+
+def load(bundleFile: str, mapFile: typing.Optional[str] = None) -> typing.Optional[tmx.MapData]:
+    '''
+    Loads a bundle. If mapFile is provided and bundle is older than any of its sources,
+    returns None
+    '''
+    with open(bundleFile, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return _loadFrom(mm, bundleFile, mapFile)
+    finally:
+        mm.close()
+
+
+def _loadFrom(mm: mmap.mmap, bundleFile: str, mapFile: typing.Optional[str]) -> typing.Optional[tmx.MapData]:
+    if mm[:len(MAGIC)] != MAGIC:
+        raise Exception('{} is not a map bundle'.format(bundleFile))
+
+    headerLength, = _HEADER.unpack_from(mm, len(MAGIC))
+    headerStart = len(MAGIC) + _HEADER.size
+    mapData = json.loads(mm[headerStart:headerStart+headerLength].decode('utf-8'))
+
+    if mapFile is not None:
+        bundleTime = os.path.getmtime(bundleFile)
+        mapPath = os.path.dirname(mapFile)
+        for source in mapData['sources']:
+            source = os.path.join(mapPath, source)
+            if os.path.exists(source) and os.path.getmtime(source) > bundleTime:
+                logger.debug('Bundle {} is older than {}'.format(bundleFile, source))
+                return None
+
+    arraysStart = headerStart + headerLength
+    arraysStart += -arraysStart % 4
+
+    # Tiles are copied (a memcpy per layer), so mapping is closed as soon as the map is
+    # read, and layers get arrays they can modify
+    with memoryview(mm) as view:
+        for layer in mapData['layers']:
+            if layer['type'] == 'layer':
+                start = arraysStart + 4 * layer.pop('dataOffset')
+                end = start + 4 * layer.pop('dataLength')
+                layer['data'] = tmx.tilesArray(view[start:end])
+
+    # json keys are always strings
+    for tileSet in mapData['tileSets']:
+        tileSet['tilesProperties'] = {int(k): v for k, v in tileSet['tilesProperties'].items()}
+
+    return mapData
+
+
+def compileMap(mapFile: str, bundleFile: typing.Optional[str] = None) -> str:
+    '''
+    Compiles a tmx map into a bundle (by default, along the map with BUNDLE_EXTENSION)
+    Returns the bundle path
+    '''
+    bundleFile = bundleFile or bundlePath(mapFile)
+    save(tmx.parse(mapFile), bundleFile)
+    return bundleFile
+
+
+def loadMapData(mapFile: str) -> tmx.MapData:
+    '''
+    Gets the map data, from its bundle if exists and it's up to date, or parsing it
+    '''
+    bundleFile = bundlePath(mapFile)
+    if os.path.exists(bundleFile):
+        try:
+            mapData = load(bundleFile, mapFile)
+            if mapData is not None:
+                logger.debug('Loading map {} from bundle {}'.format(mapFile, bundleFile))
+                return mapData
+        except Exception:
+            logger.exception('Loading bundle {}'.format(bundleFile))
+
+    return tmx.parse(mapFile)
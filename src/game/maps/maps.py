@@ -5,12 +5,16 @@ from game.layers.triggers_layer import TriggersLayer
 import os
 import logging
 import typing
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import pygame
-import xml.etree.ElementTree as ET
 
 from game.util import resource_path
-from game.util import loadProperties
+from game.util import checkTrue
+from game.maps import tmx
+from game.maps import bundle
+from game.profiler import profiler
+from game import collision_grid
 
 import game.layers
 import game.tiles
@@ -21,6 +25,13 @@ if typing.TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+PREFETCH_WORKERS = 1  # Threads used to prefetch maps
+
+DEFAULT_SECTOR_SIZE = 32  # Tiles per side of sectors on streaming mode
+DEFAULT_STREAM_MARGIN = 256  # Pixels around screen where sectors are active on streaming mode
+
+MAX_INTERPOLATED_TILES = 4  # Movements longer than this (in tiles) are drawn without interpolation
+
 
 ######################
 # Map                #
@@ -36,10 +47,15 @@ class Map(object):
     tileSets: typing.List[game.tiles.TileSet]
     layers: typing.List[game.layers.Layer]
     tiles: typing.List[game.tiles.Tile]
+    tileFlags: bytearray  # Collision flags of tiles, by tile id (see game.collision_grid)
+    collisionGrid: collision_grid.CollisionGrid  # Flags of collision tiles layers, merged
+    cellRects: typing.Dict[typing.Tuple[int, int], pygame.Rect]  # Shared rects of grid cells
     effectsLayer: typing.Optional[game.layers.EffectsLayer]
     hudLayer: typing.Optional[game.layers.HudLayer]
     triggersLayers: typing.List[game.layers.TriggersLayer]
     collissionsLayers: typing.List[game.layers.Layer]
+    tilesCollisionsLayers: typing.List[game.layers.ArrayLayer]  # Collision layers answered by grid
+    objectsCollisionsLayers: typing.List[game.layers.Layer]  # The rest of collision layers
     renderingLayers: typing.List[game.layers.Layer]
     actorLayers: typing.List[game.layers.ActorsLayer]
     controller: typing.Optional['game.game_state.GameControl']
@@ -47,6 +63,16 @@ class Map(object):
     properties: typing.Dict[str, str]
     boundary: pygame.Rect
     displayPosition: typing.Tuple[int, int]
+    previousDisplayPosition: typing.Tuple[int, int]  # Display position at end of previous update
+    drawPosition: typing.Tuple[int, int]  # Display position used on current drawing
+    interpolation: float
+    streaming: bool  # Actors and objects are created and updated only near screen
+    sectorSize: typing.Tuple[int, int]  # In pixels
+    streamMargin: int
+    activeArea: pygame.Rect  # Part of map being updated on streaming mode
+    activeSectors: typing.Set[typing.Tuple[int, int]]
+    trackingDirty: bool  # Layers must report changes (renderer is on dirty rects mode)
+    lastDrawPosition: typing.Tuple[int, int]
 
     def __init__(self, mapId: str, path: str, parent: 'Maps') -> None:
         self.id = mapId
@@ -57,13 +83,21 @@ class Map(object):
         self.tileSets = []
         self.layers = []
         self.tiles = []
+        self.tileFlags = bytearray(1)
+        self.collisionGrid = collision_grid.CollisionGrid(0, 0)
+        self.cellRects = {}
         self.effectsLayer = None
         self.hudLayer = None
         self.triggersLayers = []
         self.collissionsLayers = []
+        self.tilesCollisionsLayers = []
+        self.objectsCollisionsLayers = []
         self.renderingLayers = []
         self.actorLayers = []
-        self.displayPosition = (0, 0)
+        self.displayPosition = self.previousDisplayPosition = self.drawPosition = (0, 0)
+        self.interpolation = 1.0
+        self.trackingDirty = False
+        self.lastDrawPosition = (0, 0)
         self.boundary = pygame.Rect(0, 0, 0, 0)
         self.controller = None
         self.displayShower = None
@@ -82,7 +116,13 @@ class Map(object):
     def getCollisionsLayers(self) -> typing.List[game.layers.Layer]:
         return self.collissionsLayers
 
-    def reset(self, fromNode: typing.Optional[ET.Element] = None) -> None:
+    def getObjectsCollisionsLayers(self) -> typing.List[game.layers.Layer]:
+        '''
+        Collision layers of objects (not tiles), the ones that can not be answered by collision grid
+        '''
+        return self.objectsCollisionsLayers
+
+    def reset(self, mapData: typing.Optional[tmx.MapData] = None) -> None:
         self.width = self.height = self.tileWidth = self.tileHeight = 0
         self.tileSets = []
         self.layers = []
@@ -90,17 +130,25 @@ class Map(object):
         self.hudLayer = game.layers.HudLayer(self)
         self.triggersLayers = []
         self.collissionsLayers = []
+        self.tilesCollisionsLayers = []
+        self.objectsCollisionsLayers = []
         self.renderingLayers = []
         self.actorLayers = []
         self.tiles = []
+        self.tileFlags = bytearray(1)
+        self.collisionGrid = collision_grid.CollisionGrid(0, 0)
+        self.cellRects = {}
         self.properties = {}
-        self.displayPosition = (0, 0)
-        if fromNode:
-            self.width = int(fromNode.attrib['width'])
-            self.height = int(fromNode.attrib['height'])
-            self.tileWidth = int(fromNode.attrib['tilewidth'])
-            self.tileHeight = int(fromNode.attrib['tileheight'])
-            self.properties = loadProperties(fromNode.find('properties'))
+        self.displayPosition = self.previousDisplayPosition = self.drawPosition = (0, 0)
+        self.trackingDirty = False
+        self.activeArea = pygame.Rect(0, 0, 0, 0)
+        self.activeSectors = set()
+        if mapData:
+            self.width = mapData['width']
+            self.height = mapData['height']
+            self.tileWidth = mapData['tileWidth']
+            self.tileHeight = mapData['tileHeight']
+            self.properties = dict(mapData['properties'])
             self.boundary = pygame.Rect(
                 0, 0, self.width * self.tileHeight, self.height * self.tileHeight
             )
@@ -109,21 +157,54 @@ class Map(object):
             self.properties = {}
             self.boundary = pygame.Rect(0, 0, 0, 0)
 
-    def load(self) -> None:
-        tree: ET.ElementTree = ET.parse(self.mapFile)
-        root: ET.Element = tree.getroot()  # Map element
+        # Streaming mode splits the map in sectors of sector_size x sector_size tiles, and
+        # actors and platforms are created only when their sector gets near the screen.
+        # Out of active area, they are frozen (not updated)
+        self.streaming = checkTrue(self.properties.get('streaming', 'False'))
+        sectorSize = int(self.properties.get('sector_size', DEFAULT_SECTOR_SIZE))
+        self.sectorSize = (max(sectorSize * self.tileWidth, 1), max(sectorSize * self.tileHeight, 1))
+        self.streamMargin = int(self.properties.get('stream_margin', DEFAULT_STREAM_MARGIN))
 
+    def prefetchData(self) -> tmx.MapData:
+        '''
+        Gets map data with its images already decoded (as "surface" key of tilesets and
+        image layers). Only uses the map file, so it can be invoked from any thread
+        '''
+        mapData = bundle.loadMapData(self.mapFile)
+        for data in mapData['tileSets'] + mapData['layers']:
+            if data.get('imageFile') is not None:
+                data['surface'] = pygame.image.load(os.path.join(self.mapPath, data['imageFile']))
+        return mapData
+
+    def load(self, mapData: typing.Optional[tmx.MapData] = None) -> None:
         logger.debug('Loading map "{}" in folder "{}"'.format(self.id, self.mapPath))
 
-        self.reset(root)
+        # From compiled bundle if it's up to date, else from tmx
+        if mapData is None:
+            mapData = bundle.loadMapData(self.mapFile)
 
-        for tileSet in root.findall('tileset'):
+        if self.tileSets:  # Reloading, release previous contents
+            self.unload()
+
+        self.reset(mapData)
+
+        for tileSet in mapData['tileSets']:
             ts = game.tiles.TileSet(self)
             ts.load(tileSet)
 
             self.tileSets.append(ts)
             self.tiles.extend(tile for tile in ts.tiles if tile)
 
+        if len(self.tiles) != mapData['tilesCount']:
+            raise Exception('Tilesets of map {} provide {} tiles, but {} where expected'.format(
+                self.mapFile, len(self.tiles), mapData['tilesCount']))
+
+        # Flipped tiles on layers are already referencing these
+        for tileId, flipX, flipY, rotate in mapData['flippedTiles']:
+            self.addTileFromTile(tileId, flipX, flipY, rotate)
+
+        self.tileFlags = collision_grid.flagsTable(self.tiles, self.tileWidth, self.tileHeight)
+
         # Load Layer
         # Remember that object layers must reference tiles layer, and that tiles layer must
         # be BEFORE (i.e. down in the tiled editor layers list) the objects layer because reference must
@@ -132,8 +213,8 @@ class Map(object):
 
         # We have two types of objectGrouplayers, platforms and triggers
         # To know what to get, first identify platform type by getting it's properties
-        def identifyObjectGroup(node):
-            layerType = loadProperties(node.find('properties')).get('type', 'platforms')
+        def identifyObjectGroup(layerData):
+            layerType = layerData['properties'].get('type', 'platforms')
             if layerType == 'platforms':
                 return game.layers.PlatformsLayer
             return game.layers.TriggersLayer
@@ -143,11 +224,26 @@ class Map(object):
             'objectgroup': lambda x: identifyObjectGroup(x),
             'imagelayer': lambda x: game.layers.ImageLayer,
         }
-        for elem in root:
-            if elem.tag in ('layer', 'objectgroup', 'imagelayer'):
-                l = t[elem.tag](elem)(self)
-                l.load(elem)
-                self.addLayer(l)
+        for layerData in mapData['layers']:
+            l = t[layerData['type']](layerData)(self)
+            l.load(layerData)
+            self.addLayer(l)
+
+        self.buildCollisionGrid()
+        self.updateActiveArea()
+
+    def unload(self) -> None:
+        '''
+        Releases the map contents, and its shared images
+        '''
+        logger.debug('Unloading map "{}"'.format(self.id))
+        for layer in self.layers:
+            layer.unload()
+        if self.effectsLayer:
+            self.effectsLayer.unload()
+        for ts in self.tileSets:
+            ts.unload()
+        self.reset()
 
     def getController(self) -> 'game.renderer.Renderer':
         return self.parent.controller
@@ -171,12 +267,20 @@ class Map(object):
             and not layer.triggers
         ):
             self.collissionsLayers.append(layer)
+            if isinstance(layer, game.layers.ArrayLayer):
+                self.tilesCollisionsLayers.append(layer)
+            else:
+                self.objectsCollisionsLayers.append(layer)
         if not layer.holder and layer.visible and not layer.triggers:
             self.renderingLayers.append(layer)
 
         if layer.actor:
             self.actorLayers.append(typing.cast(game.layers.ActorsLayer, layer))
 
+        # Built once, so profiling does not format names every frame
+        layer.drawSection = 'draw:{}'.format(layer.name)
+        layer.updateSection = 'update:{}'.format(layer.name)
+
         self.layers.append(layer)
 
     def getLayer(self, layerName: str) -> typing.Optional[game.layers.Layer]:
@@ -211,36 +315,119 @@ class Map(object):
             ):  # If returns False, will not execute this "beforeDraw" again
                 self.displayShower = saved
 
-        # First, we draw "parallax" layers
-        x, y = self.displayPosition
+        # Display shower moves display on every drawn frame, so no interpolation with it
+        self.interpolation = 1.0 if self.displayShower else renderer.interpolation
+        self.drawPosition = self.interpolate(self.previousDisplayPosition, self.displayPosition)
+
+        x, y = self.drawPosition
         width, height = renderer.getSize()
+
+        regions: typing.Optional[typing.List[pygame.Rect]] = None
+        if renderer.isTrackingDirty():
+            # Any scroll changes the whole screen
+            if not self.trackingDirty or self.drawPosition != self.lastDrawPosition:
+                renderer.invalidate()
+            self.trackingDirty = True
+            self.lastDrawPosition = self.drawPosition
+
+            with profiler.section('draw:dirty'):
+                for layer in self.getDrawnLayers():
+                    for rect in layer.getDirtyRects(x, y, width, height):
+                        renderer.addDirtyRect(rect)
+                regions = renderer.getDirtyRegions()
+            if regions is not None and not regions:
+                return  # Nothing has changed
+        else:
+            self.trackingDirty = False
+
+        for region in regions or [None]:
+            renderer.setClip(region)
+            self.drawLayers(renderer, x, y, width, height)
+        renderer.setClip(None)
+
+    def getDrawnLayers(self) -> typing.List[game.layers.Layer]:
+        '''
+        All layers drawn by map, in drawing order
+        '''
+        layers = list(self.getRenderingLayers())
+        if self.effectsLayer:
+            layers.append(self.effectsLayer)
+        if self.hudLayer:
+            layers.append(self.hudLayer)
+        return layers
+
+    def drawLayers(self, renderer: 'game.renderer.Renderer', x: int, y: int, width: int, height: int) -> None:
+        # First, we draw "parallax" layers
         for layer in self.getRenderingLayers():
-            layer.draw(renderer, x, y, width, height)
+            with profiler.section(layer.drawSection):
+                layer.draw(renderer, x, y, width, height)
 
         # draw effects layer
         if self.effectsLayer:
-            self.effectsLayer.draw(renderer, x, y, width, height)
+            with profiler.section('draw:effects'):
+                self.effectsLayer.draw(renderer, x, y, width, height)
 
         # And finally, the HUD at topmost
         if self.hudLayer:
-            self.hudLayer.draw(renderer, x, y, width, height)
+            with profiler.section('draw:hud'):
+                self.hudLayer.draw(renderer, x, y, width, height)
 
     def update(self) -> None:
+        self.previousDisplayPosition = self.displayPosition
+        self.updateActiveArea()
+
         for layer in self.getRenderingLayers():
             if self.displayShower is None or layer.actor is False:
-                layer.update()
+                with profiler.section(layer.updateSection):
+                    layer.update()
 
-        # Update tilesets (for animations)
-        for ts in self.tileSets:
-            ts.update()
+        # Tilesets animations are computed from engine clock when tiles are drawn
 
         # Update effects layer
         if self.effectsLayer:
-            self.effectsLayer.update()
+            with profiler.section('update:effects'):
+                self.effectsLayer.update()
 
         # And hud elements
         if self.hudLayer:
-            self.hudLayer.update()
+            with profiler.section('update:hud'):
+                self.hudLayer.update()
+
+    # Streaming mode
+    def getSector(self, x: int, y: int) -> typing.Tuple[int, int]:
+        '''
+        Sector of map coordinates x, y
+        '''
+        return (x // self.sectorSize[0], y // self.sectorSize[1])
+
+    def getSectorsIn(self, rect: pygame.Rect) -> typing.Set[typing.Tuple[int, int]]:
+        x0, y0 = self.getSector(rect.left, rect.top)
+        x1, y1 = self.getSector(rect.right - 1, rect.bottom - 1)
+        return {(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)}
+
+    def isActive(self, rect: pygame.Rect) -> bool:
+        '''
+        If something at rect must be updated (always, if not on streaming mode)
+        '''
+        return not self.streaming or self.activeArea.colliderect(rect)
+
+    def updateActiveArea(self) -> None:
+        '''
+        On streaming mode, active area follows screen, and layers are notified
+        of the sectors that gets active so they can create their contents
+        '''
+        if not self.streaming:
+            return
+        width, height = self.getController().renderer.getSize()
+        self.activeArea = pygame.Rect(self.displayPosition, (width, height)).inflate(
+            2 * self.streamMargin, 2 * self.streamMargin
+        )
+        sectors = self.getSectorsIn(self.activeArea)
+        activated = sectors - self.activeSectors
+        self.activeSectors = sectors
+        if activated:
+            for layer in self.layers:
+                layer.activateSectors(activated)
 
     # Current display position of the map
     def setDisplayPosition(self, x: int, y: int) -> None:
@@ -249,8 +436,26 @@ class Map(object):
     def getDisplayPosition(self) -> typing.Tuple[int, int]:
         return self.displayPosition
 
+    def interpolate(
+        self, previous: typing.Tuple[int, int], current: typing.Tuple[int, int]
+    ) -> typing.Tuple[int, int]:
+        '''
+        Position to draw something that has moved from previous to current on last update,
+        according to the time elapsed since that update
+        '''
+        if self.interpolation >= 1.0 or previous == current:
+            return current
+        dx, dy = current[0] - previous[0], current[1] - previous[1]
+        # Big jumps are teleports, not movements
+        if abs(dx) > self.tileWidth * MAX_INTERPOLATED_TILES or abs(dy) > self.tileHeight * MAX_INTERPOLATED_TILES:
+            return current
+        return (
+            previous[0] + int(round(dx * self.interpolation)),
+            previous[1] + int(round(dy * self.interpolation)),
+        )
+
     def translateCoordinates(self, rect: pygame.Rect) -> pygame.Rect:
-        return typing.cast(pygame.Rect, rect.move(-self.displayPosition[0], -self.displayPosition[1]))
+        return typing.cast(pygame.Rect, rect.move(-self.drawPosition[0], -self.drawPosition[1]))
 
     # Collisions
     def getCollisions(self, rect: pygame.Rect, possibleCollisions=None):
@@ -258,7 +463,7 @@ class Map(object):
         If a list of possible collisions is passed in, only this
         elements are used to test collisions
         '''
-        if possibleCollisions:
+        if possibleCollisions is not None:
             for col in possibleCollisions:
                 if col[0].colliderect(rect):
                     yield col
@@ -268,6 +473,81 @@ class Map(object):
                 for col in layer.getCollisions(rect):
                     yield (col[0], col[1], layer)
 
+    def buildCollisionGrid(self) -> None:
+        self.collisionGrid = collision_grid.CollisionGrid(self.width, self.height)
+        for layer in self.tilesCollisionsLayers:
+            self.collisionGrid.merge(layer.data, self.tileFlags)
+        self.cellRects = {}
+
+    def updateCollisionGrid(self, xStart: int, yStart: int, xEnd: int, yEnd: int) -> None:
+        '''
+        Merges again flags of cells from xStart, yStart to xEnd, yEnd (not included)
+        Must be invoked when tiles of a collision layer has changed
+        '''
+        table = self.tileFlags
+        for y in range(yStart, yEnd):
+            for x in range(xStart, xEnd):
+                pos = y * self.width + x
+                flags = 0
+                for layer in self.tilesCollisionsLayers:
+                    flags |= table[layer.data[pos]]
+                self.collisionGrid.set(x, y, flags)
+
+    def getCells(self, rect: pygame.Rect) -> typing.Tuple[int, int, int, int]:
+        '''
+        Cells overlapped by rect, as xStart, yStart, xEnd, yEnd (not included) clipped to map
+        '''
+        return (
+            max(rect.left // self.tileWidth, 0),
+            max(rect.top // self.tileHeight, 0),
+            min((rect.right + self.tileWidth - 1) // self.tileWidth, self.width),
+            min((rect.bottom + self.tileHeight - 1) // self.tileHeight, self.height),
+        )
+
+    def cellRect(self, x: int, y: int) -> pygame.Rect:
+        '''
+        Rect of cell x, y. It's shared, so it must not be modified
+        '''
+        rect = self.cellRects.get((x, y))
+        if rect is None:
+            rect = self.cellRects[(x, y)] = pygame.Rect(
+                x * self.tileWidth, y * self.tileHeight, self.tileWidth, self.tileHeight
+            )
+        return rect
+
+    def getTileFlags(self, rect: pygame.Rect) -> int:
+        '''
+        Collision flags (see game.collision_grid) of all tiles on cells overlapped by rect, merged
+        '''
+        return self.collisionGrid.flagsIn(*self.getCells(rect))
+
+    def getTilesCollisions(self, rect: pygame.Rect, mask: int = collision_grid.TILE_COLLIDES):
+        '''
+        Collisions of rect with tiles of collision layers with any of mask flags, read from
+        collision grid, so only cells with that flags are looked up
+        '''
+        table = self.tileFlags
+        grid = self.collisionGrid
+        xStart, yStart, xEnd, yEnd = self.getCells(rect)
+        for y in range(yStart, yEnd):
+            pos = y * self.width
+            for x, flags in enumerate(grid.row(y, xStart, xEnd), xStart):
+                if not flags & mask:
+                    continue
+                for layer in self.tilesCollisionsLayers:
+                    tileId = layer.data[pos+x]
+                    flags = table[tileId]
+                    if not flags & mask:
+                        continue
+                    tile = self.tiles[tileId-1]
+                    if flags & collision_grid.TILE_PARTIAL:
+                        tileRect = tile.getRect().move(x*self.tileWidth, y*self.tileHeight)
+                        if not tileRect.colliderect(rect):
+                            continue
+                    else:
+                        tileRect = self.cellRect(x, y)
+                    yield (tileRect, tile, layer)
+
     def getPossibleCollisions(self, rect, xRange=32, yRange=32):
         '''
         If needs to get check collisions more than once, this optimizes
@@ -304,9 +584,18 @@ class Map(object):
         return [col for col in self.getActorsCollisions(rect) if col[1] is not exclude]
 
     def checkTriggers(self, rect, possibleTriggers=None):
-        for layer in self.getTriggersLayers():
-            for col in layer.getCollisions(rect):
-                col[1].fire()
+        '''
+        Fires triggers touched by rect. If a list of possible triggers is passed
+        in, only this elements are checked
+        '''
+        if possibleTriggers is not None:
+            for col in possibleTriggers:
+                if not col[1].fired and col[1].collide(rect):
+                    col[1].fire()
+        else:
+            for layer in self.getTriggersLayers():
+                for col in layer.getCollisions(rect):
+                    col[1].fire()
 
     def getProperty(self, propertyName, default=None):
         '''
@@ -333,10 +622,14 @@ class Map(object):
 
 class Maps:
     maps: typing.Dict[str, Map]
+    prefetching: typing.Dict[str, 'Future[tmx.MapData]']
+    executor: typing.Optional[ThreadPoolExecutor]
 
     def __init__(self, controller):
         self.maps = {}
         self.controller = controller
+        self.prefetching = {}
+        self.executor = None
 
     def add(self, mapId: str, path: str):
         self.maps[mapId] = Map(mapId, path, self)
@@ -351,7 +644,55 @@ class Maps:
             return
 
         m = self.maps[mapId]
-        m.load()
+        future = self.prefetching.pop(mapId, None)
+        # Waits for prefetching if not finished yet
+        m.load(future.result() if future is not None else None)
+
+    def unload(self, mapId: typing.Optional[str] = None) -> None:
+        if mapId is None:
+            for mId in self.maps:
+                self.unload(mId)
+            return
+
+        if mapId in self.maps:
+            self.maps[mapId].unload()
+
+        # A prefetch not loaded yet is not needed anymore (cancel does nothing if running)
+        future = self.prefetching.pop(mapId, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self) -> None:
+        '''
+        Cancels pending prefetches and stops the prefetching thread (without waiting for
+        a running one). Must be invoked on game exit
+        '''
+        for future in self.prefetching.values():
+            future.cancel()
+        self.prefetching = {}
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def prefetch(self, mapId: str) -> None:
+        '''
+        Starts parsing the map and decoding its images on background, so a later load
+        of it only needs to build the map
+        '''
+        if mapId not in self.maps or mapId in self.prefetching:
+            return
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+        logger.debug('Prefetching map {}'.format(mapId))
+        self.prefetching[mapId] = self.executor.submit(self.maps[mapId].prefetchData)
+
+    def ready(self, mapId: str) -> bool:
+        '''
+        Returns True if map has been prefetched, so loading it will be quick
+        '''
+        future = self.prefetching.get(mapId)
+        return future is not None and future.done()
 
     def get(self, mapId) -> Map:
         return self.maps[mapId]
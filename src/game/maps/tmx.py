@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+'''
+Tiled (tmx) maps parsing
+
+Parsing a map only creates plain python data (no surfaces, no layers), so it
+can be stored compiled (see game.maps.bundle) and turned into a Map later:
+
+    {
+        'width', 'height', 'tileWidth', 'tileHeight': map sizes,
+        'properties': map properties,
+        'tilesCount': number of tiles provided by tilesets,
+        'tileSets': [{'firstGid', 'name', 'tileWidth', 'tileHeight', 'tileSpacing',
+                      'imageFile', 'imageWidth', 'imageHeight', 'properties',
+                      'tilesProperties'}, ...],
+        'flippedTiles': [(tileId, flipX, flipY, rotate), ...],
+        'layers': [{'type': 'layer', 'name', 'width', 'height', 'properties', 'data'}
+                   {'type': 'objectgroup', 'name', 'properties', 'objects'}
+                   {'type': 'imagelayer', 'name', 'imageFile', 'properties'}, ...],
+        'sources': files (relative to map folder) this data was parsed from,
+    }
+
+Flipped tiles are already resolved: map tiles are the tilesets ones followed by one
+tile per flippedTiles entry, and layers data reference them by position (1 based)
+'''
+import os
+import sys
+import array
+import base64
+import logging
+import typing
+
+import xml.etree.ElementTree as ET
+
+from game.util import loadProperties
+
+logger = logging.getLogger(__name__)
+
+MapData = typing.Dict[str, typing.Any]
+
+# Tile ids are unsigned 32 bits integers
+TILE_TYPECODE = 'I' if array.array('I').itemsize == 4 else 'L'
+
+# Tiled stores flipping of tiles in higher bits of tile id
+FLIPPED_HORIZONTALLY_FLAG = 0x80000000
+FLIPPED_VERTICALLY_FLAG = 0x40000000
+FLIPPED_DIAGONALLY_FLAG = 0x20000000
+FLIPPED_FLAGS = 0xF0000000
+
+
+def tilesArray(raw: bytes) -> 'array.array[int]':
+    '''
+    Returns an array of tile ids from little endian raw data
+    '''
+    data = array.array(TILE_TYPECODE)
+    data.frombytes(raw)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data
+
+
+def _parseTileSet(node: ET.Element, mapPath: str) -> typing.Dict[str, typing.Any]:
+    tileSet: typing.Dict[str, typing.Any] = {
+        'firstGid': int(node.attrib['firstgid']),
+        'name': None,
+        'tileWidth': 0,
+        'tileHeight': 0,
+        'tileSpacing': 0,
+        'imageFile': None,
+        'imageWidth': 0,
+        'imageHeight': 0,
+        'properties': {},
+        'tilesProperties': {},
+    }
+
+    # External tilesets are relative to map, and its image relative to tileset
+    basePath = ''
+    if 'source' in node.attrib:
+        source = node.attrib['source']
+        logger.debug('Loading external tileset: {}'.format(source))
+        node = ET.parse(os.path.join(mapPath, source)).getroot()
+        basePath = os.path.dirname(source)
+
+    image = node.find('image')
+    if image is None:
+        return tileSet
+
+    tileSet.update({
+        'name': node.attrib['name'],
+        'tileWidth': int(node.attrib['tilewidth']),
+        'tileHeight': int(node.attrib['tileheight']),
+        'tileSpacing': int(node.attrib.get('spacing', 0)),
+        'imageFile': os.path.join(basePath, image.attrib['source']),
+        'imageWidth': int(image.attrib['width']),
+        'imageHeight': int(image.attrib['height']),
+        'properties': loadProperties(node.find('properties')),
+        'tilesProperties': {
+            int(t.attrib['id']): loadProperties(t.find('properties')) for t in node.findall('tile')
+        },
+    })
+
+    return tileSet
+
+
+def tilesCount(tileSet: typing.Dict[str, typing.Any]) -> int:
+    '''
+    Number of tiles a tileset holds (as TileSet will cut them from its image)
+    '''
+    if tileSet['imageFile'] is None:
+        return 0
+    tilesPerRow = int(tileSet['imageWidth'] / (tileSet['tileWidth'] + tileSet['tileSpacing']))
+    tilesRows = int(tileSet['imageHeight'] / (tileSet['tileHeight'] + tileSet['tileSpacing']))
+    return tilesPerRow * tilesRows
+
+
+def _parseLayer(node: ET.Element) -> typing.Dict[str, typing.Any]:
+    data = node.find('data')
+    if data is None or data.attrib.get('encoding') != 'base64' or 'compression' in data.attrib:
+        raise Exception('No base 64 encoded')
+
+    return {
+        'type': 'layer',
+        'name': node.attrib['name'],
+        'width': int(node.attrib['width']),
+        'height': int(node.attrib['height']),
+        'properties': loadProperties(node.find('properties')),
+        'data': tilesArray(base64.b64decode(data.text or '')),
+    }
+
+
+def _parseObjectGroup(node: ET.Element) -> typing.Dict[str, typing.Any]:
+    objects = []
+    for obj in node.findall('object'):
+        polyline = obj.find('polyline')
+        objects.append({
+            'type': obj.attrib.get('type'),
+            'name': obj.attrib.get('name'),
+            'x': int(obj.attrib['x']),
+            'y': int(obj.attrib['y']),
+            'width': int(obj.attrib['width']) if 'width' in obj.attrib else None,
+            'height': int(obj.attrib['height']) if 'height' in obj.attrib else None,
+            'properties': loadProperties(obj.find('properties')),
+            'polyline': [
+                [int(v) for v in point.split(',')] for point in polyline.attrib['points'].split(' ')
+            ] if polyline is not None else None,
+        })
+
+    return {
+        'type': 'objectgroup',
+        'name': node.attrib['name'],
+        'properties': loadProperties(node.find('properties')),
+        'objects': objects,
+    }
+
+
+def _parseImageLayer(node: ET.Element) -> typing.Dict[str, typing.Any]:
+    return {
+        'type': 'imagelayer',
+        'name': node.attrib['name'],
+        'imageFile': node.find('image').attrib['source'],  # type: ignore
+        'properties': loadProperties(node.find('properties')),
+    }
+
+
+def resolveFlippedTiles(mapData: MapData) -> None:
+    '''
+    Replaces flipped tiles ids on layers by ids of tiles appended to map tiles list,
+    so we got only 1 tile generated from 1 source and 1 transformation
+    '''
+    cached: typing.Dict[int, int] = {}
+    flippedTiles = mapData['flippedTiles']
+    for layer in mapData['layers']:
+        if layer['type'] != 'layer' or not layer['data'] or max(layer['data']) & FLIPPED_FLAGS == 0:
+            continue
+        data = layer['data']
+        for i, tileId in enumerate(data):
+            if tileId & FLIPPED_FLAGS == 0:
+                continue
+            if tileId not in cached:
+                logger.debug('Fipped tile found!: {:X}'.format(tileId & FLIPPED_FLAGS))
+                flippedTiles.append((
+                    tileId & 0x0FFFFFFF,
+                    tileId & FLIPPED_HORIZONTALLY_FLAG != 0,
+                    tileId & FLIPPED_VERTICALLY_FLAG != 0,
+                    tileId & FLIPPED_DIAGONALLY_FLAG != 0,
+                ))
+                cached[tileId] = mapData['tilesCount'] + len(flippedTiles)
+            data[i] = cached[tileId]
+
+
+def parse(mapFile: str) -> MapData:
+    '''
+    Parses a tmx file
+    '''
+    mapPath = os.path.dirname(mapFile)
+    root = ET.parse(mapFile).getroot()  # Map element
+
+    mapData: MapData = {
+        'width': int(root.attrib['width']),
+        'height': int(root.attrib['height']),
+        'tileWidth': int(root.attrib['tilewidth']),
+        'tileHeight': int(root.attrib['tileheight']),
+        'properties': loadProperties(root.find('properties')),
+        'tileSets': [],
+        'tilesCount': 0,
+        'flippedTiles': [],
+        'layers': [],
+        'sources': [os.path.basename(mapFile)],
+    }
+
+    for node in root.findall('tileset'):
+        tileSet = _parseTileSet(node, mapPath)
+        if 'source' in node.attrib:
+            mapData['sources'].append(node.attrib['source'])
+        mapData['tileSets'].append(tileSet)
+        mapData['tilesCount'] += tilesCount(tileSet)
+
+    parsers = {
+        'layer': _parseLayer,
+        'objectgroup': _parseObjectGroup,
+        'imagelayer': _parseImageLayer,
+    }
+    for elem in root:
+        if elem.tag in parsers:
+            mapData['layers'].append(parsers[elem.tag](elem))
+
+    resolveFlippedTiles(mapData)
+
+    return mapData
@@ -29,7 +29,8 @@ class ObjectWithPath(GraphicObject, WithCollisionCache):
 
     def updateAttributes(self):
         GraphicObject.updateAttributes(self)
-        self.path = self.getProperty('path', None)
+        self.path = self.getProperty('path', None)  # Name of path, until setPath is invoked
+        self.reachRect = None
         self.sticky = checkTrue(self.getProperty('sticky', 'True'))
         self.stopped = checkTrue(self.getProperty('stopped', 'False'))
 
@@ -71,6 +72,7 @@ class ObjectWithPath(GraphicObject, WithCollisionCache):
                 # actor.rect.bottom = self.rect.top - 1
                 if any(actor.getCollisions()):
                     actor.rect.bottom = bottom
+                    actor.positionChanged()
                     self.path.restore()
                     self.rect.left, self.rect.top = x, y
 
@@ -87,6 +89,20 @@ class ObjectWithPath(GraphicObject, WithCollisionCache):
     def collide(self, rect):
         return self.rect.colliderect(rect)
 
+    def setPath(self, path):
+        self.path = path
+        self.reachRect = None
+        if path is not None and path.segments:
+            # Paths never change, so area covered following it is computed just once
+            bounds = path.getBounds()
+            self.reachRect = self.rect.union(pygame.Rect(bounds.topleft, (bounds.width + self.rect.width, bounds.height + self.rect.height)))
+
+    def getReachRect(self):
+        '''
+        Area that this object can cover while following its path
+        '''
+        return self.reachRect if self.reachRect is not None else self.rect
+
     def start(self):
         self.stopped = False
 
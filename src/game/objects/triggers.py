@@ -232,13 +232,9 @@ class Triggered(object):
         logger.debug('Executing triggered {}'.format(self.name))
 
         layer = self.layer
-        tileWidth = self.parent.parentMap.tileWidth
-        tileHeight = self.parent.parentMap.tileHeight
         if self.action == 'remove':
-            for y in range(self.rect.top, self.rect.bottom, tileHeight):
-                for x in range(self.rect.left, self.rect.right, tileWidth):
-                    logger.debug('Remove : {},{}'.format(x, y))
-                    layer.removeObjectAt(x, y)
+            logger.debug('Remove : {}'.format(self.rect))
+            layer.removeObjectsIn(self.rect)
         elif self.action == 'remove-sliding':
             logger.debug('Removing tile with sliding')
             return SlidingTileEffect(layer, self.rect, ticks=80,
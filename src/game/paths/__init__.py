@@ -3,6 +3,8 @@ from __future__ import unicode_literals
 
 import logging
 
+import pygame
+
 logger = logging.getLogger(__name__)
 
 
@@ -77,6 +79,14 @@ class Path(object):
             self.segment_pos += 1
         return pos
 
+    def getBounds(self):
+        '''
+        Smallest rect containing all points of path
+        '''
+        xs = [s.x for s in self.segments] + [s.x + s.x_offset for s in self.segments]
+        ys = [s.y for s in self.segments] + [s.y + s.y_offset for s in self.segments]
+        return pygame.Rect(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
     def save(self):
         self.saved = (self.segment, self.segment_pos)
 
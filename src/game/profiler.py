@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+'''
+Lightweight per frame profiler
+
+Game loop and map time named sections of every frame (events, update of every layer,
+drawing of every layer, endDraw, ...), and profiler keeps the last frames timings so
+percentiles can be shown on an overlay or dumped as json. While disabled, sections
+costs just a method call.
+'''
+import time
+import json
+import typing
+import logging
+import collections
+
+import pygame
+
+from game.text import TextCache
+
+if typing.TYPE_CHECKING:
+    import game.renderer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 300  # Frames kept for statistics
+OVERLAY_REFRESH = 15  # Frames between overlay refreshes
+OVERLAY_FONT_SIZE = 20
+OVERLAY_LINES = 16  # Max sections shown on overlay (slowest first)
+
+Stats = typing.Dict[str, typing.Dict[str, float]]
+
+
+class _NullSection:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *args: typing.Any) -> None:
+        pass
+
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: 'Profiler', name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args: typing.Any) -> None:
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+_nullSection = _NullSection()
+
+
+def percentile(values: typing.List[float], fraction: float) -> float:
+    '''
+    Percentile (fraction between 0 and 1) of already sorted values
+    '''
+    if not values:
+        return 0.0
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+class Profiler:
+    enabled: bool
+    overlay: bool
+    window: int
+    samples: typing.Dict[str, typing.Deque[float]]
+    current: typing.Dict[str, float]
+    frames: int
+    frameStart: float
+    overlayImage: typing.Optional['game.renderer.Image']
+
+    def __init__(self, enabled: bool = False, window: int = DEFAULT_WINDOW) -> None:
+        self.enabled = enabled
+        self.overlay = False
+        self.window = window
+        self.samples = {}
+        self.current = {}
+        self.frames = 0
+        self.frameStart = 0.0
+        self.overlayImage = None
+        self.font = None
+
+    def reset(self) -> None:
+        self.samples = {}
+        self.current = {}
+        self.frames = 0
+        self.overlayImage = None
+
+    def enable(self, enabled: bool = True, overlay: typing.Optional[bool] = None) -> None:
+        self.enabled = enabled
+        if overlay is not None:
+            self.overlay = overlay
+        if not enabled:
+            self.reset()
+
+    def section(self, name: str) -> typing.Any:
+        '''
+        Context manager that adds the time spent inside it to section "name" of current frame
+        '''
+        if not self.enabled:
+            return _nullSection
+        return _Section(self, name)
+
+    def beginFrame(self) -> None:
+        if not self.enabled:
+            return
+        self.current = {}
+        self.frameStart = time.perf_counter()
+
+    def endFrame(self) -> None:
+        if not self.enabled or self.frameStart == 0.0:
+            return
+        self.current['frame'] = time.perf_counter() - self.frameStart
+        self.frameStart = 0.0
+        self.frames += 1
+
+        for name, seconds in self.current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = collections.deque(maxlen=self.window)
+            samples.append(seconds * 1000.0)
+
+    def stats(self) -> Stats:
+        '''
+        Statistics (in milliseconds) of every section over the last frames:
+        {section: {'samples', 'mean', 'p50', 'p95', 'p99', 'max'}}
+        '''
+        result: Stats = {}
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            result[name] = {
+                'samples': len(values),
+                'mean': sum(values) / len(values),
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+                'max': values[-1],
+            }
+        return result
+
+    def dump(self, path: str) -> None:
+        '''
+        Writes current statistics as json to path
+        '''
+        with open(path, 'w') as f:
+            json.dump({'frames': self.frames, 'sections': self.stats()}, f, indent=2, sort_keys=True)
+        logger.debug('Profiler stats dumped to {}'.format(path))
+
+    def drawOverlay(self, renderer: 'game.renderer.Renderer') -> None:
+        '''
+        Draws the slowest sections statistics on top left of screen
+        '''
+        if not self.enabled or not self.overlay:
+            return
+
+        if self.overlayImage is None or self.frames % OVERLAY_REFRESH == 0:
+            if self.font is None:
+                self.font = TextCache.cache.font(None, OVERLAY_FONT_SIZE)
+            stats = sorted(self.stats().items(), key=lambda v: -v[1]['p95'])[:OVERLAY_LINES]
+            lines = ['{:<24} {:>7} {:>7} {:>7}'.format('section (ms)', 'p50', 'p95', 'max')]
+            lines += [
+                '{:<24} {:7.2f} {:7.2f} {:7.2f}'.format(name[:24], s['p50'], s['p95'], s['max'])
+                for name, s in stats
+            ]
+            lineHeight = self.font.get_linesize()
+            width = max(self.font.size(line)[0] for line in lines)
+            surface = pygame.Surface((width + 8, lineHeight * len(lines) + 8), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 160))
+            for i, line in enumerate(lines):
+                surface.blit(self.font.render(line, True, (255, 255, 255)), (4, 4 + i * lineHeight))
+            self.overlayImage = renderer.imageFromSurface(surface)
+
+        renderer.blit(self.overlayImage, (0, 0))
+
+
+profiler = Profiler()
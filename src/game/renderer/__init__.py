@@ -1,3 +1,4 @@
 from .renderer import Renderer, Image
 from .renderer2d import Renderer2D, Image2D
 from .renderergl import RendererGL, ImageGL
+from .rendererheadless import RendererHeadless
@@ -88,6 +88,7 @@ class Renderer:
     resolution: typing.Tuple[int, int]
     depth: int
     fullScreen: bool
+    interpolation: float  # Fraction of logic tick elapsed since last update (1.0 = current state)
 
     def __init__(
         self,
@@ -100,6 +101,7 @@ class Renderer:
         self.depth = depth
         self.fullScreen = fullScreen
         self.screen = None
+        self.interpolation = 1.0
 
         Renderer.renderer = self
 
@@ -137,11 +139,46 @@ class Renderer:
             'blit Method not implemented for class {}'.format(self.__class__)
         )
 
+    # Scaled blits. Renderers that can not stretch images for free (as GL does drawing
+    # textured quads) composes scaled content on images instead
+    def canBlitScaled(self) -> bool:
+        return False
+
+    def blitScaled(self, image: Image, rect: pygame.Rect) -> None:
+        '''
+        Draws image stretched to fill rect
+        '''
+        raise NotImplementedError(
+            'blitScaled Method not implemented for class {}'.format(self.__class__)
+        )
+
     def beginDraw(self) -> None:
         raise NotImplementedError(
             'beginDraw Method not implemented for class {}'.format(self.__class__)
         )
 
+    # Dirty rects mode. Renderers that do not support it simply redraws everything
+    def isTrackingDirty(self) -> bool:
+        return False
+
+    def addDirtyRect(self, rect: pygame.Rect) -> None:
+        pass
+
+    def invalidate(self) -> None:
+        pass
+
+    def getDirtyRegions(self) -> typing.Optional[typing.List[pygame.Rect]]:
+        '''
+        Regions of screen to draw on current frame, None means all screen
+        '''
+        return None
+
+    def setClip(self, rect: typing.Optional[pygame.Rect]) -> None:
+        pass
+
+    def getClip(self) -> typing.Optional[pygame.Rect]:
+        return None
+
     def endDraw(self) -> None:
         raise NotImplementedError(
             'endDraw Method not implemented for class {}'.format(self.__class__)
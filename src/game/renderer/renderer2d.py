@@ -1,9 +1,98 @@
 import typing
+import collections
 
 import pygame
 
 from . import renderer
 
+DIRTY_RECTS_LIMIT = 16  # More regions than this are joined in just one
+
+FADE_LEVELS = 32  # Alpha levels of faded copies cache
+FADE_CACHE_BYTES = 16 * 1024 * 1024  # Max memory used by faded copies
+
+# Since SDL2, surface alpha also applies to surfaces with per pixel alpha
+SURFACE_ALPHA_MOD = pygame.version.vernum[0] >= 2
+
+
+def mergeRects(rects: typing.Iterable[pygame.Rect]) -> typing.List[pygame.Rect]:
+    '''
+    Joins overlapping rects, so no pixel is drawn twice
+    '''
+    merged: typing.List[pygame.Rect] = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class FadeCache:
+    '''
+    Least recently used faded copies of surfaces, with alpha quantized to "levels" values
+    '''
+    levels: int
+    maxBytes: int
+    usedBytes: int
+    faded: 'collections.OrderedDict[typing.Tuple[pygame.Surface, int], pygame.Surface]'
+
+    def __init__(self, levels: int = FADE_LEVELS, maxBytes: int = FADE_CACHE_BYTES) -> None:
+        self.levels = levels
+        self.maxBytes = maxBytes
+        self.usedBytes = 0
+        self.faded = collections.OrderedDict()
+
+    def quantize(self, alpha: int) -> int:
+        step = 255 / (self.levels - 1)
+        return int(int(alpha / step + 0.5) * step + 0.5)
+
+    def get(self, surface: pygame.Surface, alpha: int) -> pygame.Surface:
+        key = (surface, self.quantize(alpha))
+        faded = self.faded.get(key)
+        if faded is not None:
+            self.faded.move_to_end(key)
+            return faded
+
+        faded = surface.copy()
+        faded.fill((255, 255, 255, key[1]), None, pygame.BLEND_RGBA_MULT)
+        self.faded[key] = faded
+        self.usedBytes += faded.get_width() * faded.get_height() * faded.get_bytesize()
+
+        while self.usedBytes > self.maxBytes and len(self.faded) > 1:
+            _, old = self.faded.popitem(last=False)
+            self.usedBytes -= old.get_width() * old.get_height() * old.get_bytesize()
+
+        return faded
+
+    def clear(self) -> None:
+        self.faded.clear()
+        self.usedBytes = 0
+
+
+fadeCache = FadeCache()
+
+
+def blitFaded(
+    toSurface: pygame.Surface,
+    surface: pygame.Surface,
+    position: typing.Any,
+    area: typing.Optional[pygame.Rect],
+    alpha: int,
+) -> None:
+    '''
+    Blits surface with its transparency multiplied by alpha, without copying it if possible
+    '''
+    alpha = int(alpha)
+    if SURFACE_ALPHA_MOD:
+        previous = surface.get_alpha()
+        surface.set_alpha(alpha)
+        toSurface.blit(surface, position, area)
+        surface.set_alpha(previous)
+    else:
+        toSurface.blit(fadeCache.get(surface, alpha), position, area)
+
 
 class Image2D(renderer.Image):
     def __init__(self) -> None:
@@ -60,12 +149,9 @@ class Image2D(renderer.Image):
             position = (0, 0)
 
         if alpha != 255:  # Add transparency if required
-            surface = srcImage.surface.copy()
-            surface.fill((255, 255, 255, alpha), None, pygame.BLEND_RGBA_MULT)
+            blitFaded(self.surface, srcImage.surface, position, area, alpha)
         else:
-            surface = srcImage.surface
-
-        self.surface.blit(surface, position, area)
+            self.surface.blit(srcImage.surface, position, area)
 
     def fill(self, color: typing.Any):
         if self.surface:
@@ -109,6 +195,25 @@ class Image2D(renderer.Image):
 
 class Renderer2D(renderer.Renderer):
     screen: pygame.Surface
+    dirtyRects: bool
+    dirty: typing.List[pygame.Rect]
+    fullRedraw: bool
+    regions: typing.Optional[typing.List[pygame.Rect]]
+
+    def __init__(
+        self,
+        width: int = 1024,
+        height: int = 768,
+        depth: int = 32,
+        fullScreen: bool = False,
+        dirtyRects: bool = False,
+    ):
+        super().__init__(width, height, depth, fullScreen)
+        # On dirty rects mode, only changed regions of screen are redrawn and updated
+        self.dirtyRects = dirtyRects
+        self.dirty = []
+        self.fullRedraw = True
+        self.regions = None
 
     def init(self):
         flags = pygame.DOUBLEBUF | pygame.HWSURFACE
@@ -135,18 +240,50 @@ class Renderer2D(renderer.Renderer):
             position = (0, 0)
 
         if alpha != 255:  # Add transparency if required
-            image = image.copy()
-            typing.cast(pygame.Surface, image.surface).fill(
-                (255, 255, 255, alpha), None, pygame.BLEND_RGBA_MULT
-            )
-
-        self.screen.blit(typing.cast(pygame.Surface, image.surface), position, area)
+            blitFaded(self.screen, image.surface, position, area, alpha)
+        else:
+            self.screen.blit(image.surface, position, area)
 
     def beginDraw(self) -> None:
         pass
 
     def endDraw(self) -> None:
-        pygame.display.flip()
+        if self.regions is None:
+            pygame.display.flip()
+        elif self.regions:
+            pygame.display.update(self.regions)
+        self.dirty = []
+        self.fullRedraw = False
+        self.regions = None
+
+    def isTrackingDirty(self) -> bool:
+        return self.dirtyRects
+
+    def addDirtyRect(self, rect: pygame.Rect) -> None:
+        if not self.dirtyRects or self.fullRedraw:
+            return
+        rect = rect.clip(self.screen.get_rect())
+        if rect.width and rect.height:
+            self.dirty.append(rect)
+
+    def invalidate(self) -> None:
+        self.fullRedraw = True
+
+    def getDirtyRegions(self) -> typing.Optional[typing.List[pygame.Rect]]:
+        if not self.dirtyRects or self.fullRedraw:
+            self.regions = None
+            return None
+        regions = mergeRects(self.dirty)
+        if len(regions) > DIRTY_RECTS_LIMIT:
+            regions = [regions[0].unionall(regions[1:])]
+        self.regions = regions
+        return regions
+
+    def setClip(self, rect: typing.Optional[pygame.Rect]) -> None:
+        self.screen.set_clip(rect)
+
+    def getClip(self) -> typing.Optional[pygame.Rect]:
+        return self.screen.get_clip()
 
     def getSize(self) -> typing.Tuple[int, int]:
         return self.resolution
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import typing
+import array
+import ctypes
 
 import pygame
 from OpenGL import GL as gl
@@ -35,12 +37,17 @@ def wanted_size(texSize: float, x_current: float) -> float:
     return x_wanted
 
 
-def resize(image: pygame.surface.Surface, texSize: float) -> pygame.surface.Surface:
-    H1 = image.get_height()
-    W1 = image.get_width()
-    H2 = wanted_size(texSize, H1)
-    W2 = wanted_size(texSize, W1)
+def texture_size(W1: int, H1: int, texSize: float) -> typing.Tuple[int, int]:
+    H2 = int(wanted_size(texSize, H1))
+    W2 = int(wanted_size(texSize, W1))
     if (H1 != H2) or (H2 != W2):
+        return (W2, H2)
+    return (W1, H1)
+
+
+def resize(image: pygame.surface.Surface, texSize: float) -> pygame.surface.Surface:
+    W2, H2 = texture_size(image.get_width(), image.get_height(), texSize)
+    if (W2, H2) != image.get_size():
         dst_rect = pygame.Rect(0, 0, W2, H2)
         dest = pygame.Surface((W2, H2), 0, image)
         dest.blit(image, (0, 0), dst_rect)
@@ -49,6 +56,16 @@ def resize(image: pygame.surface.Surface, texSize: float) -> pygame.surface.Surf
         return image
 
 
+_maxTextureSize = 0
+
+
+def maxTextureSize() -> int:
+    global _maxTextureSize
+    if not _maxTextureSize:
+        _maxTextureSize = gl.glGetIntegerv(gl.GL_MAX_TEXTURE_SIZE)
+    return _maxTextureSize
+
+
 def surfaceToTexture(surface: pygame.surface.Surface) -> typing.Any:
     texture = gl.glGenTextures(1)
 
@@ -86,6 +103,12 @@ class ImageGL(Image):
     width: int
     height: int
     dl: typing.Optional[typing.List[typing.Any]]
+    texCoords: typing.Tuple[float, float, float, float]
+    textureSize: typing.Tuple[int, int]
+    atlas: typing.Optional['ImageGL']
+    atlasOffset: typing.Tuple[int, int]
+    uploadPending: bool  # Texture must be (re)created from surface before drawing
+    dirtyRect: typing.Optional[pygame.Rect]  # Region of surface changed since texture upload
 
     def __init__(self):
         self.surface = None
@@ -97,6 +120,16 @@ class ImageGL(Image):
         self.width = self.height = 0
         self.dl = None
         self.texture = None
+        self.texCoords = (0.0, 0.0, 0.0, 0.0)
+        self.textureSize = (0, 0)
+        # Subimages do not own a texture, they use the one of the atlas (the image
+        # they where cut from) at atlasOffset
+        self.atlas = None
+        self.atlasOffset = (0, 0)
+        # Textures are uploaded when first needed, and updated just where the surface
+        # changed, so composing an image with lots of blits uploads it only once
+        self.uploadPending = False
+        self.dirtyRect = None
 
     def __del__(self) -> None:
         if self.texture is not None:
@@ -106,31 +139,21 @@ class ImageGL(Image):
             gl.glDeleteLists(self.dl, 1)
 
     def _initTexture(self) -> None:
-        if self.texture:
-            gl.glDeleteTextures(self.texture)
-            self.texture = None
-
-        if self.dl:
-            gl.glDeleteLists(self.dl, 1)
-            self.dl = None
+        '''
+        Sets up image geometry from its surface. Texture is uploaded on first use
+        '''
+        self.atlas = None
+        self.atlasOffset = (0, 0)
+        self._deleteTexture()
 
         if not self.surface:
             return
 
-        texSize = gl.glGetIntegerv(gl.GL_MAX_TEXTURE_SIZE)
-
-        oldH = self.surface.get_height()
-        oldW = self.surface.get_width()
-        image2 = resize(self.surface, texSize)
-        newH = image2.get_height()
-        newW = image2.get_width()
-        fracH = oldH / float(newH)
-        fracW = oldW / float(newW)
-
         self.width, self.height = self.surface.get_size()
-
-        # convert to GL texture
-        self.texture = surfaceToTexture(image2)
+        newW, newH = texture_size(self.width, self.height, maxTextureSize())
+        fracH = self.height / float(newH)
+        fracW = self.width / float(newW)
+        self.textureSize = (newW, newH)
 
         # image mods
         self.rotation = 0.0
@@ -138,24 +161,114 @@ class ImageGL(Image):
         self.color = [1.0, 1.0, 1.0, 1.0]
         self.ox, self.oy = self.getWidth() / 2.0, self.getHeight() / 2.0
 
+        # Texture coords of top left and bottom right corners (texture is stored flipped)
+        self.texCoords = (0.0, 1.0, fracW, 1.0 - fracH)
+        self.uploadPending = True
+
+    def _deleteTexture(self) -> None:
+        if self.texture:
+            gl.glDeleteTextures(self.texture)
+            self.texture = None
+
+        if self.dl:
+            gl.glDeleteLists(self.dl, 1)
+            self.dl = None
+
+        self.uploadPending = False
+        self.dirtyRect = None
+
+    def _upload(self) -> None:
+        '''
+        Creates texture if pending, or updates the region of it that has changed
+        '''
+        if self.uploadPending:
+            self.uploadPending = False
+            self.dirtyRect = None
+            self._createTexture()
+        elif self.dirtyRect is not None:
+            self._updateTexture(self.dirtyRect)
+            self.dirtyRect = None
+
+    def _createTexture(self) -> None:
+        # convert to GL texture
+        self.texture = surfaceToTexture(resize(self.surface, maxTextureSize()))
+
+        u0, v0, u1, v1 = self.texCoords
+
         # crazy gl stuff :)
         self.dl = gl.glGenLists(1)
         gl.glNewList(self.dl, gl.GL_COMPILE)
         gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
         gl.glBegin(gl.GL_QUADS)
 
-        gl.glTexCoord2f(0, 1)
+        gl.glTexCoord2f(u0, v0)
         gl.glVertex3f(-self.width / 2.0, -self.height / 2.0, 0)
-        gl.glTexCoord2f(fracW, 1)
+        gl.glTexCoord2f(u1, v0)
         gl.glVertex3f(self.width / 2.0, -self.height / 2.0, 0)
-        gl.glTexCoord2f(fracW, 1 - fracH)
+        gl.glTexCoord2f(u1, v1)
         gl.glVertex3f(self.width / 2.0, self.height / 2.0, 0)
-        gl.glTexCoord2f(0, 1 - fracH)
+        gl.glTexCoord2f(u0, v1)
         gl.glVertex3f(-self.width / 2.0, self.height / 2.0, 0)
 
         gl.glEnd()
         gl.glEndList()
 
+    def _updateTexture(self, rect: pygame.Rect) -> None:
+        texWidth, texHeight = self.textureSize
+        rect = rect.clip(pygame.Rect(0, 0, texWidth, texHeight))
+        if not rect.width or not rect.height:
+            return
+
+        data = pygame.image.tostring(self.surface.subsurface(rect), "RGBA", True)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        # Texture is stored flipped, so rect bottom is its first row
+        gl.glTexSubImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            rect.x,
+            texHeight - rect.bottom,
+            rect.width,
+            rect.height,
+            gl.GL_RGBA,
+            gl.GL_UNSIGNED_BYTE,
+            data,
+        )
+
+    def _markDirty(self, rect: pygame.Rect) -> None:
+        '''
+        Must be invoked when rect of surface has been modified
+        '''
+        if self.atlas is not None:  # Our surface is a subsurface of the atlas one
+            self.atlas._markDirty(rect.move(self.atlasOffset))
+            return
+        if self.uploadPending or self.texture is None:  # Whole texture will be uploaded anyway
+            return
+        if self.dirtyRect is None:
+            self.dirtyRect = pygame.Rect(rect)
+        else:
+            self.dirtyRect.union_ip(rect)
+
+    def _initSubTexture(self, atlas: 'ImageGL', offset: typing.Tuple[int, int]) -> None:
+        '''
+        Makes this image a view of the atlas texture, so no texture is uploaded for it
+        '''
+        self.atlas = atlas
+        self.atlasOffset = offset
+
+        self.width, self.height = self.surface.get_size() if self.surface else (0, 0)
+        self.ox, self.oy = self.width / 2.0, self.height / 2.0
+
+        texWidth, texHeight = atlas.textureSize
+        if not texWidth or not texHeight:
+            return
+        x, y = offset
+        self.texCoords = (
+            x / float(texWidth),
+            1.0 - y / float(texHeight),
+            (x + self.width) / float(texWidth),
+            1.0 - (y + self.height) / float(texHeight),
+        )
+
     def load(self, path: str) -> None:
         self.surface = pygame.image.load(path).convert_alpha()
         self._initTexture()
@@ -207,8 +320,13 @@ class ImageGL(Image):
         else:
             surface = srcImage.surface
 
-        self.surface.blit(surface, position, area)
-        self._initTexture()
+        self._markDirty(self.surface.blit(surface, position, area))
+
+    def getTexture(self) -> typing.Any:
+        if self.atlas is not None:
+            return self.atlas.getTexture()
+        self._upload()
+        return self.texture
 
     def draw(
         self, position: typing.Tuple[typing.Union[float, int], typing.Union[float, int]]
@@ -220,14 +338,31 @@ class ImageGL(Image):
         # glColor4f(*self.color)
         # glRotatef(self.rotation, 0.0, 0.0, 1.0)
         # glScalef(self.scalar, self.scalar, self.scalar)
-        gl.glCallList(self.dl)
+        texture = self.getTexture()
+        if self.dl is not None:
+            gl.glCallList(self.dl)
+        elif self.atlas is not None and texture is not None:
+            # Subimages have no display list, they are a quad of the atlas texture
+            u0, v0, u1, v1 = self.texCoords
+            gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+            gl.glBegin(gl.GL_QUADS)
+            gl.glTexCoord2f(u0, v0)
+            gl.glVertex3f(-self.ox, -self.oy, 0)
+            gl.glTexCoord2f(u1, v0)
+            gl.glVertex3f(self.ox, -self.oy, 0)
+            gl.glTexCoord2f(u1, v1)
+            gl.glVertex3f(self.ox, self.oy, 0)
+            gl.glTexCoord2f(u0, v1)
+            gl.glVertex3f(-self.ox, self.oy, 0)
+            gl.glEnd()
         gl.glTranslatef(-position[0] - self.ox, -position[1] - self.oy, 0)
         # glTranslatef(-position[0], -position[1], 0)
         # glPopMatrix()
 
     def fill(self, color: typing.Tuple) -> None:
-        # self.surface.fill(color)
-        pass
+        if not self.surface:
+            return
+        self._markDirty(self.surface.fill(color))
 
     def flip(
         self, flipX: bool = False, flipY: bool = False, rotate: bool = False
@@ -248,8 +383,12 @@ class ImageGL(Image):
         if not self.surface:
             return img
 
+        rect = pygame.Rect(rect)
         img.surface = self.surface.subsurface(rect)
-        img._initTexture()
+        # Share the texture with the image we are cut from
+        atlas = self.atlas if self.atlas is not None else self
+        x, y = self.atlasOffset
+        img._initSubTexture(atlas, (x + rect.x, y + rect.y))
         return img
 
     def getSize(self) -> typing.Tuple[int, int]:
@@ -263,6 +402,29 @@ class ImageGL(Image):
 
 
 class RendererGL(Renderer):
+    batching: bool
+    batchTexture: typing.Any
+    batchVertices: 'array.array[float]'
+    batchTexCoords: 'array.array[float]'
+    drawCalls: int
+
+    def __init__(
+        self,
+        width: int = 1024,
+        height: int = 768,
+        depth: int = 32,
+        fullScreen: bool = False,
+        batching: bool = True,
+    ):
+        super().__init__(width, height, depth, fullScreen)
+        # If batching, blits are collected in vertex arrays and drawn with
+        # a single glDrawArrays per run of blits sharing same texture
+        self.batching = batching
+        self.batchTexture = None
+        self.batchVertices = array.array('f')
+        self.batchTexCoords = array.array('f')
+        self.drawCalls = 0
+
     def init(self) -> None:
         flags = pygame.DOUBLEBUF | pygame.OPENGL
         if self.fullScreen:
@@ -288,9 +450,87 @@ class RendererGL(Renderer):
         pygame.quit()
 
     def blit(self, image, position=None, area=None, alpha=255) -> None:
-        image.draw(position)
+        if position is None:
+            position = (0, 0)
+
+        if not self.batching:
+            image.draw(position)
+            self.drawCalls += 1
+            return
+
+        texture = image.getTexture()
+        if texture is None:
+            return
+
+        x, y = position
+        width, height = image.getSize()
+        u0, v0, u1, v1 = image.texCoords
+        if area is not None:
+            area = pygame.Rect(area).clip(pygame.Rect(0, 0, width, height))
+            uStep, vStep = (u1 - u0) / width, (v1 - v0) / height
+            u0, u1 = u0 + area.left * uStep, u0 + area.right * uStep
+            v0, v1 = v0 + area.top * vStep, v0 + area.bottom * vStep
+            width, height = area.size
+
+        self.addQuad(texture, (x, y, x + width, y + height), (u0, v0, u1, v1))
+
+    def canBlitScaled(self) -> bool:
+        return True
+
+    def blitScaled(self, image: ImageGL, rect: pygame.Rect) -> None:
+        texture = image.getTexture()
+        if texture is None:
+            return
+
+        rect = pygame.Rect(rect)
+        self.addQuad(texture, (rect.left, rect.top, rect.right, rect.bottom), image.texCoords)
+        if not self.batching:
+            self.flush()
+
+    def addQuad(
+        self,
+        texture: typing.Any,
+        corners: typing.Tuple[float, float, float, float],
+        texCoords: typing.Tuple[float, float, float, float],
+    ) -> None:
+        '''
+        Adds a quad of texture from top left to bottom right corners to current batch
+        '''
+        # Painter's order must be kept, so a texture change closes current batch
+        if texture != self.batchTexture:
+            self.flush()
+            self.batchTexture = texture
+
+        x0, y0, x1, y1 = corners
+        u0, v0, u1, v1 = texCoords
+        self.batchVertices.extend((x0, y0, x1, y0, x1, y1, x0, y1))
+        self.batchTexCoords.extend((u0, v0, u1, v0, u1, v1, u0, v1))
+
+    def flush(self) -> None:
+        '''
+        Draws pending batched blits
+        '''
+        if not self.batchVertices:
+            return
+
+        count = len(self.batchVertices) // 2
+        vertices = (ctypes.c_float * len(self.batchVertices)).from_buffer(self.batchVertices)
+        texCoords = (ctypes.c_float * len(self.batchTexCoords)).from_buffer(self.batchTexCoords)
+
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.batchTexture)
+        gl.glVertexPointer(2, gl.GL_FLOAT, 0, vertices)
+        gl.glTexCoordPointer(2, gl.GL_FLOAT, 0, texCoords)
+        gl.glDrawArrays(gl.GL_QUADS, 0, count)
+        self.drawCalls += 1
+
+        # Buffers are exported to GL pointers, so we use new ones instead of resizing them
+        self.batchVertices = array.array('f')
+        self.batchTexCoords = array.array('f')
 
     def beginDraw(self) -> None:
+        self.drawCalls = 0
+        self.batchTexture = None
+
         gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)  # type: ignore
         gl.glLoadIdentity()
 
@@ -303,7 +543,15 @@ class RendererGL(Renderer):
         gl.glPushMatrix()
         gl.glLoadIdentity()
 
+        # Also needed without batching, as scaled blits are always drawn from vertex arrays
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glEnableClientState(gl.GL_TEXTURE_COORD_ARRAY)
+
     def endDraw(self) -> None:
+        self.flush()
+        gl.glDisableClientState(gl.GL_TEXTURE_COORD_ARRAY)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+
         gl.glMatrixMode(gl.GL_PROJECTION)
         gl.glPopMatrix()
         gl.glMatrixMode(gl.GL_MODELVIEW)
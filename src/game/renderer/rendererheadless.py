@@ -0,0 +1,79 @@
+import os
+import typing
+
+import pygame
+
+from . import renderer
+from .renderer2d import Renderer2D, Image2D
+
+
+class RendererHeadless(Renderer2D):
+    '''
+    Renderer that needs no display at all (uses SDL "dummy" video driver), for
+    benchmarks and tests. Blits are really done on an offscreen surface (unless
+    drawing is disabled) and counted, and optionally recorded.
+    '''
+    drawing: bool
+    recording: bool
+    blitsCount: int  # Blits of current frame
+    totalBlits: int
+    framesCount: int
+    recorded: typing.List[typing.Tuple[typing.Tuple[int, int], typing.Optional[typing.Tuple[int, int]], int]]
+
+    def __init__(
+        self,
+        width: int = 1024,
+        height: int = 768,
+        depth: int = 32,
+        fullScreen: bool = False,
+        drawing: bool = True,
+        recording: bool = False,
+        dirtyRects: bool = False,
+    ):
+        # Display could have been already initialized with a "real" driver, so restart it
+        if os.environ.get('SDL_VIDEODRIVER') != 'dummy':
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            pygame.display.quit()
+
+        super().__init__(width, height, depth, False, dirtyRects)
+        self.drawing = drawing
+        self.recording = recording
+        self.blitsCount = self.totalBlits = self.framesCount = 0
+        self.recorded = []
+
+    def init(self):
+        pygame.display.init()
+        # Dummy driver display surface is a plain memory surface (also needed for convert_alpha)
+        self.screen = typing.cast(pygame.Surface, pygame.display.set_mode(self.resolution, 0, self.depth))
+
+    def blit(
+        self,
+        image: 'renderer.Image',
+        position: typing.Optional[typing.Tuple[int, int]] = None,
+        area: typing.Optional[pygame.Rect] = None,
+        alpha: int = 255,
+    ):
+        if not image.surface or not isinstance(image, Image2D):
+            return
+
+        self.blitsCount += 1
+        if self.recording:
+            self.recorded.append((
+                image.getSize(),
+                (int(position[0]), int(position[1])) if position is not None else None,
+                alpha,
+            ))
+        if self.drawing:
+            super().blit(image, position, area, alpha)
+
+    def beginDraw(self) -> None:
+        self.blitsCount = 0
+        self.recorded = []
+
+    def endDraw(self) -> None:
+        # Nothing to show, so just forget frame regions
+        self.dirty = []
+        self.fullRedraw = False
+        self.regions = None
+        self.totalBlits += self.blitsCount
+        self.framesCount += 1
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import typing
+
+import pygame
+
+from game.debug import drawDebugRect
+
+if typing.TYPE_CHECKING:
+    from game.interfaces import Collidable
+
+CellRange = typing.Tuple[int, int, int, int]
+
+
+class SpatialHash:
+
+    DEFAULT_CELL_SIZE = 128  # Size of cells, in pixels
+
+    cellSize: int
+    cells: typing.Dict[typing.Tuple[int, int], typing.Dict['Collidable', None]]
+    objects: typing.Dict['Collidable', typing.Tuple[CellRange, int]]
+    counter: int
+
+    def __init__(self, cellSize: int = DEFAULT_CELL_SIZE) -> None:
+        """
+        Initialize an uniform grid spatial hash.
+
+        Args:
+            cellSize (int): Width and height of grid cells. Objects are stored on every
+                cell their collision rect touches, so it should be about the size of
+                the most common objects (or a bit bigger).
+        """
+        self.cellSize = cellSize
+        self.cells = {}
+        self.objects = {}
+        self.counter = 0  # Insertion order, so retrieved objects keeps it
+
+    def clear(self) -> None:
+        """
+        Remove all objects from the spatial hash.
+        """
+        self.cells.clear()
+        self.objects.clear()
+
+    def _getCellRange(self, rect: pygame.Rect) -> CellRange:
+        '''
+        Returns first and last (both included) cells columns and rows covered by rect
+        '''
+        cellSize = self.cellSize
+        return (
+            rect.left // cellSize,
+            rect.top // cellSize,
+            max(rect.right - 1, rect.left) // cellSize,
+            max(rect.bottom - 1, rect.top) // cellSize,
+        )
+
+    def _addToCells(self, obj: 'Collidable', cellRange: CellRange) -> None:
+        x0, y0, x1, y1 = cellRange
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                cell = self.cells.get((x, y))
+                if cell is None:
+                    cell = self.cells[(x, y)] = {}
+                cell[obj] = None
+
+    def _removeFromCells(self, obj: 'Collidable', cellRange: CellRange) -> None:
+        x0, y0, x1, y1 = cellRange
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                cell = self.cells[(x, y)]
+                del cell[obj]
+                if not cell:
+                    del self.cells[(x, y)]
+
+    def insert(self, obj: 'Collidable') -> None:
+        if obj in self.objects:
+            self.update(obj)
+            return
+
+        cellRange = self._getCellRange(obj.getColRect())
+        self.counter += 1
+        self.objects[obj] = (cellRange, self.counter)
+        self._addToCells(obj, cellRange)
+
+    def remove(self, obj: 'Collidable') -> bool:
+        try:
+            cellRange, _ = self.objects.pop(obj)
+        except KeyError:
+            return False
+        self._removeFromCells(obj, cellRange)
+        return True
+
+    def update(self, obj: 'Collidable') -> bool:
+        '''
+        Must be invoked when obj collision rect has changed.
+        Returns True if obj has changed of cells
+        '''
+        stored = self.objects.get(obj)
+        if stored is None:
+            self.insert(obj)
+            return True
+
+        cellRange = self._getCellRange(obj.getColRect())
+        if cellRange == stored[0]:  # Most of times, objects keeps on same cells
+            return False
+
+        self._removeFromCells(obj, stored[0])
+        self.objects[obj] = (cellRange, stored[1])
+        self._addToCells(obj, cellRange)
+        return True
+
+    def retrieve(self, rect: pygame.Rect) -> typing.Iterable['Collidable']:
+        '''
+        Return all "possible" collidables in rect, in insertion order
+        '''
+        x0, y0, x1, y1 = self._getCellRange(rect)
+        found: typing.Dict['Collidable', None] = {}
+        cells = self.cells
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                cell = cells.get((x, y))
+                if cell:
+                    found.update(cell)
+
+        if len(found) < 2:
+            return list(found)
+
+        objects = self.objects
+        return sorted(found, key=lambda obj: objects[obj][1])
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def draw(self, toSurface, rect: pygame.Rect) -> None:
+        '''
+        For debugging purposes, draws used cells & collisions rects
+        '''
+        cellSize = self.cellSize
+        for (x, y), cell in self.cells.items():
+            drawDebugRect(
+                toSurface,
+                pygame.Rect(x * cellSize - rect.x, y * cellSize - rect.y, cellSize, cellSize),
+                (min(len(cell) * 40, 255), 0, 0, 0),
+                2,
+            )
+        for obj in self.objects:
+            drawDebugRect(toSurface, obj.getColRect().move(-rect.x, -rect.y), (0, 100, 0, 0), 1)
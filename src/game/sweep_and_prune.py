@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import typing
+
+import pygame
+
+if typing.TYPE_CHECKING:
+    from game.interfaces import Collidable
+
+
+class SweepAndPrune:
+    """
+    Broadphase for a few objects that moves all the time (as platforms).
+    Objects are kept sorted by the left side of their collision rects (or the rects
+    given by rectOf), so a query only checks the ones whose x interval can overlap
+    it. As objects moves just a bit every frame, keeping them sorted is an insertion
+    sort step that most of times does nothing.
+    """
+
+    objects: typing.List['Collidable']
+    lefts: typing.List[int]  # Left side of every object, same order as objects
+    maxWidth: int  # Widest object, bounds how far to the left a query must look
+    rectOf: typing.Callable[['Collidable'], pygame.Rect]
+
+    def __init__(self, rectOf: typing.Optional[typing.Callable[['Collidable'], pygame.Rect]] = None) -> None:
+        self.rectOf = rectOf if rectOf is not None else (lambda obj: obj.getColRect())
+        self.objects = []
+        self.lefts = []
+        self.maxWidth = 0
+
+    def clear(self) -> None:
+        self.objects = []
+        self.lefts = []
+        self.maxWidth = 0
+
+    def insert(self, obj: 'Collidable') -> None:
+        rect = self.rectOf(obj)
+        pos = bisect.bisect_right(self.lefts, rect.left)
+        self.objects.insert(pos, obj)
+        self.lefts.insert(pos, rect.left)
+        self.maxWidth = max(self.maxWidth, rect.width)
+
+    def remove(self, obj: 'Collidable') -> bool:
+        try:
+            pos = self.objects.index(obj)
+        except ValueError:
+            return False
+        del self.objects[pos]
+        del self.lefts[pos]
+        return True
+
+    def update(self, obj: 'Collidable') -> None:
+        '''
+        Must be invoked when obj collision rect has changed. Moves obj to its sorted
+        position, swapping it with its neighbours
+        '''
+        objects, lefts = self.objects, self.lefts
+        rect = self.rectOf(obj)
+        left = rect.left
+        pos = objects.index(obj)
+        while pos > 0 and lefts[pos - 1] > left:
+            objects[pos], lefts[pos] = objects[pos - 1], lefts[pos - 1]
+            pos -= 1
+        while pos < len(objects) - 1 and lefts[pos + 1] < left:
+            objects[pos], lefts[pos] = objects[pos + 1], lefts[pos + 1]
+            pos += 1
+        objects[pos], lefts[pos] = obj, left
+        self.maxWidth = max(self.maxWidth, rect.width)
+
+    def retrieve(self, rect: pygame.Rect) -> typing.List['Collidable']:
+        '''
+        Return objects colliding with rect, sorted by their left side
+        '''
+        start = bisect.bisect_right(self.lefts, rect.left - self.maxWidth)
+        end = bisect.bisect_left(self.lefts, rect.right)
+        rectOf = self.rectOf
+        return [obj for obj in self.objects[start:end] if rectOf(obj).colliderect(rect)]
+
+    def __iter__(self) -> typing.Iterator['Collidable']:
+        return iter(self.objects)
+
+    def __len__(self) -> int:
+        return len(self.objects)
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+'''
+Text rendering caches
+
+Loading a font reads it from disk, and rendering text is slow compared to blitting it,
+so fonts are kept by (face, size), and lines of text and whole speech bubbles are kept by
+content, so repeated messages are just blitted. Lines are rendered by the font, so kerning
+is kept.
+
+Text that changes every frame (i.e. counters) would just fill the lines cache, so it is
+composed from glyphs rendered once into an atlas per style (face, size, color). Glyphs are
+placed by their advance, but pairs of glyphs are not kerned, so it is meant for numbers.
+'''
+import typing
+import logging
+import collections
+
+import pygame
+
+from game.util import classProperty
+from game import dialog
+from game import renderer
+
+logger = logging.getLogger(__name__)
+
+LINES_CACHE = 256  # Rendered lines of text kept
+BUBBLES_CACHE = 32  # Speech bubbles kept
+
+PRELOADED_GLYPHS = '0123456789 .,:-+%/'
+
+Color = typing.Tuple[int, ...]
+Style = typing.Tuple[typing.Optional[str], int, Color]  # Face (None for default font), size, color
+
+
+class GlyphAtlas(object):
+    '''
+    Glyphs of a font style rendered side by side on a single surface. Glyphs not
+    preloaded are added the first time they are needed
+    '''
+    font: pygame.font.Font
+    color: Color
+    surface: pygame.Surface
+    glyphs: typing.Dict[str, pygame.Rect]
+    advances: typing.Dict[str, int]  # Distance from a glyph to the next one
+
+    def __init__(self, font: pygame.font.Font, color: Color) -> None:
+        self.font = font
+        self.color = color
+        self.surface = pygame.Surface((0, font.get_height()), pygame.SRCALPHA)
+        self.glyphs = {}
+        self.advances = {}
+        self.addGlyphs(PRELOADED_GLYPHS)
+
+    def addGlyphs(self, chars: str) -> None:
+        rendered = [(c, self.font.render(c, True, self.color)) for c in set(chars) if c not in self.glyphs]
+        if not rendered:
+            return
+        for (c, _), metrics in zip(rendered, self.font.metrics(''.join(c for c, _ in rendered))):
+            self.advances[c] = metrics[4] if metrics is not None else 0
+        x = self.surface.get_width()
+        height = max([self.surface.get_height()] + [s.get_height() for _, s in rendered])
+        surface = pygame.Surface((x + sum(s.get_width() for _, s in rendered), height), pygame.SRCALPHA)
+        surface.blit(self.surface, (0, 0))
+        for c, glyph in rendered:
+            surface.blit(glyph, (x, 0))
+            self.glyphs[c] = pygame.Rect(x, 0, glyph.get_width(), glyph.get_height())
+            x += glyph.get_width()
+        self.surface = surface
+
+    def render(self, text: str) -> pygame.Surface:
+        '''
+        Text (a single line) composed from atlas glyphs, without kerning
+        '''
+        self.addGlyphs(text)
+        positions = []
+        x = width = 0
+        for c in text:
+            glyph = self.glyphs[c]
+            positions.append((x, glyph))
+            width = max(width, x + glyph.width)
+            x += self.advances[c]
+        surface = pygame.Surface((max(width, 1), self.font.get_height()), pygame.SRCALPHA)
+        for x, glyph in positions:
+            # Surface is transparent, so this copies glyphs with its alpha (keeping the most
+            # opaque pixels where neighbour glyphs overlap)
+            surface.blit(self.surface, (x, 0), glyph, pygame.BLEND_RGBA_MAX)
+        return surface
+
+
+class SpeechBubble(object):
+    '''
+    Text inside a dialog frame. Image is the whole bubble, or just the text if frame
+    is drawn apart (from its tiles)
+    '''
+    image: 'renderer.Image'
+    style: int
+    drawsFrame: bool
+
+    def __init__(self, image: 'renderer.Image', style: int, drawsFrame: bool) -> None:
+        self.image = image
+        self.style = style
+        self.drawsFrame = drawsFrame
+
+    def getSize(self) -> typing.Tuple[int, int]:
+        return self.image.getSize()
+
+    def draw(self, rendererInstance: 'renderer.Renderer', position: typing.Tuple[float, float], alpha: int = 255) -> None:
+        if self.drawsFrame:
+            dialog.Dialog.builder.drawDialog(rendererInstance, position, *self.getSize(), style=self.style)
+        rendererInstance.blit(self.image, position, alpha=alpha)
+
+
+class TextCache(object):
+    _cache = None
+
+    fonts: typing.Dict[typing.Tuple[typing.Optional[str], int], pygame.font.Font]
+    atlases: typing.Dict[Style, GlyphAtlas]
+    lines: 'collections.OrderedDict[typing.Tuple[str, Style], pygame.Surface]'
+    bubbles: 'collections.OrderedDict[typing.Any, SpeechBubble]'
+
+    def __init__(self) -> None:
+        self.fonts = {}
+        self.atlases = {}
+        self.lines = collections.OrderedDict()
+        self.bubbles = collections.OrderedDict()
+
+    @classProperty
+    def cache(cls):
+        if cls._cache is None:
+            cls._cache = TextCache()
+        return cls._cache
+
+    def font(self, face: typing.Optional[str], size: int) -> pygame.font.Font:
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(face, size)
+        return font
+
+    def atlas(self, style: Style) -> GlyphAtlas:
+        atlas = self.atlases.get(style)
+        if atlas is None:
+            atlas = self.atlases[style] = GlyphAtlas(self.font(style[0], style[1]), style[2])
+        return atlas
+
+    def line(self, text: str, style: Style) -> pygame.Surface:
+        '''
+        Surface with a line of text rendered with style. Must not be modified
+        '''
+        key = (text, style)
+        surface = self.lines.get(key)
+        if surface is None:
+            face, size, color = style
+            surface = self.lines[key] = self.font(face, size).render(text, True, color)
+            if len(self.lines) > LINES_CACHE:
+                self.lines.popitem(last=False)
+        else:
+            self.lines.move_to_end(key)
+        return surface
+
+    def counter(self, text: str, style: Style) -> pygame.Surface:
+        '''
+        New surface with text that changes often (i.e. a number) rendered with style. It is
+        composed from glyphs, so it is not cached and pairs of glyphs are not kerned
+        '''
+        return self.atlas(style).render(text)
+
+    def bubble(
+        self, text: str, fontSize: int, fontColor: Color = (0, 0, 0), style: int = dialog.TRANSPARENT
+    ) -> 'SpeechBubble':
+        '''
+        Text (can have several lines) centered inside a dialog of style
+        '''
+        key = (renderer.Renderer.renderer, text, fontSize, tuple(fontColor), style)
+        bubble = self.bubbles.get(key)
+        if bubble is None:
+            bubble = self.bubbles[key] = self.renderBubble(text, fontSize, tuple(fontColor), style)
+            if len(self.bubbles) > BUBBLES_CACHE:
+                self.bubbles.popitem(last=False)
+        else:
+            self.bubbles.move_to_end(key)
+        return bubble
+
+    def renderBubble(self, text: str, fontSize: int, fontColor: Color, style: int) -> 'SpeechBubble':
+        lines = [self.line(txt, (None, fontSize, fontColor)) for txt in text.splitlines()]
+
+        # Containing rect of text, plus borders
+        borderSize = max(2 * (fontSize / 8), 4)
+        width = max([0] + [l.get_width() for l in lines]) + borderSize
+        height = sum(l.get_height() for l in lines) + borderSize
+
+        builder = dialog.Dialog.builder
+        frameSize = builder.frameSize(width, height)
+
+        # If frame can be drawn from its tiles, just text is rendered, on a frame sized image
+        # (so it's drawn at same position), else text is rendered on a copy of the frame
+        if renderer.Renderer.renderer.canBlitScaled():
+            surface = pygame.Surface(frameSize, pygame.SRCALPHA)
+        else:
+            surface = builder.getFrame(width, height, style).surface.copy()
+
+        yPos = borderSize / 2
+        for line in lines:
+            surface.blit(line, ((width - line.get_width()) / 2, yPos))
+            yPos += line.get_height()
+
+        image = renderer.Renderer.renderer.imageFromSurface(surface)
+        return SpeechBubble(image, style, renderer.Renderer.renderer.canBlitScaled())
+
+    def clear(self) -> None:
+        self.fonts.clear()
+        self.atlases.clear()
+        self.lines.clear()
+        self.bubbles.clear()
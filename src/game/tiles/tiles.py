@@ -5,6 +5,7 @@ import pygame
 
 import game.util
 import game.objects
+from game.clock import engineClock
 
 logger = logging.getLogger(__name__)
 
@@ -16,10 +17,9 @@ if typing.TYPE_CHECKING:
 ######################
 class Tile(game.objects.GraphicObject):
     animation: typing.List[int]
-    animationState: int
+    animationFrames: typing.Optional[typing.List[typing.Any]]  # Original image followed by animation ones
     animated: bool
     animationDelay: int
-    animationOriginalDelay: int
     originalImage: pygame.Surface
     image: pygame.Surface
     tileId: int
@@ -41,6 +41,7 @@ class Tile(game.objects.GraphicObject):
 
         self.tileId = tileId
         self.originalImage = self.image = image
+        self.animationFrames = None
 
     def updateAttributes(self) -> None:
         super().updateAttributes()
@@ -54,14 +55,11 @@ class Tile(game.objects.GraphicObject):
             self.animation = [
                 int(i) for i in self.properties.get('animation', '-1').split(',')
             ]
-            self.animationOriginalDelay = self.animationDelay = int(
-                self.properties.get('delay', '1')
-            )
-            self.animationState = 0
+            self.animationDelay = max(int(self.properties.get('delay', '1')), 1)
         else:
             self.animated = False
             self.animation = []
-            self.animationState = 0
+        self.animationFrames = None
 
         # Optimized rect for collisions
         if self.properties.get('height') is not None:
@@ -74,38 +72,37 @@ class Tile(game.objects.GraphicObject):
             self.rect.top = int(self.properties.get('top') or '0')
 
     def update(self) -> None:
-        if not self.animated or not self.parent:
-            return
-        self.animationDelay -= 1
-        if self.animationDelay > 0:
-            return
-        self.animationDelay = self.animationOriginalDelay
-        if self.animationState > len(self.animation):
-            self.animationState = 0
-            self.resetImage()
-        else:
-            tile = typing.cast('game.tiles.TileSet', self.parent).getTile(
-                self.animation[self.animationState - 1]
-            )
-            if tile:
-                self.image = tile.getOriginalImage()
-                self.animationState += 1
+        '''
+        Animated tiles computes its frame from engine clock when drawn, so nothing to do here
+        '''
+        pass
+
+    def getAnimationFrames(self) -> typing.List[typing.Any]:
+        if self.animationFrames is None:
+            tileSet = typing.cast('game.tiles.TileSet', self.parent)
+            self.animationFrames = [self.originalImage]
+            for tileId in self.animation:
+                tile = tileSet.getTile(tileId) if tileSet else None
+                if tile:
+                    self.animationFrames.append(tile.getOriginalImage())
+        return self.animationFrames
 
     # This x,y coordinates are screen coordinates
     # TileArray, Platform, etc.. converts coordinates of objects acordly beforw invoking it
     def draw(self, renderer, rect):
-        size = renderer.getSize()
-        renderer.blit(self.image, rect.topleft)
+        renderer.blit(self.getImage(), rect.topleft)
 
     def blit(self, toImage, rect):
-        size = toImage.getSize()
-        toImage.blit(self.image, rect.topleft)
+        toImage.blit(self.getImage(), rect.topleft)
 
     def getOriginalImage(self):
         return self.originalImage
 
     def getImage(self):
-        return self.image
+        if not self.animated:
+            return self.image
+        frames = self.getAnimationFrames()
+        return frames[(engineClock.tick // self.animationDelay) % len(frames)]
 
     def setImage(self, surface):
         self.image = surface
@@ -5,12 +5,8 @@ import os
 import logging
 import typing
 
-import pygame
-
-import xml.etree.ElementTree as ET
-
-from game.util import loadProperties
 from game.tiles import Tile
+from game.image_cache import ImageCache
 
 if typing.TYPE_CHECKING:
     import game.maps
@@ -38,6 +34,7 @@ class TileSet(object):
     properties: typing.Dict[str, str]
     tilesProperties: typing.Dict[int, typing.Dict[str, str]]
     parentMap: 'game.maps.Map'
+    cachedImages: typing.List['game.renderer.renderer.Image']  # Acquired from ImageCache
 
     def __init__(self, parentMap: 'game.maps.Map') -> None:
         self.name = None
@@ -51,50 +48,38 @@ class TileSet(object):
         self.properties = {}
         self.tilesProperties = {}
         self.parentMap = parentMap
-
-    def __loadTilesProperties(self, node: ET.Element) -> None:
-        self.tilesProperties = {}
-        for t in node.findall('tile'):
-            tid = int(t.attrib['id'])
-            self.tilesProperties[tid] = loadProperties(t.find('properties'))
-
-    def __loadTileSet(self, node: ET.Element) -> None:
-        image = node.find('image')
-        if image is None:
-            return
-
-        self.name = node.attrib['name']
-        self.tileWidth = int(node.attrib['tilewidth'])
-        self.tileHeight = int(node.attrib['tileheight'])
-        self.tileSpacing = int(node.attrib.get('spacing', 0))
-        self.imageFile = image.attrib['source']
-        self.imageWidth = int(image.attrib['width'])
-        self.imageHeight = int(image.attrib['height'])
-
-        self.image = self.getRenderer().imageFromFile(
-            os.path.join(self.parentMap.mapPath, self.imageFile)
-        )
-
-        self.properties = loadProperties(node.find('properties'))
-        self.__loadTilesProperties(node)
-
-    def __loadExternalTileset(self, path):
-        logger.debug('Loading external tileset: {}'.format(path))
-        tree = ET.parse(os.path.join(self.parentMap.mapPath, path))
-        root = tree.getroot()  # Map element
-        self.__loadTileSet(root)
+        self.cachedImages = []
 
     def getRenderer(self) -> 'game.renderer.Renderer':
         return self.parentMap.getController().renderer
 
-    def load(self, node: ET.Element) -> None:
+    def load(self, data: typing.Dict[str, typing.Any]) -> None:
+        '''
+        Loads the tileset from its parsed data (see game.maps.tmx)
+        '''
         logger.debug('Loading tileset in path {}'.format(self.parentMap.mapPath))
-        if 'source' in node.attrib:
-            self.__loadExternalTileset(node.attrib['source'])
-        else:
-            self.__loadTileSet(node)
+        self.firstGid = data['firstGid']
+
+        if data['imageFile'] is not None:
+            self.name = data['name']
+            self.tileWidth = data['tileWidth']
+            self.tileHeight = data['tileHeight']
+            self.tileSpacing = data['tileSpacing']
+            self.imageFile = data['imageFile']
+            self.imageWidth = data['imageWidth']
+            self.imageHeight = data['imageHeight']
+
+            # Surface is already decoded if map has been prefetched
+            self.image = self.acquireImage(
+                ImageCache.cache.acquire(
+                    self.getRenderer(),
+                    os.path.join(self.parentMap.mapPath, self.imageFile),
+                    surface=data.get('surface'),
+                )
+            )
 
-        self.firstGid = int(node.attrib['firstgid'])
+            self.properties = data['properties']
+            self.tilesProperties = data['tilesProperties']
 
         logger.debug(
             'Image path: {} {}x{}'.format(
@@ -122,12 +107,16 @@ class TileSet(object):
                 self.tiles[localTileId] = Tile(
                     self,
                     tileId,
-                    self.image.subimage(
-                        (
-                            (self.tileWidth + self.tileSpacing) * x,
-                            (self.tileHeight + self.tileSpacing) * y,
-                            self.tileWidth,
-                            self.tileHeight,
+                    self.acquireImage(
+                        ImageCache.cache.derive(
+                            self.image,
+                            (
+                                'subimage',
+                                (self.tileWidth + self.tileSpacing) * x,
+                                (self.tileHeight + self.tileSpacing) * y,
+                                self.tileWidth,
+                                self.tileHeight,
+                            ),
                         )
                     ),
                     self.tilesProperties.get(localTileId, {}),
@@ -135,12 +124,22 @@ class TileSet(object):
 
         self.animatedTiles = [i for i in self.tiles if i and i.animated]
 
+    def acquireImage(self, image: 'game.renderer.renderer.Image') -> 'game.renderer.renderer.Image':
+        self.cachedImages.append(image)
+        return image
+
+    def unload(self) -> None:
+        '''
+        Releases images of this tileset from cache
+        '''
+        for image in self.cachedImages:
+            ImageCache.cache.release(image)
+        self.cachedImages = []
+
     def addTileFromTile(self, srcTile, flipX, flipY, rotate):
-        if rotate:
-            image = pygame.transform.rotate(srcTile.getOriginalImage(), 90)
-        else:
-            image = srcTile.getOriginalImage()
-        image = srcTile.getOriginalImage().flip(flipX, flipY, rotate)
+        image = self.acquireImage(
+            ImageCache.cache.derive(srcTile.getOriginalImage(), ('flip', flipX, flipY, rotate))
+        )
         tile = Tile(self, len(self.tiles) + 1, image, srcTile.properties)
         self.tiles.append(tile)
         return tile
@@ -155,8 +154,10 @@ class TileSet(object):
         return self.properties.get(propertyName)
 
     def update(self):
-        for t in self.animatedTiles:
-            t.update()
+        '''
+        Tiles animations are driven by engine clock (see game.clock), so nothing to do here
+        '''
+        pass
 
     def __unicode__(self):
         return 'Tileset {}: {}x{} ({})'.format(
@@ -30,6 +30,7 @@ WIDTH = 1280
 HEIGHT = 960
 FULLSCREEN = False
 RENDERER = Renderer2D
+PROFILE = False  # Runs the whole game under cProfile (F3 toggles the lightweight profiler overlay)
 
 BASE_SPEED = 8
 
@@ -98,6 +99,9 @@ class GameTest(game.game_state.GameState):
     def on_exit(self):
         pygame.mixer.music.stop()
 
+    def on_quit(self):
+        self.maps.shutdown()
+
     def on_keydown(self, key):
         fnc = self.pressKey.get(key)
         if fnc is not None:
@@ -109,6 +113,12 @@ class GameTest(game.game_state.GameState):
         if key == const.K_q:
             return game.game_state.GameControl.EXIT_GAMESTATE
 
+        if key == const.K_F3:
+            profiler = self.controller.profiler
+            profiler.enable(not profiler.enabled, overlay=True)
+        elif key == const.K_F4:
+            self.controller.profiler.dump(os.path.join(tempfile.gettempdir(), 'profile.json'))
+
         # if key == K_n:
         #    return 'state1'
 
@@ -149,9 +159,11 @@ gc = game.game_state.GameControl(
 
 gc.add(GameTest('state0'))
 
-import cProfile
+if PROFILE:
+    import cProfile
 
-cProfile.run('gc.run()', os.path.join(tempfile.gettempdir(), 'test.stats'))
-# gc.run()
+    cProfile.run('gc.run()', os.path.join(tempfile.gettempdir(), 'test.stats'))
+else:
+    gc.run()
 
 gc.quit()
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import pygame
+
 from game.actors import Actor
 from game.hud.score import ScoreableMixin
 from game.animation import FilesAnimation
@@ -10,6 +12,8 @@ from game.sound.sound import SoundsStore
 from game.effects import FadingTextEffect
 from game.effects import FadingMovingValueEffect
 from game.collision_cache import WithCollisionCache
+from game.collision_cache import X_AXIS, Y_AXIS
+from game.collision_grid import TILE_LADDER, TILE_LETHAL, TILE_COLLECTABLE, TILE_LOCK
 
 import logging
 
@@ -63,58 +67,38 @@ class Player(Actor, WithCollisionCache, ScoreableMixin):
     def getColRect(self):
         return self.rect.move(self.xOffset, self.yOffset)
 
-    def checkXCollisions(self, offset):
-        if offset == 0:
-            return
-        for c in self.getCollisions():
-            colRect, obj, layer = c
-            if obj.blocks is False:
-                continue
-            if offset > 0:
-                self.rect.right = colRect.left - 1 - self.xOffset # Actor position is not exactly where it collides
-            else:
-                self.rect.left = colRect.right + 1 - self.xOffset  # Actor position is not exactly where it collides
-            return True
-        return False
-
-    def checkYCollisions(self, offset):
+    def checkActionsOnCollision(self, contacts, handled=None):
         '''
-        Our rect is not exactly where the animation is drawn, it's offseted
+        Acts on the objects touched while moving, skipping the ones already in handled
+        (a set that gets updated). Returns True if any of them has been removed from
+        map (so collisions must be checked again)
         '''
-        if offset == 0:
-            return
-
-        for c in self.getCollisions():
-            colRect, obj, layer = c
-            if obj.blocks is False:
-                continue
-            self.ySpeed = 0
-            if offset > 0:
-                if self.rect.bottom > colRect.top - 1 - self.yOffset: # Actor position is not exactly where it collides
-                    self.rect.bottom = colRect.top - 1 - self.yOffset
-            else:
-                if self.rect.top < colRect.bottom + 1 - self.yOffset: # Actor position is not exactly where it collides
-                    self.rect.top = colRect.bottom + 1 - self.yOffset
-
-    def checkActionsOnCollision(self):
         inLadder = False
-        for c in self.getCollisions():
+        removed = False
+        for c in contacts:
             colRect, element, layer = c
-            if element.isA('lethal'):
+            flags = element.collisionFlags
+            if flags & TILE_LADDER:
+                inLadder = True
+
+            if handled is not None:
+                key = (tuple(colRect), id(element))
+                if key in handled:
+                    continue
+                handled.add(key)
+
+            if flags & TILE_LETHAL:
                 # Die!! :-)
-                self.parent.parentMap.addEffect('die', FadingTextEffect(colRect.centerx, colRect.y-10, 'DIE!!! :-)', 24))
+                self.parent.parentMap.addEffect('die', FadingTextEffect.acquire(colRect.centerx, colRect.y-10, 'DIE!!! :-)', 24))
                 self.isAlive = False
                 continue
 
-            if element.isA('ladder'):
-                inLadder = True
-
-            if element.isA('collectable') is True:
+            if flags & TILE_COLLECTABLE:
                 score, snd = int(element.getProperty('score', '0')), element.getProperty('sound')
                 layer.removeObjectAt(colRect.x, colRect.y)
                 if score is not None:
                     self.score += score
-                    self.parent.parentMap.addEffect(None, FadingMovingValueEffect(colRect.x+colRect.width/2, colRect.y, score))
+                    self.parent.parentMap.addEffect(None, FadingMovingValueEffect.acquire(colRect.x+colRect.width/2, colRect.y, score))
 
                 if snd is not None:
                     try:
@@ -128,41 +112,65 @@ class Player(Actor, WithCollisionCache, ScoreableMixin):
                     self.hasYellowKey = True
                     SoundsStore.store.get('key').play()
 
-                self.resetCollisionsCache()
+                removed = True
 
-            if element.isA('lock'):
+            if flags & TILE_LOCK:
                 if element.getProperty('needs') == 'YellowKey' and self.hasYellowKey:
                     logger.debug('We have the yellow key and we are colliding with a yellow key needing brick!')
                     layer.removeObjectAt(colRect.x, colRect.y)
-                    self.resetCollisionsCache()
+                    removed = True
                     SoundsStore.store.get('open_lock').play()
                 else:
-                    self.parent.parentMap.addEffect('jqntlla', FadingTextEffect(colRect.x+colRect.width/2, colRect.y-10, 'You need\nthe Yellow Key', 24))
+                    self.parent.parentMap.addEffect('jqntlla', FadingTextEffect.acquire(colRect.x+colRect.width/2, colRect.y-10, 'You need\nthe Yellow Key', 24))
                 continue
 
-        # Fire map triggers on our possition
-        self.parent.parentMap.checkTriggers(self.getColRect())
-
         # If ladder is true, maybe we haven't hanged on it
         if inLadder is False:
             self.inLadder = False
 
+        return removed
+
+    def moveAxis(self, offset, axis):
+        '''
+        Moves along axis (X_AXIS or Y_AXIS) as far as offset, stopping before blocking objects
+        '''
+        target = self.rect.copy()
+        if axis == X_AXIS:
+            target.left += offset
+        else:
+            target.top += offset
+        target.clamp_ip(self.boundary)
+        offset = target[axis] - self.rect[axis]
+
+        start = self.getColRect()
+        allowed, blocked, contacts = self.sweepCollisions(offset, axis, start)
+        handled = set()
+        while self.checkActionsOnCollision(contacts, handled):
+            # Something has been collected or opened, so it may not block us anymore,
+            # and what was behind it is touched now
+            allowed, blocked, contacts = self.sweepCollisions(offset, axis, start)
+
+        if axis == X_AXIS:
+            self.rect.left += allowed
+        else:
+            self.rect.top += allowed
+            if blocked:
+                self.ySpeed = 0
+
+        # Fire map triggers along our path
+        self.checkTriggers(start.union(self.getColRect()))
 
     def move(self, xOffset, yOffset):
         if xOffset == 0 and yOffset == 0:
             pass  # Is something pushes this, this will be calculated elsewhere
         else:
-            #self.resetCollisionsCache()
             if xOffset:
-                self.rect.left += xOffset
-                self.rect.clamp_ip(self.boundary)
-                self.checkActionsOnCollision()
-                self.checkXCollisions(xOffset)
+                self.moveAxis(xOffset, X_AXIS)
             if yOffset:
-                self.rect.top += yOffset
-                self.rect.clamp_ip(self.boundary)
-                self.checkActionsOnCollision()
-                self.checkYCollisions(yOffset)
+                self.moveAxis(yOffset, Y_AXIS)
+
+        # Our rect could also have been modified outside move (i.e. ladders)
+        self.positionChanged()
 
     def calculateGravity(self):
         if self.inLadder:
@@ -200,10 +208,16 @@ class Player(Actor, WithCollisionCache, ScoreableMixin):
 
     def draw(self, toSurface):
         import pygame
-        rect = self.parent.parentMap.translateCoordinates(self.rect)
+        rect = self.getDrawRect()
         self.animation.draw(toSurface, rect)
         #toSurface.fill((128, 128, 128, 128), (x+self.xOffset, y+self.yOffset, self.rect.width, self.rect.height), pygame.BLEND_RGBA_MAX)
 
+    def getDrawArea(self):
+        return pygame.Rect(self.rect.topleft, self.animation.get().getSize())
+
+    def isAnimated(self):
+        return True
+
     def updateMapDisplayPosition(self, renderer):
         w, h = renderer.getSize()
 
@@ -253,7 +267,7 @@ class Player(Actor, WithCollisionCache, ScoreableMixin):
 
     def _checkLadderCollision(self):
         for c in self.getCollisions():
-            if c[1].isA('ladder') is True:
+            if c[1].collisionFlags & TILE_LADDER:
                 self.inLadder = True
                 self.ladderX = c[0].centerx - self.xOffset
 
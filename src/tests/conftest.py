@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# Game modules are imported as "game.xxx", from src folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
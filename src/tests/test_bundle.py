@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import os
+import mmap
+
+from game.maps import bundle, tmx
+
+MAP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data/maps/kenney/level-test-1.tmx')
+
+
+def normalized(mapData):
+    '''
+    Map data with tiles as lists, so parsed and loaded maps can be compared
+    '''
+    mapData = dict(mapData, flippedTiles=[tuple(t) for t in mapData['flippedTiles']])  # json has no tuples
+    mapData['layers'] = [
+        dict(layer, data=list(layer['data'])) if layer['type'] == 'layer' else layer for layer in mapData['layers']
+    ]
+    return mapData
+
+
+def test_compiled_map_loads_as_parsed(tmp_path):
+    bundleFile = str(tmp_path / 'level.mapb')
+    assert bundle.compileMap(MAP_FILE, bundleFile) == bundleFile
+
+    parsed = tmx.parse(MAP_FILE)
+    loaded = bundle.load(bundleFile)
+    assert normalized(loaded) == normalized(parsed)
+
+    # Tiles are plain arrays, not views of the (already closed) bundle
+    layer = next(l for l in loaded['layers'] if l['type'] == 'layer')
+    layer['data'][0] = 1
+
+
+def test_bundle_is_closed_after_loading(tmp_path, monkeypatch):
+    bundleFile = str(tmp_path / 'level.mapb')
+    bundle.compileMap(MAP_FILE, bundleFile)
+
+    mappings = []
+    originalMmap = mmap.mmap
+
+    def mapFile(*args, **kwargs):
+        mappings.append(originalMmap(*args, **kwargs))
+        return mappings[-1]
+
+    monkeypatch.setattr(bundle.mmap, 'mmap', mapFile)
+    bundle.load(bundleFile)
+    assert mappings and all(mm.closed for mm in mappings)
+
+
+def test_outdated_bundle_is_ignored(tmp_path):
+    bundleFile = str(tmp_path / 'level.mapb')
+    bundle.compileMap(MAP_FILE, bundleFile)
+    os.utime(bundleFile, (0, 0))
+    assert bundle.load(bundleFile, MAP_FILE) is None
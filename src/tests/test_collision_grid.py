@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import pygame
+
+from game.collision_grid import (
+    CollisionGrid, flagsTable, objectFlags,
+    TILE_COLLIDES, TILE_BLOCKS, TILE_LADDER, TILE_LETHAL, TILE_PARTIAL,
+)
+
+
+class FakeTile(object):
+    def __init__(self, objType=None, blocks=True, rect=(0, 0, 32, 32)):
+        self.objType = objType
+        self.blocks = blocks
+        self.rect = pygame.Rect(rect)
+
+    def getRect(self):
+        return self.rect
+
+
+def test_flags_of_objects():
+    assert objectFlags(FakeTile()) == TILE_COLLIDES | TILE_BLOCKS
+    assert objectFlags(FakeTile('ladder', blocks=False)) == TILE_COLLIDES | TILE_LADDER
+    assert objectFlags(FakeTile('lethal')) == TILE_COLLIDES | TILE_BLOCKS | TILE_LETHAL
+
+
+def test_table_marks_partial_tiles():
+    table = flagsTable([FakeTile(), FakeTile(rect=(0, 16, 32, 16))], 32, 32)
+    assert table[0] == 0
+    assert not table[1] & TILE_PARTIAL
+    assert table[2] & TILE_PARTIAL
+
+
+def test_merge_and_queries():
+    table = flagsTable([FakeTile(), FakeTile('ladder', blocks=False)], 32, 32)
+    grid = CollisionGrid(3, 2)
+    grid.merge([1, 0, 0, 0, 0, 0], table)
+    grid.merge([0, 0, 2, 0, 0, 2], table)
+    assert grid.get(0, 0) == table[1]
+    assert grid.get(2, 0) == table[2] and grid.get(2, 1) == table[2]
+    assert grid.flagsIn(0, 0, 3, 2) == table[1] | table[2]
+    assert grid.flagsIn(0, 1, 2, 2) == 0
+
+    grid.fill(0, 0, 3, 1, 0)
+    assert grid.row(0, 0, 3) == bytearray(3)
+    grid.set(1, 1, table[1])
+    assert grid.flagsIn(0, 1, 3, 2) == table[1] | table[2]
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from game.effects import pool
+from game.effects.effects import Effect
+from game.effects.pool import EffectsPool
+from game.renderer import Renderer
+
+
+class Spark(Effect):
+    def __init__(self, rect):
+        super().__init__(rect)
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+    def update(self):
+        return True
+
+
+class FakeImage(object):
+    def __init__(self, width, height):
+        self.size = (width, height)
+        self.fills = 0
+
+    def getSize(self):
+        return self.size
+
+    def fill(self, color):
+        self.fills += 1
+
+
+class FakeRenderer(object):
+    def image(self, width, height):
+        return FakeImage(width, height)
+
+
+@pytest.fixture
+def effectsPool(monkeypatch):
+    monkeypatch.setattr(Renderer, 'renderer', FakeRenderer(), raising=False)
+    return EffectsPool()
+
+
+def test_released_effects_are_reused(effectsPool):
+    effect = effectsPool.acquire(Spark, (0, 0, 1, 1))
+    assert effect.pooled
+    effectsPool.release(effect)
+    assert effect.released and not effect.pooled
+    effectsPool.release(effect)  # Released twice, kept once
+    assert effectsPool.effects[Spark] == [effect]
+
+    again = effectsPool.acquire(Spark, (5, 5, 1, 1))
+    assert again is effect
+    assert again.rect == (5, 5, 1, 1) and not again.released  # Initialized again
+
+
+def test_not_pooled_effects_are_not_kept(effectsPool):
+    effect = Spark((0, 0, 1, 1))
+    effectsPool.release(effect)
+    assert effect.released
+    assert not effectsPool.effects.get(Spark)
+
+
+def test_pool_overflow(effectsPool):
+    effects = [effectsPool.acquire(Spark, (0, 0, 1, 1)) for _ in range(pool.MAX_POOLED_EFFECTS + 4)]
+    for effect in effects:
+        effectsPool.release(effect)
+    assert len(effectsPool.effects[Spark]) == pool.MAX_POOLED_EFFECTS
+
+
+def test_images_are_recycled_by_size(effectsPool):
+    image = effectsPool.image(10, 10)
+    effectsPool.releaseImage(image)
+    assert effectsPool.image(10, 8) is not image
+    recycled = effectsPool.image(10, 10)
+    assert recycled is image and recycled.fills == 2  # Cleared every time
+
+    images = [effectsPool.image(4, 4) for _ in range(pool.MAX_POOLED_IMAGES + 2)]
+    for image in images:
+        effectsPool.releaseImage(image)
+    assert len(effectsPool.images[(Renderer.renderer, 4, 4)]) == pool.MAX_POOLED_IMAGES
+
+
+def test_rendered_images_overflow(effectsPool, monkeypatch):
+    monkeypatch.setattr(pool, 'RENDERED_CACHE', 2)
+    renders = []
+
+    def render(value):
+        def doRender():
+            renders.append(value)
+            return effectsPool.image(8, 8)
+        return doRender
+
+    inUse = effectsPool.acquireRendered('a', render('a'))
+    assert effectsPool.acquireRendered('a', render('a')) is inUse
+    free = effectsPool.acquireRendered('b', render('b'))
+    effectsPool.releaseRendered(free)
+    effectsPool.acquireRendered('c', render('c'))
+    assert renders == ['a', 'b', 'c']
+
+    # "b" was the only one not in use, so it's discarded and its image recycled
+    assert len(effectsPool.rendered) == 2
+    assert effectsPool.image(8, 8) is free
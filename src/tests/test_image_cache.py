@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from game.image_cache import ImageCache
+
+
+class FakeImage(object):
+    def __init__(self, name):
+        self.name = name
+
+    def subimage(self, rect):
+        return FakeImage('{}[{},{},{},{}]'.format(self.name, *rect))
+
+    def flip(self, flipX, flipY, rotate):
+        return FakeImage('{}<{:d}{:d}{:d}>'.format(self.name, flipX, flipY, rotate))
+
+
+class FakeRenderer(object):
+    def __init__(self):
+        self.loaded = []
+
+    def imageFromFile(self, path):
+        self.loaded.append(path)
+        return FakeImage(path)
+
+
+@pytest.fixture
+def cache():
+    return ImageCache()
+
+
+def test_acquire_shares_images(cache):
+    renderer = FakeRenderer()
+    image = cache.acquire(renderer, 'tiles.png')
+    assert cache.acquire(renderer, 'tiles.png') is image
+    assert len(renderer.loaded) == 1
+    assert len(cache) == 1
+    assert cache.entries[cache.keys[image]].references == 2
+    # Other renderers get their own images
+    assert cache.acquire(FakeRenderer(), 'tiles.png') is not image
+
+
+def test_transforms_reference_their_parents(cache):
+    renderer = FakeRenderer()
+    tile = cache.acquire(renderer, 'tiles.png', (('subimage', 0, 0, 16, 16),))
+    assert tile.name.endswith('tiles.png[0,0,16,16]')
+    flipped = cache.derive(tile, ('flip', True, False, False))
+    assert cache.derive(tile, ('flip', True, False, False)) is flipped
+    assert len(cache) == 3  # File, tile and flipped tile
+
+    cache.release(flipped)
+    assert len(cache) == 3  # Still one reference left
+    cache.release(flipped)
+    assert len(cache) == 2
+    cache.release(tile)
+    assert len(cache) == 0 and not cache.keys
+
+
+def test_derive_and_release_of_not_cached_images(cache):
+    image = FakeImage('loose')
+    derived = cache.derive(image, ('subimage', 1, 2, 3, 4))
+    assert derived.name == 'loose[1,2,3,4]'
+    cache.release(derived)  # Does nothing
+    assert len(cache) == 0
+
+
+def test_invalid_operation(cache):
+    with pytest.raises(Exception):
+        cache.apply(FakeImage('x'), ('rotate', 90))
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from game.maps import Maps
+
+
+def test_unload_and_shutdown_cancel_prefetches():
+    maps = Maps(None)
+    running, release = threading.Event(), threading.Event()
+
+    def slowPrefetch():
+        running.set()
+        release.wait(5)
+
+    for mapId in ('first', 'second', 'third'):
+        maps.add(mapId, '{}.tmx'.format(mapId))
+        maps.get(mapId).prefetchData = slowPrefetch
+
+    for mapId in ('first', 'second', 'third'):
+        maps.prefetch(mapId)
+    running.wait(5)
+    first, second, third = (maps.prefetching[m] for m in ('first', 'second', 'third'))
+
+    # Only one worker, so second and third are still queued
+    maps.unload('second')
+    assert second.cancelled()
+    assert 'second' not in maps.prefetching
+
+    maps.shutdown()
+    assert third.cancelled()
+    assert maps.prefetching == {} and maps.executor is None
+
+    release.set()
+    first.result(5)  # Running one is not waited for, but ends normally
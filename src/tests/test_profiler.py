@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from game.profiler import Profiler, percentile
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile([], 0.5) == 0.0
+    assert percentile([7.0], 0.99) == 7.0
+    assert percentile(values, 0.0) == 1.0
+    assert percentile(values, 0.50) == 51.0
+    assert percentile(values, 0.95) == 96.0
+    assert percentile(values, 1.0) == 100.0
+
+
+def test_stats_of_sections():
+    p = Profiler(enabled=True, window=10)
+    for i in range(20):
+        p.beginFrame()
+        p.current['logic'] = i / 1000.0  # As if a section took i ms
+        p.endFrame()
+    stats = p.stats()
+    assert p.frames == 20
+    logic = stats['logic']
+    # Only last 10 frames are kept
+    assert logic['samples'] == 10
+    assert abs(logic['mean'] - 14.5) < 1e-6
+    assert abs(logic['p50'] - 15.0) < 1e-6
+    assert abs(logic['max'] - 19.0) < 1e-6
+    assert 'frame' in stats
+
+
+def test_disabled_keeps_nothing():
+    p = Profiler()
+    p.beginFrame()
+    with p.section('logic'):
+        pass
+    p.endFrame()
+    assert p.stats() == {} and p.frames == 0
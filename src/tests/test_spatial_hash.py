@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import pygame
+
+from game.spatial_hash import SpatialHash
+
+
+class Box(object):
+    def __init__(self, x, y, w=32, h=32):
+        self.rect = pygame.Rect(x, y, w, h)
+
+    def getColRect(self):
+        return self.rect
+
+
+def test_insert_and_retrieve_in_insertion_order():
+    index = SpatialHash(64)
+    a, b, c = Box(10, 10), Box(40, 20, 100, 100), Box(450, 450)
+    for obj in (a, b, c):
+        index.insert(obj)
+    assert len(index) == 3
+    # b covers cells (0, 0) to (2, 1)
+    assert set(index.cells) == {(0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (2, 1), (7, 7)}
+    assert index.retrieve(pygame.Rect(0, 0, 64, 64)) == [a, b]
+    assert index.retrieve(pygame.Rect(130, 70, 4, 4)) == [b]
+    assert index.retrieve(pygame.Rect(300, 300, 4, 4)) == []
+
+
+def test_update_moves_between_cells():
+    index = SpatialHash(64)
+    a, b = Box(10, 10), Box(20, 20)
+    index.insert(a)
+    index.insert(b)
+    a.rect.x = 20  # Same cell
+    assert not index.update(a)
+    a.rect.topleft = (200, 10)
+    assert index.update(a)
+    assert index.retrieve(pygame.Rect(0, 0, 4, 4)) == [b]
+    assert index.retrieve(pygame.Rect(200, 10, 4, 4)) == [a]
+    # Moving keeps insertion order
+    a.rect.topleft = (20, 20)
+    index.update(a)
+    assert index.retrieve(pygame.Rect(0, 0, 64, 64)) == [a, b]
+
+
+def test_remove_frees_cells():
+    index = SpatialHash(64)
+    a, b = Box(10, 10), Box(100, 10)
+    index.insert(a)
+    index.insert(b)
+    assert index.remove(a)
+    assert not index.remove(a)
+    assert (0, 0) not in index.cells
+    assert index.retrieve(pygame.Rect(0, 0, 200, 64)) == [b]
+    index.clear()
+    assert len(index) == 0 and not index.cells
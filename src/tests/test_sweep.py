@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import pygame
+
+from game.collision_cache import sweepAxis, X_AXIS, Y_AXIS
+from game.collision_grid import TILE_COLLIDES, TILE_BLOCKS, TILE_COLLECTABLE, TILE_LETHAL, TILE_LOCK
+from player import Player
+
+
+class Obj(object):
+    def __init__(self, flags=TILE_COLLIDES | TILE_BLOCKS):
+        self.collisionFlags = flags
+
+
+def candidate(rect, flags=TILE_COLLIDES | TILE_BLOCKS):
+    return (pygame.Rect(rect), Obj(flags), None)
+
+
+def test_fast_movement_does_not_tunnel():
+    wall = candidate((40, 0, 8, 32))
+    rect = pygame.Rect(0, 0, 16, 16)
+    x = 0
+    for _ in range(10):  # 16 px/tick, thinner wall than movement
+        allowed, blocked, contacts = sweepAxis(rect.move(x, 0), 16, X_AXIS, [wall])
+        x += allowed
+        if blocked:
+            break
+    assert blocked and x + 16 == 40 - 1
+    assert contacts == [wall]
+
+
+def test_gap_is_kept_on_both_directions():
+    floor = candidate((0, 100, 64, 32))
+    ceiling = candidate((0, 0, 64, 32))
+    rect = pygame.Rect(8, 50, 16, 16)
+    assert sweepAxis(rect, 100, Y_AXIS, [floor, ceiling])[:2] == (100 - 1 - 66, True)
+    assert sweepAxis(rect, -100, Y_AXIS, [floor, ceiling], gap=3)[:2] == (32 + 3 - 50, True)
+    assert sweepAxis(rect, 10, Y_AXIS, [floor, ceiling]) == (10, False, [])
+
+
+def test_non_blocking_objects_are_contacts():
+    coin = candidate((30, 0, 8, 8), TILE_COLLIDES | TILE_COLLECTABLE)
+    behindWall = candidate((60, 0, 8, 8), TILE_COLLIDES | TILE_COLLECTABLE)
+    wall = candidate((50, 0, 8, 32))
+    allowed, blocked, contacts = sweepAxis(pygame.Rect(0, 0, 16, 16), 100, X_AXIS, [coin, wall, behindWall])
+    assert (allowed, blocked) == (50 - 1 - 16, True)
+    assert coin in contacts and wall in contacts and behindWall not in contacts
+
+
+def test_overlapped_blocker_pushes_out():
+    wall = candidate((10, 0, 32, 32))
+    allowed, blocked, _ = sweepAxis(pygame.Rect(0, 0, 16, 16), 4, X_AXIS, [wall])
+    assert blocked and allowed == 10 - 1 - 16  # Back out of the wall
+
+
+def test_support_does_not_block_up_or_sideways():
+    platform = candidate((0, 60, 64, 16))
+    rect = pygame.Rect(8, 50, 16, 16)  # Feet inside the platform (it has lifted us)
+    assert sweepAxis(rect, -10, Y_AXIS, [platform])[:2] == (-10, False)
+    assert sweepAxis(rect, 10, X_AXIS, [platform])[:2] == (10, False)
+    # But moving down it holds us over it
+    assert sweepAxis(rect, 5, Y_AXIS, [platform])[:2] == (60 - 1 - 66, True)
+
+
+class Mover(object):
+    '''
+    Just what Player.moveAxis needs, with actions removing (opening) locks and counting deaths
+    '''
+    moveAxis = Player.moveAxis
+
+    def __init__(self, candidates):
+        self.rect = pygame.Rect(0, 0, 16, 16)
+        self.boundary = pygame.Rect(0, 0, 1000, 1000)
+        self.candidates = candidates
+        self.ySpeed = 0
+        self.deaths = 0
+
+    def getColRect(self):
+        return self.rect
+
+    def sweepCollisions(self, offset, axis, rect=None, gap=1):
+        return sweepAxis(rect, offset, axis, self.candidates, gap)
+
+    def checkTriggers(self, rect=None):
+        pass
+
+    def checkActionsOnCollision(self, contacts, handled=None):
+        removed = False
+        for c in contacts:
+            key = (tuple(c[0]), id(c[1]))
+            if key in handled:
+                continue
+            handled.add(key)
+            if c[1].collisionFlags & TILE_LETHAL:
+                self.deaths += 1
+            if c[1].collisionFlags & TILE_LOCK:
+                self.candidates.remove(c)
+                removed = True
+        return removed
+
+
+def test_resweep_acts_on_new_contacts():
+    lock = candidate((20, 0, 8, 16), TILE_COLLIDES | TILE_BLOCKS | TILE_LOCK)
+    lethal = candidate((40, 0, 8, 16), TILE_COLLIDES | TILE_LETHAL)
+    mover = Mover([lock, lethal])
+    mover.moveAxis(32, X_AXIS)
+    assert mover.rect.left == 32
+    assert mover.deaths == 1
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import pygame
+
+from game.sweep_and_prune import SweepAndPrune
+
+
+class Box(object):
+    def __init__(self, x, y, w=32, h=16):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.reach = self.rect.inflate(64, 0)
+
+    def getColRect(self):
+        return self.rect
+
+
+def test_insert_and_retrieve():
+    index = SweepAndPrune()
+    a, b, c = Box(0, 0), Box(100, 0), Box(50, 100, w=200)
+    for obj in (c, a, b):
+        index.insert(obj)
+    assert len(index) == 3
+    assert index.retrieve(pygame.Rect(10, 5, 4, 4)) == [a]
+    assert index.retrieve(pygame.Rect(110, 5, 4, 4)) == [b]
+    # Wide objects starting far to the left of query are found too
+    assert index.retrieve(pygame.Rect(220, 105, 4, 4)) == [c]
+    assert index.retrieve(pygame.Rect(500, 0, 10, 10)) == []
+
+
+def test_update_keeps_order():
+    index = SweepAndPrune()
+    a, b = Box(0, 0), Box(100, 0)
+    index.insert(a)
+    index.insert(b)
+    a.rect.x = 200
+    index.update(a)
+    assert list(index) == [b, a]
+    assert index.lefts == [100, 200]
+    assert index.retrieve(pygame.Rect(210, 5, 4, 4)) == [a]
+    assert index.retrieve(pygame.Rect(10, 5, 4, 4)) == []
+
+
+def test_remove():
+    index = SweepAndPrune()
+    a, b = Box(0, 0), Box(100, 0)
+    index.insert(a)
+    index.insert(b)
+    assert index.remove(a)
+    assert not index.remove(a)
+    assert list(index) == [b]
+    assert index.retrieve(pygame.Rect(10, 5, 4, 4)) == []
+
+
+def test_custom_rects():
+    index = SweepAndPrune(lambda obj: obj.reach)
+    a = Box(100, 0)
+    index.insert(a)
+    assert index.retrieve(pygame.Rect(70, 5, 4, 4)) == [a]
+    assert index.retrieve(pygame.Rect(30, 5, 4, 4)) == []
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import pygame
+import pytest
+
+from game.text import TextCache
+
+STYLE = (None, 20, (255, 255, 255))
+
+
+@pytest.fixture
+def cache():
+    pygame.font.init()
+    cache = TextCache()
+    yield cache
+    cache.clear()
+
+
+def test_lines_are_rendered_by_font_and_cached(cache):
+    line = cache.line('AVAWAY To', STYLE)
+    expected = cache.font(None, 20).render('AVAWAY To', True, STYLE[2])
+    assert line.get_size() == expected.get_size()
+    assert cache.line('AVAWAY To', STYLE) is line
+    assert cache.line('AVAWAY To', (None, 20, (0, 0, 0))) is not line
+
+
+def test_counters_are_placed_by_advance(cache):
+    font = cache.font(None, 20)
+    surface = cache.counter('1234', STYLE)
+    advances = [m[4] for m in font.metrics('123')]
+    width = sum(advances) + font.render('4', True, STYLE[2]).get_width()
+    assert surface.get_size() == (width, font.get_height())
+    assert 'x' not in cache.atlas(STYLE).glyphs
+    cache.counter('x1', STYLE)
+    assert 'x' in cache.atlas(STYLE).glyphs
+    assert not cache.lines  # Counters are not cached
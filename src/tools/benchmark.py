@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+
+from argparse import ArgumentParser
+import json
+
+from pygame import constants as const
+
+import game
+from game import benchmark
+from game.actors import actorsFactory
+from player import Player
+import items  # noqa: F401  Registers items actors
+
+
+class BenchmarkState(game.game_state.GameState):
+    '''
+    Plays a map as nivelin does, but without music nor keyboard
+    '''
+    pressKey = {
+        const.K_RIGHT: Player.goRight,
+        const.K_LEFT: Player.goLeft,
+        const.K_DOWN: Player.goDown,
+        const.K_UP: Player.goUp,
+        const.K_SPACE: Player.jump,
+    }
+    releaseKey = {
+        const.K_RIGHT: Player.stopRight,
+        const.K_LEFT: Player.stopLeft,
+        const.K_DOWN: Player.stopDown,
+        const.K_UP: Player.stopUp,
+        const.K_SPACE: Player.stopJump,
+    }
+
+    def __init__(self, mapFile):
+        super().__init__('benchmark')
+        self.mapFile = mapFile
+        self.map = None
+        self.player = None
+
+    def on_init(self):
+        actorsFactory.registerType('Player', Player)
+        self.maps = game.maps.Maps(self.controller)
+        self.maps.add('benchmark', self.mapFile)
+        self.maps.load()
+        self.map = self.maps.get('benchmark')
+        players = list(self.map.getActors('Player'))
+        self.player = players[0] if players else None
+
+    def on_enter(self):
+        pass
+
+    def on_exit(self):
+        pass
+
+    def on_quit(self):
+        self.maps.shutdown()
+
+    def on_keydown(self, key):
+        fnc = self.pressKey.get(key)
+        if fnc is not None and self.player:
+            fnc(self.player)
+
+    def on_keyup(self, key):
+        fnc = self.releaseKey.get(key)
+        if fnc is not None and self.player:
+            fnc(self.player)
+
+    def on_frame(self):
+        self.map.update()
+        if self.player:
+            self.player.updateMapDisplayPosition(self.controller.renderer)
+
+    def on_render(self):
+        self.map.draw(self.controller.renderer)
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description='Benchmark a map without display (needs src folder on PYTHONPATH and as current dir)'
+    )
+
+    parser.add_argument('map', metavar='MAP', type=str, help='tmx map to be played.')
+    parser.add_argument('--ticks', type=int, default=1000, help='Number of ticks to run. Defaults to 1000.')
+    parser.add_argument(
+        '--script', type=str, default=None, help='json file with input events: [[tick, "down"|"up", "K_RIGHT"], ...]'
+    )
+    parser.add_argument(
+        '--draw-every', type=int, default=1, help='Draw once every this number of ticks (0 = never). Defaults to 1.'
+    )
+    parser.add_argument(
+        '--no-blits', default=False, action='store_true', help='Count blits, but do not really perform them'
+    )
+    parser.add_argument(
+        '--dirty-rects', default=False, action='store_true', help='Draw only changed regions of screen'
+    )
+    parser.add_argument(
+        '--allocations', default=False, action='store_true', help='Trace memory allocations (much slower)'
+    )
+    parser.add_argument('--size', metavar=('WIDTH', 'HEIGHT'), type=int, nargs=2, default=(1280, 960))
+    parser.add_argument('--json', type=str, default=None, help='Also write results to this json file')
+
+    args = parser.parse_args()
+
+    controller = benchmark.createController(
+        args.size[0], args.size[1], drawing=not args.no_blits, dirtyRects=args.dirty_rects
+    )
+    controller.add(BenchmarkState(args.map))
+
+    script = benchmark.loadScript(args.script) if args.script else None
+    results = benchmark.run(
+        controller, args.ticks, script, drawEvery=args.draw_every, traceAllocations=args.allocations
+    )
+    controller.quit()
+
+    for key, value in results.items():
+        print('{:<20} {}'.format(key, round(value, 3) if isinstance(value, float) else value))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
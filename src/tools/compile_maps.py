@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+
+from argparse import ArgumentParser
+import glob
+import os
+
+from game.maps import bundle
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description='Compile tmx maps into bundles that loads faster (needs src folder on PYTHONPATH)'
+    )
+
+    parser.add_argument(
+        'files',
+        metavar='FILE',
+        type=str,
+        nargs='+',
+        help='List of tmx maps to be compiled (patterns allowed).',
+    )
+    parser.add_argument(
+        '--force', default=False, action='store_true', help='Compile maps even if its bundle is up to date'
+    )
+    parser.add_argument(
+        '--verbose', default=False, action='store_true', help='Print useful information of compilation process'
+    )
+
+    args = parser.parse_args()
+
+    print('Compiler of tmx maps to bundles')
+
+    for pattern in args.files:
+        for f in sorted(glob.glob(pattern)) or [pattern]:
+            bundleFile = bundle.bundlePath(f)
+            if not args.force and os.path.exists(bundleFile) and bundle.load(bundleFile, f) is not None:
+                if args.verbose:
+                    print('* {} is up to date'.format(bundleFile))
+                continue
+            bundle.compileMap(f, bundleFile)
+            if args.verbose:
+                print('* {} --> {} ({} bytes)'.format(f, bundleFile, os.path.getsize(bundleFile)))
+
+
+if __name__ == '__main__':
+    main()